@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure end-to-end latency of chunked vs single-job transcription.
+
+Runs offline against pipeline.chunked.FakeBackend, which replays the words
+of a reference call with simulated service latency, per-chunk timestamp
+jitter and shuffled speaker labels. The stitched result is checked against
+the reference: same word sequence, and one consistent label per speaker.
+
+Usage:
+    python benchmarks/bench_chunked_transcription.py --minutes 120
+"""
+
+import argparse
+import time
+
+from synthetic_calls import make_call
+
+from pipeline.chunked import FakeBackend, plan_chunks, transcribe_chunked
+
+
+def check(reference, stitched):
+    ref_text = [w.text for w in reference]
+    out_text = [w.text for w in stitched]
+    if ref_text != out_text:
+        mismatch = next((i for i, (a, b) in enumerate(zip(ref_text, out_text)) if a != b),
+                        min(len(ref_text), len(out_text)))
+        raise AssertionError(f"word sequence differs at word {mismatch} "
+                             f"({len(ref_text)} reference vs {len(out_text)} stitched)")
+    pairs = {(r.speaker, s.speaker) for r, s in zip(reference, stitched)}
+    if len(pairs) != len({r.speaker for r in reference}) or len(pairs) != len({s for _, s in pairs}):
+        raise AssertionError(f"speaker labels not consistent across chunks: {sorted(pairs)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--minutes', type=float, default=120, help="length of the synthetic recording")
+    parser.add_argument('--chunk-minutes', type=float, default=10)
+    parser.add_argument('--overlap-seconds', type=float, default=30)
+    parser.add_argument('--realtime-factor', type=float, default=0.002,
+                        help="simulated seconds of processing per second of audio")
+    parser.add_argument('--overhead', type=float, default=0.5, help="simulated per-job overhead (s)")
+    args = parser.parse_args()
+
+    # Synthetic turns average ~12.5 s including gaps.
+    call = make_call(int(args.minutes * 60 / 12.5), seed=7)
+    backend = FakeBackend.from_call_data(call, realtime_factor=args.realtime_factor,
+                                         overhead_s=args.overhead)
+    duration = backend.duration_ms('fake')
+    chunk_ms = int(args.chunk_minutes * 60_000)
+    overlap_ms = int(args.overlap_seconds * 1000)
+    chunks = plan_chunks(duration, chunk_ms, overlap_ms)
+    print(f"recording: {duration / 60_000:.1f} min, {len(backend.words):,} words, "
+          f"{len(chunks)} chunks of {args.chunk_minutes:g} min with {args.overlap_seconds:g} s overlap")
+
+    started = time.perf_counter()
+    single = transcribe_chunked('fake', backend, chunk_ms=duration + 1, overlap_ms=0)
+    single_s = time.perf_counter() - started
+    check(backend.words, single.words)
+
+    started = time.perf_counter()
+    chunked = transcribe_chunked('fake', backend, chunk_ms=chunk_ms, overlap_ms=overlap_ms)
+    chunked_s = time.perf_counter() - started
+    check(backend.words, chunked.words)
+
+    print(f"single job: {single_s:7.2f} s")
+    print(f"chunked:    {chunked_s:7.2f} s  ({single_s / chunked_s:.1f}x faster, "
+          f"{len(chunked.utterances)} utterances, stitched output matches reference)")
+
+
+if __name__ == '__main__':
+    main()
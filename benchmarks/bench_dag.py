@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark selective re-execution with the memoized stage graph.
+
+Builds a synthetic corpus, then times a full recompute of every call (load,
+tag, merge, seed) against stage-graph runs after typical edits: nothing
+changed, one stage's rules edited, max_gap_s changed and a compliance
+suggestion reworded. Tags and checklists from the graph are checked against
+a full recompute with the edited parameters.
+
+Usage:
+    python benchmarks/bench_dag.py --calls 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic_calls import write_corpus
+
+from pipeline import jsonio, stages
+from pipeline.dag import OutputStore, StageGraph
+from pipeline.sources import call_sources
+
+
+def full_recompute(paths, rules, max_gap_s, templates):
+    compiled = stages.compile_rules(rules)
+    results = {}
+    for path in paths:
+        call = jsonio.load_file(path)
+        tagged = [dict(u, stage=stages.tag_stage(u['text'], compiled)) for u in call['utterances']]
+        segments = stages.merge_adjacent(tagged, max_gap_s=max_gap_s)
+        results[path] = ([u['stage'] for u in tagged], stages.compliance_seed(segments, templates))
+    return results
+
+
+def timed_run(store_path, sources, **graph_options):
+    store = OutputStore(store_path)
+    graph = StageGraph(store, **graph_options)
+    counts = {}
+    started = time.perf_counter()
+    for call_id, path in sources:
+        for node in graph.run(call_id, path).computed:
+            counts[node] = counts.get(node, 0) + 1
+    store.commit()
+    elapsed = time.perf_counter() - started
+    return elapsed, counts, graph
+
+
+def check(graph, sources, expected, sample=200):
+    for call_id, path in sources[:sample]:
+        tags, checklist = expected[path]
+        assert graph.store.value(call_id, 'tag') == tags, call_id
+        assert graph.store.value(call_id, 'summary')['compliance_check'] == checklist, call_id
+    graph.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=10000)
+    parser.add_argument('--utterances', type=int, default=134)
+    args = parser.parse_args()
+
+    rules = [(stage, list(keys)) for stage, keys in stages.STAGE_RULES]
+    edited_rules = [(stage, keys + [r"\bquote\b"] if stage == "Financing" else keys) for stage, keys in rules]
+    templates = list(stages.COMPLIANCE_TEMPLATES)
+    edited_templates = [t if t[0] != "Closing & Thank You" else (t[0], t[1], t[2], t[3] + " Leave a card.")
+                        for t in templates]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'calls')
+        started = time.perf_counter()
+        write_corpus(corpus, args.calls, args.utterances)
+        print(f"wrote {args.calls} calls x {args.utterances} utterances in {time.perf_counter() - started:.1f}s")
+        sources = call_sources([corpus])
+        paths = [path for _, path in sources]
+        store_path = os.path.join(tmp, 'dag.sqlite3')
+
+        started = time.perf_counter()
+        full_recompute(paths, rules, stages.DEFAULT_MAX_GAP_S, templates)
+        print(f"\nfull recompute (load + tag + merge + seed): {time.perf_counter() - started:8.2f}s")
+
+        runs = [
+            ("graph: first run", dict(rules=rules, templates=templates), None),
+            ("graph: nothing changed", dict(rules=rules, templates=templates), None),
+            ("graph: Financing rule added (quote)", dict(rules=edited_rules, templates=templates),
+             (edited_rules, stages.DEFAULT_MAX_GAP_S, templates)),
+            ("graph: max_gap_s 8 -> 6", dict(rules=edited_rules, templates=templates, max_gap_s=6.0),
+             (edited_rules, 6.0, templates)),
+            ("graph: suggestion reworded", dict(rules=edited_rules, templates=edited_templates, max_gap_s=6.0),
+             (edited_rules, 6.0, edited_templates)),
+        ]
+        for name, options, expect in runs:
+            elapsed, counts, graph = timed_run(store_path, sources, **options)
+            recomputed = ', '.join(f"{node}={n}" for node, n in counts.items()) or 'none'
+            print(f"{name + ':':<44}{elapsed:8.2f}s   recomputed {recomputed}")
+            if expect is not None:
+                check(graph, sources, full_recompute(paths[:200], *expect))
+            else:
+                graph.store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming export against loading the whole corpus first.
+
+Writes a synthetic corpus, then exports it to CSV twice, each in a fresh
+process so peak RSS is comparable: once with pipeline.export (calls read
+one at a time, rows written in chunks) and once by loading every call into
+memory and writing the rows afterwards. Reports time and peak RSS.
+
+Usage:
+    python benchmarks/bench_export.py --calls 5000
+"""
+
+import argparse
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_calls import write_corpus
+
+from pipeline import jsonio
+from pipeline.export import COMPLIANCE_COLUMNS, UTTERANCE_COLUMNS, compliance_rows, export_calls, utterance_rows
+from pipeline.sources import call_sources
+
+
+def load_all_then_write(corpus, output_dir):
+    calls = [(call_id, jsonio.load_file(path)) for call_id, path in call_sources([corpus])]
+    os.makedirs(output_dir, exist_ok=True)
+    for name, columns, rows in (('utterances', UTTERANCE_COLUMNS, utterance_rows),
+                                ('compliance', COMPLIANCE_COLUMNS, compliance_rows)):
+        table = [row for call_id, call in calls for row in rows(call_id, call)]
+        with open(os.path.join(output_dir, f'{name}.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([column for column, _ in columns])
+            writer.writerows(table)
+    return len(calls)
+
+
+def run_one(mode, corpus, output_dir):
+    started = time.perf_counter()
+    if mode == 'stream':
+        calls = export_calls(call_sources([corpus]), output_dir)['calls']
+    else:
+        calls = load_all_then_write(corpus, output_dir)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_mb:.1f} {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=5000)
+    parser.add_argument('--utterances', type=int, default=134)
+    parser.add_argument('--run', nargs=3, metavar=('MODE', 'CORPUS', 'OUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_one(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'calls')
+        started = time.perf_counter()
+        write_corpus(corpus, args.calls, args.utterances)
+        print(f"wrote {args.calls} calls x {args.utterances} utterances in {time.perf_counter() - started:.1f}s\n")
+        for mode, label in (('stream', 'streaming export (chunked)'), ('load-all', 'load all, then write')):
+            out = subprocess.run([sys.executable, __file__, '--run', mode, corpus, os.path.join(tmp, mode)],
+                                 check=True, capture_output=True, text=True).stdout.split()
+            elapsed, peak_mb, calls = float(out[0]), float(out[1]), int(out[2])
+            print(f"{label:<28} {elapsed:7.2f}s  {calls / elapsed * 60:>10,.0f} calls/min  peak RSS {peak_mb:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark call file parsing backends and compressed call files.
+
+Compares the stdlib json and orjson backends (if installed) on large
+synthetic calls, and plain vs .json.gz vs .json.zst files for size and
+load time.
+
+Usage:
+    python benchmarks/bench_json_backend.py --utterances 5000 --repeat 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic_calls import make_call
+
+from pipeline import jsonio
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--utterances', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    call = make_call(args.utterances, seed=1)
+    backends = ['json'] + (['orjson'] if jsonio.orjson is not None else [])
+    original = jsonio.get_backend()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = os.path.join(tmp, 'call.json')
+        jsonio.dump_file(plain, call)
+        raw = jsonio.read_bytes(plain)
+        print(f"synthetic call: {args.utterances} utterances, {len(raw):,} bytes")
+
+        print("\nparse / serialize (best of %d, ms)" % args.repeat)
+        for backend in backends:
+            jsonio.set_backend(backend)
+            parse = best_of(args.repeat, lambda: jsonio.loads(raw))
+            dump = best_of(args.repeat, lambda: jsonio.dumps(call, indent=True))
+            print(f"  {backend:<8} loads {parse:8.2f}   dumps {dump:8.2f}")
+
+        jsonio.set_backend(original)
+        suffixes = ['.json', '.json.gz'] + (['.json.zst'] if jsonio.ZSTD_AVAILABLE else [])
+        print(f"\nfile formats with backend={original} (best of {args.repeat}, ms)")
+        for suffix in suffixes:
+            path = os.path.join(tmp, 'call' + suffix)
+            write = best_of(args.repeat, lambda: jsonio.dump_file(path, call))
+            load = best_of(args.repeat, lambda: jsonio.load_file(path))
+            print(f"  {suffix:<10} {os.path.getsize(path):>12,} bytes   "
+                  f"write {write:8.2f}   load {load:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
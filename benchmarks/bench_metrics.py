@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized conversation metrics against a per-utterance loop.
+
+Generates synthetic calls in memory, computes talk time, silence, overlaps,
+interruptions and stage time with pipeline.metrics and with a straightforward
+Python loop, checks that they agree and reports the timings.
+
+Usage:
+    python benchmarks/bench_metrics.py --calls 10000
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+from synthetic_calls import make_call
+
+from pipeline.metrics import DEFAULT_MIN_SILENCE_S, UtteranceArrays, BatchMetrics
+
+
+def loop_metrics(utterances, min_silence_s=DEFAULT_MIN_SILENCE_S):
+    """Reference implementation: one pass over the utterances in start order."""
+    timed = sorted((u for u in utterances if isinstance(u['start'], (int, float))),
+                   key=lambda u: u['start'])
+    talk = defaultdict(float)
+    stage_seconds = defaultdict(float)
+    interruptions = defaultdict(int)
+    silence_total = overlap_total = longest = 0.0
+    silence_count = overlap_count = 0
+    latest_end = latest_speaker = None
+    for u in timed:
+        length = max(0.0, u['end'] - u['start'])
+        talk[u['speaker']] += length
+        stage_seconds[u['stage']] += length
+        if latest_end is not None:
+            gap = u['start'] - latest_end
+            if gap >= min_silence_s:
+                silence_total += gap
+                silence_count += 1
+                longest = max(longest, gap)
+            elif gap < 0:
+                overlap_total += min(u['end'], latest_end) - u['start']
+                overlap_count += 1
+                if u['speaker'] != latest_speaker:
+                    interruptions[u['speaker']] += 1
+        if latest_end is None or u['end'] >= latest_end:
+            latest_end, latest_speaker = u['end'], u['speaker']
+    duration = (max(u['end'] for u in timed) - timed[0]['start']) if timed else 0.0
+    return {
+        'duration': duration, 'talk': dict(talk), 'stages': dict(stage_seconds),
+        'silence': (silence_total, silence_count, longest),
+        'overlap': (overlap_total, overlap_count), 'interruptions': dict(interruptions),
+    }
+
+
+def check(metrics, calls, reference):
+    close = lambda a, b: abs(a - b) < 1e-6  # noqa: E731
+    for i, (call, ref) in enumerate(zip(calls, reference)):
+        assert close(metrics.duration[i], ref['duration']), i
+        for name, seconds in ref['talk'].items():
+            assert close(metrics.talk[i, metrics.speakers.index(name)], seconds), i
+        for name, seconds in ref['stages'].items():
+            assert close(metrics.stage_seconds[i, metrics.stages.index(name)], seconds), i
+        assert close(metrics.silence_total[i], ref['silence'][0]), i
+        assert metrics.silence_count[i] == ref['silence'][1], i
+        assert close(metrics.longest_silence[i], ref['silence'][2]), i
+        assert close(metrics.overlap_total[i], ref['overlap'][0]), i
+        assert metrics.overlap_count[i] == ref['overlap'][1], i
+        assert sum(metrics.interruptions[i]) == sum(ref['interruptions'].values()), i
+        for name, count in ref['interruptions'].items():
+            assert metrics.interruptions[i, metrics.speakers.index(name)] == count, i
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=10000)
+    parser.add_argument('--utterances', type=int, default=134)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    calls = [make_call(args.utterances, seed=i)['utterances'] for i in range(args.calls)]
+    n_utterances = sum(len(c) for c in calls)
+    print(f"generated {args.calls} calls ({n_utterances:,} utterances) in {time.perf_counter() - started:.1f}s\n")
+
+    started = time.perf_counter()
+    reference = [loop_metrics(c) for c in calls]
+    loop_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    arrays = UtteranceArrays(calls)
+    build_s = time.perf_counter() - started
+    started = time.perf_counter()
+    metrics = BatchMetrics(arrays)
+    compute_s = time.perf_counter() - started
+    started = time.perf_counter()
+    metrics.corpus()
+    corpus_s = time.perf_counter() - started
+
+    check(metrics, calls, reference)
+    print(f"python loop per call:          {loop_s * 1000:9.1f} ms")
+    print(f"vectorized: build arrays       {build_s * 1000:9.1f} ms")
+    print(f"vectorized: compute metrics    {compute_s * 1000:9.1f} ms")
+    print(f"vectorized: corpus summary     {corpus_s * 1000:9.1f} ms")
+    print(f"vectorized total               {(build_s + compute_s + corpus_s) * 1000:9.1f} ms   "
+          f"({loop_s / (build_s + compute_s + corpus_s):.1f}x)")
+    print(f"metrics only vs loop           {loop_s / compute_s:9.1f}x")
+    print("results match the loop implementation")
+
+
+if __name__ == '__main__':
+    main()
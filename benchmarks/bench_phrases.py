@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark sketch-based phrase counting against exact per-stage dicts.
+
+Streams synthetic calls into pipeline.phrases.PhraseCounter and into one
+exact Counter per stage, and reports the time per call, the memory each
+holds at the end and how many of the exact top-k phrases per stage the
+sketch reports with the exact count.
+
+The synthetic vocabulary is small, so every utterance also gets a few words
+drawn from a long-tailed (Zipf) vocabulary of ``--vocabulary`` words, the
+way names, addresses, model numbers and mis-transcriptions make the number
+of distinct phrases in real calls keep growing with the corpus.
+
+Usage:
+    python benchmarks/bench_phrases.py --calls 2000 --top-k 25
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from synthetic_calls import make_call
+
+from pipeline.phrases import PhraseCounter, phrases
+
+
+def long_tail_corpus(n_calls, n_utterances, vocabulary):
+    """Synthetic calls with Zipf-distributed extra words in every utterance."""
+    weights = list(itertools.accumulate(1.0 / rank for rank in range(1, vocabulary + 1)))
+    rng = random.Random(0)
+    for i in range(n_calls):
+        call = make_call(n_utterances, seed=i)
+        for u in call['utterances']:
+            words = [f"w{bisect.bisect(weights, rng.random() * weights[-1])}" for _ in range(3)]
+            u['text'] = f"{u['text']} {' '.join(words)}"
+        yield call
+
+
+def exact_counts(calls):
+    counts = defaultdict(Counter)
+    for call in calls:
+        for u in call['utterances']:
+            counts[u['stage']].update(phrases(u['text']))
+    return counts
+
+
+def exact_bytes(counts):
+    return sum(sys.getsizeof(c) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in c.items())
+               for c in counts.values())
+
+
+def sketch_counts(calls):
+    counter = PhraseCounter()
+    for call in calls:
+        counter.add_call(call['utterances'])
+    return counter
+
+
+def sketch_bytes(counter):
+    return sum(sketch.table.nbytes for sketch in counter.sketches.values()) + exact_bytes(
+        {stage: heavy.counts for stage, heavy in counter.heavy.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--utterances', type=int, default=134)
+    parser.add_argument('--vocabulary', type=int, default=200_000)
+    parser.add_argument('--top-k', type=int, default=25)
+    args = parser.parse_args()
+
+    def corpus():
+        return long_tail_corpus(args.calls, args.utterances, args.vocabulary)
+
+    started = time.perf_counter()
+    exact = exact_counts(corpus())
+    exact_s = time.perf_counter() - started
+    started = time.perf_counter()
+    sketch = sketch_counts(corpus())
+    sketch_s = time.perf_counter() - started
+
+    print(f"{args.calls} calls x {args.utterances} utterances, "
+          f"{sum(len(c) for c in exact.values()):,} distinct stage phrases\n")
+    print(f"{'exact':<7} {exact_s / args.calls * 1000:7.2f} ms/call   held {exact_bytes(exact) / 2 ** 20:7.1f} MB")
+    print(f"{'sketch':<7} {sketch_s / args.calls * 1000:7.2f} ms/call   held {sketch_bytes(sketch) / 2 ** 20:7.1f} MB"
+          f"  (fixed by width x depth x stages)\n")
+
+    report = sketch.report(args.top_k)
+    for stage in report['stages']:
+        counts = exact[stage['stage']]
+        expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:args.top_k]
+        found = {p['phrase']: p['count'] for p in stage['phrases']}
+        matched = sum(found.get(phrase) == count for phrase, count in expected)
+        print(f"{stage['stage']:<22} top-{args.top_k} exact matches {matched:>3}/{len(expected)}   "
+              f"overcount bound {stage['max_overcount']}")
+
+
+if __name__ == '__main__':
+    main()
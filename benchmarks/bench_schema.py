@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark version 1 against version 2 call files.
+
+Writes the same synthetic calls in both schemas and reports, per call, the
+file size, the time to load it into CallData, and the memory the loaded
+CallData holds (traced with tracemalloc). Version 2 derives segments and
+the transcript on first use, so the cost of that first access is reported
+separately.
+
+Synthetic calls store exactly the segments and transcript that would be
+derived, so this is the best case. Migration keeps stored values that
+differ, so a call with hand-edited segments or the transcription
+service's own transcript text saves less, or nothing.
+
+Usage:
+    python benchmarks/bench_schema.py --calls 50 --utterances 134
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic_calls import make_call
+
+from pipeline import jsonio
+from pipeline.schema import to_v2
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, 'service_call_analyzer'))
+
+
+def measure(paths):
+    from call_analysis.data_processing import CallData
+
+    started = time.perf_counter()
+    for path in paths:
+        CallData.from_json_file(path)
+    load_s = (time.perf_counter() - started) / len(paths)
+
+    gc.collect()
+    tracemalloc.start()
+    calls = [CallData.from_json_file(path) for path in paths]
+    loaded_kb = tracemalloc.get_traced_memory()[0] / 1024 / len(paths)
+    started = time.perf_counter()
+    for call in calls:
+        call.segments, call.full_transcript
+    derive_s = (time.perf_counter() - started) / len(paths)
+    derived_kb = tracemalloc.get_traced_memory()[0] / 1024 / len(paths)
+    tracemalloc.stop()
+    return load_s, loaded_kb, derive_s, derived_kb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--utterances', type=int, default=134)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {'v1': [], 'v2': []}
+        for i in range(args.calls):
+            call = make_call(args.utterances, seed=i)
+            for version, data in (('v1', call), ('v2', to_v2(call))):
+                path = os.path.join(tmp, f'{version}_{i:05d}.json')
+                jsonio.dump_file(path, data)
+                paths[version].append(path)
+
+        print(f"{args.calls} calls x {args.utterances} utterances, per call:\n")
+        print(f"{'schema':<7} {'file KB':>8} {'load ms':>8} {'held KB':>8} "
+              f"{'derive ms':>10} {'+derived KB':>12}")
+        for version, files in paths.items():
+            size_kb = sum(os.path.getsize(p) for p in files) / 1024 / len(files)
+            load_s, loaded_kb, derive_s, derived_kb = measure(files)
+            print(f"{version:<7} {size_kb:>8.1f} {load_s * 1000:>8.2f} {loaded_kb:>8.1f} "
+                  f"{derive_s * 1000:>10.2f} {derived_kb:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
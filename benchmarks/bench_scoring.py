@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch compliance scoring throughput.
+
+Writes a synthetic corpus with seeded checklists, then scores it with
+pipeline.scoring in-process and through process pools of increasing size,
+reporting calls per minute. Each run starts from unscored files so every
+call is loaded, scored and written.
+
+Usage:
+    python benchmarks/bench_scoring.py --calls 5000 --workers 1 2 4
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from synthetic_calls import write_corpus
+
+from pipeline import jsonio, stages
+from pipeline.sources import call_sources
+from pipeline.scoring import compile_checklist, extract_features, score_corpus
+
+
+def seed_corpus(paths):
+    for path in paths:
+        call = jsonio.load_file(path)
+        call['compliance_check'] = stages.compliance_seed(stages.merge_adjacent(call['utterances']))
+        jsonio.dump_file(path, call)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=5000)
+    parser.add_argument('--utterances', type=int, default=134)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = os.path.join(tmp, 'seeded')
+        started = time.perf_counter()
+        write_corpus(seeded, args.calls, args.utterances)
+        paths = [path for _, path in call_sources([seeded])]
+        seed_corpus(paths)
+        print(f"wrote {args.calls} seeded calls x {args.utterances} utterances "
+              f"in {time.perf_counter() - started:.1f}s (cpus: {os.cpu_count()})\n")
+
+        checklist = compile_checklist()
+        calls = [jsonio.load_file(path)['utterances'] for path in paths[:1000]]
+        started = time.perf_counter()
+        for utterances in calls:
+            extract_features(utterances, checklist)
+        per_call = (time.perf_counter() - started) / len(calls)
+        print(f"feature extraction only:   {per_call * 1e6:8.0f} us/call  "
+              f"({60 / per_call:,.0f} calls/min)")
+
+        for workers in args.workers:
+            corpus = os.path.join(tmp, f'run{workers}')
+            shutil.copytree(seeded, corpus)
+            run_paths = [path for _, path in call_sources([corpus])]
+            result = score_corpus(run_paths, workers=workers, batch_size=args.batch_size)
+            assert result['calls'] == args.calls and not result['errors'], result['errors'][:3]
+            again = score_corpus(run_paths, workers=workers, batch_size=args.batch_size)
+            assert again['written'] == 0
+            print(f"workers={workers:<3} load+score+write {result['seconds']:7.2f}s  "
+                  f"{result['calls_per_minute']:>9,} calls/min  (wrote {result['written']})")
+            shutil.rmtree(corpus)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark the static site's prebuilt search index against scanning text.
+
+Builds the inverted index for a multi-call synthetic corpus, reports its
+build time and size, then times typing queries one keystroke at a time with
+the index lookup (pipeline.search_index.search, the same algorithm app.js
+uses) and with a scan of every utterance's text.
+
+Usage:
+    python benchmarks/bench_search_index.py --calls 200
+"""
+
+import argparse
+import random
+import time
+
+from synthetic_calls import make_call
+
+from pipeline import jsonio
+from pipeline.search_index import build_search_index, search, tokenize
+
+QUERIES = ["blower motor", "maintenance plan", "heat pump", "thank you", "rebate", "financing zero"]
+
+
+def scan(utterances, query):
+    words = tokenize(query)
+    return [i for i, u in enumerate(utterances)
+            if all(any(t.startswith(w) for t in tokenize(u['text'])) for w in words)]
+
+
+def keystrokes(query):
+    return [query[:n] for n in range(2, len(query) + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--utterances', type=int, default=134)
+    args = parser.parse_args()
+
+    calls = [(f'call_{i:05d}', make_call(args.utterances, seed=i)) for i in range(args.calls)]
+    utterances = [u for _, call in calls for u in call['utterances']]
+
+    started = time.perf_counter()
+    index = build_search_index(calls)
+    build_s = time.perf_counter() - started
+    size = len(jsonio.dumps(index))
+    text_size = sum(len(u['text'].encode('utf-8')) for u in utterances)
+    print(f"{args.calls} calls, {len(utterances):,} utterances: {len(index['tokens']):,} tokens, "
+          f"index {size / 1024:.0f} KB (transcript text {text_size / 1024:.0f} KB), built in {build_s:.2f}s\n")
+
+    typed = [prefix for query in QUERIES for prefix in keystrokes(query)]
+    random.Random(0).shuffle(typed)
+    for name, lookup in (('index', lambda q: search(index, q)), ('scan', lambda q: scan(utterances, q))):
+        started = time.perf_counter()
+        results = [lookup(q) for q in typed]
+        per_key = (time.perf_counter() - started) / len(typed)
+        print(f"{name:<6} {per_key * 1000:9.3f} ms/keystroke  ({sum(map(len, results)):,} hits)")
+        if name == 'index':
+            expected = results
+        else:
+            assert results == expected
+
+
+if __name__ == '__main__':
+    main()
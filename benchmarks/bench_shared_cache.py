@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark worker memory with private vs shared call caches.
+
+Writes synthetic call files, then starts several worker processes that each
+load every call and build the page data for it, once with a private parsed
+copy per worker (CallData.from_json_file, the per-process DataFileCache
+behaviour) and once through call_analysis.shared_cache. Each worker keeps
+its calls loaded and reports RSS and PSS (resident memory with shared pages
+divided between the processes sharing them) from /proc; the total PSS is
+what the workers really cost together.
+
+Usage:
+    python benchmarks/bench_shared_cache.py --workers 4 --calls 20 --utterances 2000
+"""
+
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_calls import write_corpus
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, 'service_call_analyzer'))
+
+
+def memory_kb():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0])
+    return values['Rss'], values['Pss']
+
+
+def worker(mode, corpus, cache_dir, ready_path, go_path):
+    from call_analysis.data_processing import CallData
+    from call_analysis.shared_cache import SharedCallCache
+
+    load = CallData.from_json_file if mode == 'private' else SharedCallCache(cache_dir).load
+    paths = sorted(os.path.join(corpus, name) for name in os.listdir(corpus))
+    started = time.perf_counter()
+    calls = []
+    for path in paths:
+        call = load(path)
+        call.get_all_utterances_grouped_by_stage()
+        call.get_conversation_metrics()
+        calls.append(call)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    # Measure once every worker has loaded, so shared pages are counted shared.
+    open(ready_path, 'w').close()
+    while not os.path.exists(go_path):
+        time.sleep(0.05)
+    rss, pss = memory_kb()
+    print(f"{elapsed:.3f} {rss} {pss}")
+
+
+def run(mode, workers, corpus, cache_dir, tmp):
+    run_dir = tempfile.mkdtemp(dir=tmp)
+    go_path = os.path.join(run_dir, 'go')
+    processes = []
+    for i in range(workers):
+        ready_path = os.path.join(run_dir, f'ready_{i}')
+        processes.append((ready_path, subprocess.Popen(
+            [sys.executable, __file__, '--worker', mode, corpus, cache_dir, ready_path, go_path],
+            stdout=subprocess.PIPE, text=True)))
+    while not all(os.path.exists(ready) for ready, _ in processes):
+        time.sleep(0.05)
+    open(go_path, 'w').close()
+    return [tuple(map(float, process.communicate()[0].split())) for _, process in processes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--utterances', type=int, default=2000)
+    parser.add_argument('--worker', nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'calls')
+        write_corpus(corpus, args.calls, args.utterances)
+        size_mb = sum(os.path.getsize(os.path.join(corpus, n)) for n in os.listdir(corpus)) / 2 ** 20
+        print(f"{args.calls} calls x {args.utterances} utterances ({size_mb:.1f} MB of JSON), "
+              f"{args.workers} workers\n")
+        cache_dir = os.path.join(tmp, 'cache')
+        for mode, label in (('private', 'private'), ('shared', 'shared (cold)'), ('shared', 'shared (warm)')):
+            rows = run(mode, args.workers, corpus, cache_dir, tmp)
+            load_s = max(r[0] for r in rows)
+            rss = sum(r[1] for r in rows) / 1024
+            pss = sum(r[2] for r in rows) / 1024
+            print(f"{label:<14} load {load_s:6.2f}s   total RSS {rss:7.1f} MB   total PSS {pss:7.1f} MB   "
+                  f"PSS/worker {pss / args.workers:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark process startup for pipeline workers, the CLI and the Django app.
+
+Each case runs in a fresh interpreter; the median wall time is reported
+next to a bare ``python -c pass`` baseline. Cases whose modules are not
+installed are skipped.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DJANGO_DIR = os.path.join(REPO_DIR, 'service_call_analyzer')
+
+DJANGO_SETUP = (
+    "import os, django; "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service_call_analyzer.settings'); "
+    "django.setup(); "
+)
+
+CASES = [
+    ('interpreter', ['-c', 'pass'], REPO_DIR),
+    ('import pipeline.stages', ['-c', 'import pipeline.stages'], REPO_DIR),
+    ('import pipeline.cli', ['-c', 'import pipeline.cli'], REPO_DIR),
+    ('python -m pipeline --help', ['-m', 'pipeline', '--help'], REPO_DIR),
+    ('queue worker imports', ['-c', 'import pipeline.jobs'], REPO_DIR),
+    ('assemblyai + dotenv', ['-c', 'import assemblyai, dotenv'], REPO_DIR),
+    ('django app (views)', ['-c', DJANGO_SETUP + 'import call_analysis.views'], DJANGO_DIR),
+]
+
+
+def run_once(args, cwd):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started, result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"startup time (median of {args.repeat} runs, ms)")
+    baseline = None
+    for name, argv, cwd in CASES:
+        elapsed, returncode = run_once(argv, cwd)  # warm the page cache
+        if returncode != 0:
+            print(f"  {name:<28} skipped (exit {returncode})")
+            continue
+        median = statistics.median(run_once(argv, cwd)[0] for _ in range(args.repeat)) * 1000
+        if baseline is None:
+            baseline = median
+            print(f"  {name:<28} {median:8.1f}")
+        else:
+            print(f"  {name:<28} {median:8.1f}   (+{median - baseline:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark the tiled call timeline against per-utterance rendering.
+
+For synthetic calls of growing length, reports the time to index the
+utterances, to compute the coarsest tile (what the page shows first) and a
+tile at the finest level, the JSON size of the index and of one tile (what
+a view fetches), the number of zoom levels and of tiles in all, and how
+many elements the call-flow view draws: one per utterance for the
+transcript against a fixed number of bins for the timeline.
+
+Usage:
+    python benchmarks/bench_timeline.py --runs 5 --utterances 134 1000 4000 16000
+"""
+
+import argparse
+import statistics
+import time
+
+from synthetic_calls import make_call
+
+from pipeline import jsonio
+from pipeline.timeline import DEFAULT_BINS, Timeline
+
+# Elements the transcript draws per utterance (card, speaker line, name, icon, timestamp, text)
+ELEMENTS_PER_UTTERANCE = 6
+# Elements the timeline draws per bin (bin, stage bar, speaker bar)
+ELEMENTS_PER_BIN = 3
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--utterances', type=int, nargs='+', default=[134, 1000, 4000, 16000])
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} runs, {DEFAULT_BINS} bins per view and per tile\n")
+    print(f"{'utts':>6} {'call min':>9} {'index ms':>9} {'coarse ms':>10} {'fine ms':>8} "
+          f"{'index KB':>9} {'tile KB':>8} {'levels':>7} {'tiles':>6} "
+          f"{'utterance els':>14} {'timeline els':>13}")
+    for size in args.utterances:
+        utterances = make_call(size, seed=size)['utterances']
+        index_s, coarse_s, fine_s = [], [], []
+        for _ in range(args.runs):
+            timeline, seconds = timed(lambda: Timeline(utterances))
+            index_s.append(seconds)
+            coarse_s.append(timed(lambda: timeline.tile(0, 0))[1])
+            finest = timeline.n_levels - 1
+            fine_s.append(timed(lambda: timeline.tile(finest, 2 ** finest // 2))[1])
+        index_kb = len(jsonio.dumps(timeline.index())) / 1024
+        tile_kb = len(jsonio.dumps(timeline.tile(finest, 2 ** finest // 2))) / 1024
+        minutes = (timeline.end - timeline.start) / 60
+        print(f"{size:>6} {minutes:>9.1f} {statistics.median(index_s) * 1000:>9.1f} "
+              f"{statistics.median(coarse_s) * 1000:>10.1f} {statistics.median(fine_s) * 1000:>8.2f} "
+              f"{index_kb:>9.1f} {tile_kb:>8.1f} {timeline.n_levels:>7} {2 ** timeline.n_levels - 1:>6} "
+              f"{size * ELEMENTS_PER_UTTERANCE:>14,} {timeline.bins * ELEMENTS_PER_BIN:>13,}")
+
+
+if __name__ == '__main__':
+    main()
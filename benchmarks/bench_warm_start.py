@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark a new worker's first request with and without warm start.
+
+Each run starts a fresh process that loads the WSGI application (with
+``WARM_START`` off or on) against a synthetic call fixture and an empty
+shared call cache, then times the first and second ``GET /`` through the
+WSGI callable directly, so no server or network is involved. Startup time
+is the time to import and set up the application, including the warm
+start itself.
+
+Usage:
+    python benchmarks/bench_warm_start.py --runs 5 --utterances 134 2000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_calls import make_call
+
+from pipeline import jsonio
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DJANGO_DIR = os.path.join(REPO_DIR, 'service_call_analyzer')
+
+SETTINGS = """\
+from service_call_analyzer.settings import *  # noqa: F401,F403
+
+MEDIA_ROOT = {media_root!r}
+"""
+
+
+def request(application):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {}
+    setup_testing_defaults(environ)
+    status = []
+    started = time.perf_counter()
+    body = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    elapsed = time.perf_counter() - started
+    if not status or not status[0].startswith('200'):
+        raise RuntimeError(f"GET / failed: {status}")
+    return elapsed, len(body)
+
+
+def child():
+    started = time.perf_counter()
+    sys.path.insert(0, DJANGO_DIR)
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    startup = time.perf_counter() - started
+    first, size = request(application)
+    second, _ = request(application)
+    print(json.dumps({'startup': startup, 'first': first, 'second': second, 'bytes': size}))
+
+
+def run(settings_dir, cache_dir, warm):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='bench_settings', WARM_START='1' if warm else '0',
+               SHARED_CALL_CACHE_DIR=cache_dir,
+               PYTHONPATH=os.pathsep.join(filter(None, [settings_dir, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], env=env,
+                            stdout=subprocess.PIPE, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--utterances', type=int, nargs='+', default=[134, 2000])
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    print(f"median of {args.runs} fresh processes\n")
+    print(f"{'utts':>6} {'mode':<5} {'startup s':>10} {'1st req ms':>11} {'2nd req ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.utterances:
+            media_root = os.path.join(tmp, f'media_{size}')
+            os.makedirs(media_root)
+            jsonio.dump_file(os.path.join(media_root, 'call.json'), make_call(size, seed=size))
+            settings_dir = os.path.join(tmp, f'settings_{size}')
+            os.makedirs(settings_dir)
+            with open(os.path.join(settings_dir, 'bench_settings.py'), 'w') as f:
+                f.write(SETTINGS.format(media_root=media_root))
+            for warm in (False, True):
+                rows = [run(settings_dir, tempfile.mkdtemp(dir=tmp), warm) for _ in range(args.runs)]
+                startup, first, second = (statistics.median(r[key] for r in rows)
+                                          for key in ('startup', 'first', 'second'))
+                print(f"{size:>6} {'warm' if warm else 'cold':<5} {startup:>10.3f} "
+                      f"{first * 1000:>11.1f} {second * 1000:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
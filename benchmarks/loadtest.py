@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Load test the Django analysis page under WSGI and ASGI.
+
+For every call size a synthetic ``call.json`` fixture is written and the
+app is started in a separate process, pointed at the fixture, behind one
+of two local servers:
+
+    wsgi   service_call_analyzer.wsgi under wsgiref with a thread per request
+    asgi   service_call_analyzer.asgi under a minimal asyncio HTTP/1.1 server
+
+An asyncio client then drives ``GET /`` at each concurrency level and
+reports throughput, p50/p95/p99 latency and the server process's RSS
+(current and peak, from /proc). Cache modes:
+
+    cold    the server drops its per-process file caches before every
+            request, so each one loads and parses the call again
+    shared  as cold, but through the shared call cache (a fresh directory
+            per run), so each request maps the prebuilt .hvcall entry
+    warm    requests hit the per-process caches
+
+Only ``shared`` runs use the shared call cache; the others run with
+SHARED_CALL_CACHE_DIR empty, so nothing is written outside the temporary
+directory.
+
+The client and server share the machine's CPUs, so absolute numbers are
+only comparable between runs on the same machine.
+
+Usage:
+    python benchmarks/loadtest.py --sizes 134 2000 --concurrency 1 8 32 --requests 300
+    python benchmarks/loadtest.py --servers asgi --caches cold shared
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import unquote
+
+from synthetic_calls import make_call
+
+from pipeline import jsonio
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DJANGO_DIR = os.path.join(REPO_DIR, 'service_call_analyzer')
+
+
+# Server side (runs in the child process)
+
+def load_app(kind, media_root, cold):
+    sys.path.insert(0, DJANGO_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service_call_analyzer.settings')
+    if kind == 'wsgi':
+        from service_call_analyzer.wsgi import application
+    else:
+        from service_call_analyzer.asgi import application
+    from django.conf import settings
+    from call_analysis import views
+
+    settings.MEDIA_ROOT = media_root
+    if not cold:
+        return application
+
+    def clear_caches():
+        views.call_data_cache.clear()
+        views.custom_analysis_cache.clear()
+
+    if kind == 'wsgi':
+        def cold_wsgi(environ, start_response):
+            clear_caches()
+            return application(environ, start_response)
+        return cold_wsgi
+
+    async def cold_asgi(scope, receive, send):
+        clear_caches()
+        await application(scope, receive, send)
+    return cold_asgi
+
+
+def serve_wsgi(app, port):
+    import socketserver
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server('127.0.0.1', port, app, ThreadingWSGIServer, QuietHandler)
+    print('ready', flush=True)
+    server.serve_forever()
+
+
+async def _asgi_connection(app, port, reader, writer):
+    """Serve one request per connection (``Connection: close``)."""
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            return
+        method, target, _version = request_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+        length = int(dict(headers).get(b'content-length', b'0'))
+        body = await reader.readexactly(length) if length else b''
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': unquote(path), 'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'), 'root_path': '', 'headers': headers,
+            'client': writer.get_extra_info('peername')[:2], 'server': ('127.0.0.1', port),
+        }
+        responded = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await responded.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                lines = [f"HTTP/1.1 {message['status']} -".encode('latin-1')]
+                lines += [name + b': ' + value for name, value in message.get('headers', [])]
+                lines.append(b'Connection: close')
+                writer.write(b'\r\n'.join(lines) + b'\r\n\r\n')
+            elif message['type'] == 'http.response.body':
+                writer.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    await writer.drain()
+                    responded.set()
+
+        await app(scope, receive, send)
+    finally:
+        writer.close()
+
+
+def serve_asgi(app, port):
+    async def main():
+        server = await asyncio.start_server(
+            lambda r, w: _asgi_connection(app, port, r, w), '127.0.0.1', port, backlog=1024)
+        print('ready', flush=True)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+# Client side
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def proc_memory_kb(pid):
+    """Current and peak resident set size of a process, from /proc."""
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                key, value = line.split(':', 1)
+                values[key] = int(value.split()[0])
+    return values.get('VmRSS', 0), values.get('VmHWM', 0)
+
+
+async def fetch(port, path):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    status = int(data[9:12]) if data.startswith(b'HTTP/') else 0
+    return time.perf_counter() - started, status, len(data)
+
+
+async def drive(port, path, concurrency, total):
+    latencies, errors = [], 0
+    remaining = total
+
+    async def client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            try:
+                elapsed, status, _size = await fetch(port, path)
+            except OSError:
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))]
+
+
+class Server:
+    def __init__(self, kind, media_root, cold, shared_cache_dir=''):
+        self.port = free_port()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', kind, '--port', str(self.port),
+             '--media', media_root] + (['--cold'] if cold else []),
+            stdout=subprocess.PIPE, text=True,
+            env=dict(os.environ, SHARED_CALL_CACHE_DIR=shared_cache_dir),
+        )
+        if self.process.stdout.readline().strip() != 'ready':
+            self.process.kill()
+            raise RuntimeError(f"{kind} server failed to start")
+
+    def memory_kb(self):
+        return proc_memory_kb(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def write_fixture(directory, n_utterances):
+    os.makedirs(directory, exist_ok=True)
+    jsonio.dump_file(os.path.join(directory, 'call.json'), make_call(n_utterances, seed=n_utterances))
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--servers', nargs='+', choices=('wsgi', 'asgi'), default=['wsgi', 'asgi'])
+    parser.add_argument('--caches', nargs='+', choices=('cold', 'shared', 'warm'),
+                        default=['cold', 'shared', 'warm'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[134, 2000],
+                        help="utterances per call fixture")
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=200, help="requests per run")
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--json', metavar='FILE', help="also write the results as JSON")
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--media', help=argparse.SUPPRESS)
+    parser.add_argument('--cold', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        app = load_app(args.serve, args.media, args.cold)
+        (serve_wsgi if args.serve == 'wsgi' else serve_asgi)(app, args.port)
+        return
+
+    results = []
+    print(f"{'server':<6} {'cache':<6} {'utts':>6} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>6} {'rss MB':>7} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            media_root = write_fixture(os.path.join(tmp, f'media_{size}'), size)
+            for kind in args.servers:
+                for cache in args.caches:
+                    shared_cache_dir = tempfile.mkdtemp(dir=tmp) if cache == 'shared' else ''
+                    server = Server(kind, media_root, cache != 'warm', shared_cache_dir)
+                    try:
+                        asyncio.run(drive(server.port, args.path, 1, 3))  # imports, template compile
+                        for concurrency in args.concurrency:
+                            latencies, errors, elapsed = asyncio.run(
+                                drive(server.port, args.path, concurrency, args.requests))
+                            latencies.sort()
+                            rss_kb, peak_kb = server.memory_kb()
+                            row = {
+                                'server': kind, 'cache': cache, 'utterances': size, 'concurrency': concurrency,
+                                'requests': len(latencies), 'errors': errors,
+                                'throughput': len(latencies) / elapsed if elapsed else 0.0,
+                                'p50_ms': percentile(latencies, 50) * 1000,
+                                'p95_ms': percentile(latencies, 95) * 1000,
+                                'p99_ms': percentile(latencies, 99) * 1000,
+                                'mean_ms': statistics.fmean(latencies) * 1000 if latencies else float('nan'),
+                                'rss_mb': rss_kb / 1024, 'peak_rss_mb': peak_kb / 1024,
+                            }
+                            results.append(row)
+                            print(f"{kind:<6} {cache:<6} {size:>6} {concurrency:>5} {row['throughput']:>8.1f} "
+                                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                                  f"{errors:>6} {row['rss_mb']:>7.1f} {row['peak_rss_mb']:>8.1f}", flush=True)
+                    finally:
+                        server.stop()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Synthetic call data for benchmarks and load tests.
+
+Calls have the same shape as ``data/call.json``: tagged utterances, merged
+segments, a full transcript and a seeded compliance checklist. Text is drawn
+from a small HVAC vocabulary that exercises every stage rule.
+"""
+
+import os
+import random
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import jsonio  # noqa: E402
+from pipeline.stages import compliance_seed, merge_adjacent, tag_stage  # noqa: E402
+
+PHRASES = [
+    "Hello, my name is Sam and I'm with the company.",
+    "Is now a good time to go over everything?",
+    "The upstairs bedroom gets really hot in the afternoon.",
+    "We noticed a small leak near the coil and some mold on the pan.",
+    "That noise usually means the blower motor is not working right.",
+    "One option is to replace it like-for-like with a new furnace.",
+    "I'd recommend a variable speed heat pump with an inverter compressor.",
+    "The SEER rating on that unit is much higher and it uses R-32.",
+    "There is a rebate from the utility and the permit covers the HERS test.",
+    "We also offer a maintenance membership with two visits a year.",
+    "A MERV 13 filter and some duct sealing would help with the dust.",
+    "We have financing at zero APR for 12 months, no interest.",
+    "The monthly payment would be around one hundred and fifty dollars.",
+    "I'll email you the quote so you can decide with your wife.",
+    "We'd just need a deposit to get you on the schedule.",
+    "Thank you so much for your time today.",
+    "Okay, sure.",
+    "Yeah, that makes sense.",
+    "How long have you been in the house?",
+    "Right, right. Let me check the attic real quick.",
+]
+
+
+def make_call(n_utterances: int = 134, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build one synthetic call.
+
+    Args:
+        n_utterances: Number of utterances in the call
+        seed: Random seed, so the same arguments give the same call
+
+    Returns:
+        Call data in the ``call.json`` layout
+    """
+    rng = random.Random(seed)
+    utterances: List[Dict[str, Any]] = []
+    t = rng.uniform(0, 15)
+    for i in range(n_utterances):
+        text = ' '.join(rng.choice(PHRASES) for _ in range(rng.randint(1, 4)))
+        duration = 0.35 * len(text.split()) + rng.uniform(0, 2)
+        start = round(t, 2)
+        end = round(t + duration, 2)
+        utterances.append({
+            'speaker': 'Tech' if (i % 3) != 1 else 'Customer',
+            'start': start,
+            'end': end,
+            'text': text,
+            'stage': tag_stage(text),
+        })
+        # Occasional overlap (interruption) or long silence between turns.
+        t = end + rng.choice([-0.6, 0.1, 0.3, 0.5, 1.0, 4.0, 12.0])
+    segments = merge_adjacent(utterances)
+    return {
+        'meta': {
+            'call_type': 'Synthetic consultation (HVAC)',
+            'date_analyzed': '2025-10-05',
+            'transcribed_with': 'synthetic',
+            'stages_auto_tagged': True,
+        },
+        'compliance_check': compliance_seed(segments),
+        'sales_insights': [],
+        'utterances': utterances,
+        'full_transcript': ' '.join(u['text'] for u in utterances),
+        'segments': segments,
+    }
+
+
+def write_corpus(directory: str, n_calls: int, n_utterances: int = 134,
+                 suffix: str = '.json') -> List[str]:
+    """
+    Write ``n_calls`` synthetic calls to ``directory``.
+
+    Returns:
+        Paths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(n_calls):
+        path = os.path.join(directory, f'call_{i:05d}{suffix}')
+        jsonio.dump_file(path, make_call(n_utterances, seed=i))
+        paths.append(path)
+    return paths
@@ -4,9 +4,27 @@
  * Generates static HTML with embedded JSON data
  */
 
+const { execFileSync } = require('child_process');
 const fs = require('fs');
 const path = require('path');
 
+function runPython(args) {
+    // Assets built by the Python pipeline; set PYTHON to pick the interpreter
+    const candidates = process.env.PYTHON ? [process.env.PYTHON] : ['python3', 'python'];
+    for (const python of candidates) {
+        try {
+            execFileSync(python, args, { stdio: 'inherit' });
+            return;
+        } catch (error) {
+            if (error.code !== 'ENOENT') {
+                throw error;
+            }
+        }
+    }
+    console.error('❌ Python is needed to build the search index and timeline:', candidates.join(' or '), 'not found');
+    process.exit(1);
+}
+
 function copyDirectory(src, dest) {
     if (!fs.existsSync(dest)) {
         fs.mkdirSync(dest, { recursive: true });
@@ -61,6 +79,14 @@ function createStaticSite() {
     const callData = JSON.parse(fs.readFileSync(callDataPath, 'utf8'));
     const customAnalysis = JSON.parse(fs.readFileSync(customAnalysisPath, 'utf8'));
     
+    // Search index, fetched by app.js the first time the search box is used
+    console.log('🔎 Building search index...');
+    runPython(['-m', 'pipeline.search_index', callDataPath, '-o', path.join(distDir, 'search-index.json')]);
+    
+    // Timeline index and tiles, fetched by the call timeline card as it zooms
+    console.log('🕒 Building call timeline...');
+    runPython(['-m', 'pipeline.timeline', callDataPath, '-o', path.join(distDir, 'timeline')]);
+    
     // Create HTML with embedded data
     console.log('🔧 Generating HTML...');
     const htmlContent = createHtmlWithData(callData, customAnalysis);
@@ -119,6 +145,8 @@ function createHtmlWithData(callData, customAnalysis) {
     <script>
         window.CALL_DATA = ${JSON.stringify(callData, null, 2)};
         window.CUSTOM_ANALYSIS = ${JSON.stringify(customAnalysis, null, 2)};
+        window.SEARCH_INDEX_URL = '/search-index.json';
+        window.TIMELINE_URL = '/timeline/index.json';
     </script>
 
     <!-- Bootstrap JS -->
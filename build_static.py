@@ -5,21 +5,19 @@ Converts Django templates to static HTML for Vercel deployment
 """
 
 import os
-import json
 import shutil
 from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
 from collections import defaultdict
+from pipeline import jsonio
 
 def load_call_data():
-    """Load call data from JSON file"""
-    with open('service_call_analyzer/media/call.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load call data from JSON file (plain, .json.gz or .json.zst)"""
+    return jsonio.load_file(jsonio.resolve_call_file('service_call_analyzer/media/call.json'))
 
 def load_custom_analysis():
     """Load custom analysis data"""
-    with open('service_call_analyzer/static/custom_analysis.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return jsonio.load_file('service_call_analyzer/static/custom_analysis.json')
 
 def process_call_data(data):
     """Process call data similar to Django data processing"""
@@ -4,9 +4,11 @@ Pre-build static site generator - run this locally before deploying
 """
 
 import os
-import json
 import shutil
 from pathlib import Path
+from pipeline import jsonio
+from pipeline.search_index import write_search_index
+from pipeline.timeline import write_timeline
 
 def create_static_site():
     """Create a completely static version of the site"""
@@ -27,12 +29,9 @@ def create_static_site():
             elif item.is_dir():
                 shutil.copytree(item, dist_dir / item.name, dirs_exist_ok=True)
     
-    # Load data with explicit UTF-8 encoding
-    with open('service_call_analyzer/media/call.json', 'r', encoding='utf-8') as f:
-        call_data = json.load(f)
-    
-    with open('service_call_analyzer/static/custom_analysis.json', 'r', encoding='utf-8') as f:
-        custom_analysis = json.load(f)
+    # Load data (call data may also be stored as .json.gz or .json.zst)
+    call_data = jsonio.load_file(jsonio.resolve_call_file('service_call_analyzer/media/call.json'))
+    custom_analysis = jsonio.load_file('service_call_analyzer/static/custom_analysis.json')
     
     # Create a simple HTML file with embedded data
     html_content = create_html_with_data(call_data, custom_analysis)
@@ -41,6 +40,12 @@ def create_static_site():
     with open(dist_dir / 'index.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
     
+    # Search index, fetched by app.js the first time the search box is used
+    write_search_index(str(dist_dir / 'search-index.json'), [('call', call_data)])
+
+    # Timeline index and tiles, fetched by the call timeline card as it zooms
+    write_timeline(str(dist_dir / 'timeline'), call_data.get('utterances', []))
+    
     print("✅ Static site generated in 'dist' directory")
     print("📁 Ready for deployment to Vercel!")
 
@@ -95,8 +100,10 @@ def create_html_with_data(call_data, custom_analysis):
 
     <!-- Embedded Data -->
     <script>
-        window.CALL_DATA = {json.dumps(call_data, indent=2)};
-        window.CUSTOM_ANALYSIS = {json.dumps(custom_analysis, indent=2)};
+        window.CALL_DATA = {jsonio.dumps(call_data, indent=True).decode('utf-8')};
+        window.CUSTOM_ANALYSIS = {jsonio.dumps(custom_analysis, indent=True).decode('utf-8')};
+        window.SEARCH_INDEX_URL = '/search-index.json';
+        window.TIMELINE_URL = '/timeline/index.json';
     </script>
 
     <!-- Bootstrap JS -->
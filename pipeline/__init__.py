@@ -0,0 +1,6 @@
+"""
+Service call processing pipeline.
+
+Reusable pieces of the transcription/analysis pipeline: keyword stage
+tagging, segment merging, compliance seeding and live-call tracking.
+"""
@@ -0,0 +1,360 @@
+"""
+Chunked parallel transcription of long recordings.
+
+Long audio is split into overlapping chunks that are transcribed
+concurrently through a pluggable backend, then stitched back together:
+
+1. Word timestamps are shifted from chunk time to recording time.
+2. Consecutive chunks are spliced at a word both heard near the middle of
+   their overlap, so words in the overlap are neither lost nor duplicated;
+   each side of the splice comes from the chunk that heard it with the most
+   context.
+3. Diarization labels are per chunk ("A" in one chunk may be "B" in the
+   next), so each chunk's labels are mapped onto the running labels by
+   matching the words both chunks heard in the overlap.
+
+A backend is any object with::
+
+    duration_ms(audio_path) -> int
+    transcribe(audio_path, start_ms, end_ms) -> list of ChunkWord
+
+where returned word times are relative to ``start_ms``.
+``AssemblyAIBackend`` cuts chunks with ffmpeg and sends them to AssemblyAI;
+``FakeBackend`` replays a known transcript offline for tests and benchmarks.
+"""
+
+import itertools
+import os
+import random
+import re
+import shutil
+import string
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_CHUNK_MS = 10 * 60 * 1000
+DEFAULT_OVERLAP_MS = 30 * 1000
+MATCH_TOLERANCE_MS = 400
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+class ChunkWord(NamedTuple):
+    text: str
+    start: int
+    end: int
+    speaker: str
+
+
+class Utterance(NamedTuple):
+    """Same attributes as an AssemblyAI utterance (times in ms)."""
+    speaker: str
+    start: int
+    end: int
+    text: str
+    words: List[ChunkWord]
+
+
+class StitchedTranscript:
+    """Result of a chunked transcription, shaped like an AssemblyAI transcript."""
+
+    status = 'completed'
+    error = None
+
+    def __init__(self, words: List[ChunkWord], chunks: List[Tuple[int, int]]):
+        self.words = words
+        self.chunks = chunks
+        self.utterances = group_utterances(words)
+        self.text = ' '.join(w.text for w in words)
+
+
+def plan_chunks(duration_ms: int, chunk_ms: int = DEFAULT_CHUNK_MS,
+                overlap_ms: int = DEFAULT_OVERLAP_MS) -> List[Tuple[int, int]]:
+    """
+    Split ``[0, duration_ms)`` into overlapping ``(start_ms, end_ms)`` chunks.
+
+    Raises:
+        ValueError: If the overlap is not smaller than the chunk length
+    """
+    if overlap_ms >= chunk_ms:
+        raise ValueError("overlap_ms must be smaller than chunk_ms")
+    if duration_ms <= chunk_ms:
+        return [(0, duration_ms)]
+    chunks = []
+    start = 0
+    step = chunk_ms - overlap_ms
+    while True:
+        end = min(start + chunk_ms, duration_ms)
+        chunks.append((start, end))
+        if end >= duration_ms:
+            return chunks
+        start += step
+
+
+def _norm(text: str) -> str:
+    return _NON_WORD.sub('', text.lower())
+
+
+def _match_overlap(prev_words: Sequence[ChunkWord], next_words: Sequence[ChunkWord],
+                   lo: int, hi: int) -> List[Tuple[int, int]]:
+    """
+    Words heard by both chunks within ``[lo, hi)``, matched in order.
+
+    Returns:
+        ``(prev index, next index)`` pairs of words with the same text
+        starting within ``MATCH_TOLERANCE_MS`` of each other
+    """
+    a = [i for i, w in enumerate(prev_words) if lo <= w.start < hi]
+    b = [j for j, w in enumerate(next_words) if lo <= w.start < hi]
+    pairs = []
+    k0 = 0
+    for i in a:
+        wa = prev_words[i]
+        while k0 < len(b) and next_words[b[k0]].start < wa.start - MATCH_TOLERANCE_MS:
+            k0 += 1
+        k = k0
+        while k < len(b) and next_words[b[k]].start <= wa.start + MATCH_TOLERANCE_MS:
+            if _norm(next_words[b[k]].text) == _norm(wa.text):
+                pairs.append((i, b[k]))
+                k0 = k + 1
+                break
+            k += 1
+    return pairs
+
+
+def _speaker_labels() -> Iterator[str]:
+    """A, B, ..., Z, AA, AB, ... without end."""
+    for length in itertools.count(1):
+        for letters in itertools.product(string.ascii_uppercase, repeat=length):
+            yield ''.join(letters)
+
+
+def _map_speakers(pairs: Iterable[Tuple[ChunkWord, ChunkWord]],
+                  local_labels: Iterable[str]) -> Dict[str, str]:
+    """
+    Map one chunk's local speaker labels onto the running labels.
+
+    Labels are paired greedily by how many overlap words they agree on.
+    Labels with no evidence keep their name if it is still free, otherwise
+    they get the first free label (A-Z, then AA, AB, ...).
+    """
+    votes = Counter((b.speaker, a.speaker) for a, b in pairs)
+    mapping: Dict[str, str] = {}
+    taken = set()
+    for (local, running), _count in votes.most_common():
+        if local not in mapping and running not in taken:
+            mapping[local] = running
+            taken.add(running)
+    for local in sorted(set(local_labels)):
+        if local in mapping:
+            continue
+        label = local if local not in taken else next(name for name in _speaker_labels() if name not in taken)
+        mapping[local] = label
+        taken.add(label)
+    return mapping
+
+
+def stitch(chunks: Sequence[Tuple[int, int]],
+           results: Sequence[Sequence[ChunkWord]]) -> List[ChunkWord]:
+    """
+    Merge per-chunk words into one recording-time word list.
+
+    Consecutive chunks are spliced at the matched overlap word closest to
+    the middle of the overlap: the earlier chunk contributes words up to
+    and including it, the later chunk everything after it. Without any
+    matched word (e.g. silence) the overlap is cut at its midpoint and
+    near-identical words around the cut are dropped.
+
+    Args:
+        chunks: ``(start_ms, end_ms)`` of each chunk, in order
+        results: Words returned by the backend for each chunk, with times
+            relative to the chunk start
+
+    Returns:
+        Stitched words with recording-time timestamps and consistent
+        speaker labels
+    """
+    stitched: List[ChunkWord] = []
+    prev: List[ChunkWord] = []
+    prev_end = 0
+    # stitched[prev_at:] came from prev[prev_first:]
+    prev_at = prev_first = 0
+    for index, ((start, end), words) in enumerate(zip(chunks, results)):
+        shifted = [ChunkWord(w.text, w.start + start, w.end + start, w.speaker) for w in words]
+
+        first = 0
+        if index == 0:
+            mapping = _map_speakers((), (w.speaker for w in shifted))
+        else:
+            # Overlap with the previous chunk is [start, prev_end).
+            pairs = _match_overlap(prev, shifted, start, prev_end)
+            mapping = _map_speakers(((prev[i], shifted[j]) for i, j in pairs),
+                                    (w.speaker for w in shifted))
+            mid = (start + prev_end) // 2
+            pairs = [(i, j) for i, j in pairs if i >= prev_first]
+            if pairs:
+                i, j = min(pairs, key=lambda p: abs(prev[p[0]].start - mid))
+                del stitched[prev_at + (i - prev_first) + 1:]
+                first = j + 1
+            else:
+                while stitched and stitched[-1].start >= mid:
+                    stitched.pop()
+                tail = stitched[-3:]
+                first = next((k for k, w in enumerate(shifted) if w.start >= mid), len(shifted))
+                while first < len(shifted) and any(
+                    _norm(t.text) == _norm(shifted[first].text)
+                    and abs(t.start - shifted[first].start) <= MATCH_TOLERANCE_MS
+                    for t in tail
+                ):
+                    first += 1
+
+        prev = [ChunkWord(w.text, w.start, w.end, mapping[w.speaker]) for w in shifted]
+        prev_at, prev_first = len(stitched), first
+        stitched.extend(prev[first:])
+        prev_end = end
+    return stitched
+
+
+def group_utterances(words: Sequence[ChunkWord]) -> List[Utterance]:
+    """Group consecutive words by the same speaker into utterances."""
+    utterances: List[Utterance] = []
+    current: List[ChunkWord] = []
+    for w in words:
+        if current and w.speaker != current[-1].speaker:
+            utterances.append(Utterance(current[0].speaker, current[0].start, current[-1].end,
+                                        ' '.join(x.text for x in current), current))
+            current = []
+        current.append(w)
+    if current:
+        utterances.append(Utterance(current[0].speaker, current[0].start, current[-1].end,
+                                    ' '.join(x.text for x in current), current))
+    return utterances
+
+
+def transcribe_chunked(audio_path: str, backend, chunk_ms: int = DEFAULT_CHUNK_MS,
+                       overlap_ms: int = DEFAULT_OVERLAP_MS,
+                       max_workers: Optional[int] = None) -> StitchedTranscript:
+    """
+    Transcribe a recording as concurrent overlapping chunks.
+
+    Args:
+        audio_path: Local audio file
+        backend: Transcription backend (see module docstring)
+        chunk_ms: Chunk length in milliseconds
+        overlap_ms: Overlap between consecutive chunks in milliseconds
+        max_workers: Concurrent chunk jobs; defaults to one per chunk
+
+    Returns:
+        StitchedTranscript for the whole recording
+    """
+    chunks = plan_chunks(backend.duration_ms(audio_path), chunk_ms, overlap_ms)
+    with ThreadPoolExecutor(max_workers=max_workers or len(chunks)) as pool:
+        results = list(pool.map(lambda c: backend.transcribe(audio_path, c[0], c[1]), chunks))
+    return StitchedTranscript(stitch(chunks, results), chunks)
+
+
+class AssemblyAIBackend:
+    """
+    Transcribe chunks with AssemblyAI.
+
+    Each chunk is cut to a temporary file with ffmpeg (stream copy, no
+    re-encode) so only that slice is uploaded. Requires ``ffmpeg`` and
+    ``ffprobe`` on PATH and ``assemblyai.settings.api_key`` to be set.
+    """
+
+    def __init__(self, config=None):
+        """
+        Args:
+            config: ``assemblyai.TranscriptionConfig`` used for every chunk;
+                speaker labels must be enabled for diarization
+        """
+        self.config = config
+
+    def duration_ms(self, audio_path: str) -> int:
+        out = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', audio_path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        return int(float(out.strip()) * 1000)
+
+    def transcribe(self, audio_path: str, start_ms: int, end_ms: int) -> List[ChunkWord]:
+        import assemblyai as aai
+
+        tmp_dir = tempfile.mkdtemp(prefix='chunk-')
+        try:
+            chunk_path = os.path.join(tmp_dir, 'chunk' + os.path.splitext(audio_path)[1])
+            subprocess.run(
+                ['ffmpeg', '-v', 'error', '-y', '-ss', f'{start_ms / 1000:.3f}',
+                 '-t', f'{(end_ms - start_ms) / 1000:.3f}', '-i', audio_path,
+                 '-c', 'copy', chunk_path],
+                check=True,
+            )
+            transcript = aai.Transcriber(config=self.config).transcribe(chunk_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        if transcript.status == 'error':
+            raise RuntimeError(f"Transcription failed for {start_ms}-{end_ms} ms: {transcript.error}")
+        return [
+            ChunkWord(w.text, w.start, w.end, w.speaker or 'A')
+            for w in (transcript.words or [])
+        ]
+
+
+class FakeBackend:
+    """
+    Offline backend that replays known word timings.
+
+    Each chunk returns the reference words whose midpoint falls inside it,
+    with per-chunk timestamp jitter and shuffled speaker labels, after
+    sleeping ``realtime_factor`` seconds per second of audio (plus
+    ``overhead_s``) to mimic a remote service.
+    """
+
+    def __init__(self, words: Sequence[ChunkWord], realtime_factor: float = 0.0,
+                 overhead_s: float = 0.0, jitter_ms: int = 80, seed: int = 0):
+        self.words = sorted(words, key=lambda w: w.start)
+        self.realtime_factor = realtime_factor
+        self.overhead_s = overhead_s
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+
+    @classmethod
+    def from_call_data(cls, call_data: Dict[str, Any], **kwargs) -> 'FakeBackend':
+        """Build reference words by spreading each utterance's words over its span."""
+        labels: Dict[str, str] = {}
+        words = []
+        for u in call_data.get('utterances', []):
+            tokens = (u.get('text') or '').split()
+            if not tokens:
+                continue
+            label = labels.setdefault(u.get('speaker', ''), chr(ord('A') + len(labels)))
+            start = int((u.get('start') or 0) * 1000)
+            end = max(start + len(tokens), int((u.get('end') or 0) * 1000))
+            step = (end - start) / len(tokens)
+            for i, token in enumerate(tokens):
+                words.append(ChunkWord(token, int(start + i * step), int(start + (i + 1) * step), label))
+        return cls(words, **kwargs)
+
+    def duration_ms(self, audio_path: str) -> int:
+        return max((w.end for w in self.words), default=0)
+
+    def transcribe(self, audio_path: str, start_ms: int, end_ms: int) -> List[ChunkWord]:
+        rng = random.Random(f'{self.seed}:{start_ms}')
+        labels = sorted({w.speaker for w in self.words})
+        shuffled = labels[:]
+        rng.shuffle(shuffled)
+        relabel = dict(zip(labels, shuffled))
+
+        time.sleep(self.overhead_s + (end_ms - start_ms) / 1000 * self.realtime_factor)
+        out = []
+        for w in self.words:
+            if start_ms <= (w.start + w.end) // 2 < end_ms:
+                jitter = rng.randint(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+                out.append(ChunkWord(w.text, max(0, w.start - start_ms + jitter),
+                                     max(0, w.end - start_ms + jitter), relabel[w.speaker]))
+        return out
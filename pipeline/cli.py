@@ -0,0 +1,210 @@
+"""
+Command line entry point for the pipeline stages.
+
+Usage:
+    python -m pipeline transcribe Takehome/recording.m4a -o data/call.json
+    python -m pipeline tag data/call.json
+    python -m pipeline seed data/call.json --force
+    python -m pipeline evidence data/call.json "Problem Diagnosis"
+    python -m pipeline live data/call.json --speed 20
+    python -m pipeline queue status
+    python -m pipeline dag run data/calls/
+    python -m pipeline metrics data/calls/
+    python -m pipeline score data/calls/ --workers 4
+    python -m pipeline export data/calls/ -o exports/ --format parquet
+    python -m pipeline schema data/calls/ --dry-run
+    python -m pipeline phrases data/calls/ --speaker Tech -o data/phrases.json
+
+Stage modules are imported only by the command that needs them, so
+``--help`` and the offline commands never load assemblyai.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+from . import jsonio
+from .stages import DEFAULT_MAX_GAP_S
+
+DEFAULT_CALL_TYPE = "Service call (HVAC)"
+
+
+def cmd_transcribe(args) -> int:
+    from .schema import to_v2
+    from .stages import enrich_call
+    from .transcription import transcribe, utterance_records, word_store_for
+    from .words import words_path_for
+
+    transcript = transcribe(args.audio, chunk_ms=int(args.chunk_minutes * 60_000), backend=args.backend)
+    print("Transcript completed.")
+
+    word_store = word_store_for(transcript.utterances or [])
+    call_json = {
+        "meta": {
+            "call_type": args.call_type,
+            "date_analyzed": datetime.date.today().isoformat(),
+            "transcribed_with": "AssemblyAI (speaker_labels, timestamps, word_boost)",
+            "word_timings": os.path.basename(words_path_for(args.output)),
+        },
+        "compliance_check": [],
+        "sales_insights": [],
+        "utterances": utterance_records(transcript.utterances or []),
+        "full_transcript": transcript.text,
+    }
+    enrich_call(call_json, max_gap_s=args.max_gap)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    jsonio.dump_file(args.output, to_v2(call_json, max_gap_s=args.max_gap))
+    word_store.save(words_path_for(args.output))
+    print(f"Wrote {args.output} ✔  stages={len(call_json['segments'])}  "
+          f"utterances={len(call_json['utterances'])}  words={len(word_store)}")
+    return 0
+
+
+def cmd_tag(args) -> int:
+    from .schema import schema_version, to_v2
+    from .stages import enrich_call
+
+    call_json = jsonio.load_file(args.call_file)
+    version = schema_version(call_json)
+    enrich_call(call_json, max_gap_s=args.max_gap)
+    jsonio.dump_file(args.call_file, to_v2(call_json, max_gap_s=args.max_gap) if version >= 2 else call_json)
+    print(f"Tagged {args.call_file} ✔  stages={len(call_json['segments'])}  "
+          f"utterances={len(call_json['utterances'])}")
+    return 0
+
+
+def cmd_seed(args) -> int:
+    from .schema import call_segments, schema_version
+    from .stages import compliance_seed
+
+    call_json = jsonio.load_file(args.call_file)
+    if call_json.get("compliance_check") and not args.force:
+        print("compliance_check is already filled in; use --force to replace it", file=sys.stderr)
+        return 1
+    if "segments" not in call_json and schema_version(call_json) < 2:
+        print("No segments; run `tag` first", file=sys.stderr)
+        return 1
+    call_json["compliance_check"] = compliance_seed(call_segments(call_json))
+    jsonio.dump_file(args.call_file, call_json)
+    print(f"Seeded {len(call_json['compliance_check'])} compliance entries in {args.call_file}")
+    return 0
+
+
+def cmd_evidence(args) -> int:
+    from .schema import call_segments
+    from .stages import short_evidence
+
+    call_json = jsonio.load_file(args.call_file)
+    print(short_evidence(call_segments(call_json), args.stage, limit=args.limit))
+    return 0
+
+
+def run_live(argv) -> int:
+    from .live import main as live_main
+
+    return live_main(argv)
+
+
+def run_queue(argv) -> int:
+    from .jobs import main as jobs_main
+
+    return jobs_main(argv)
+
+
+def run_metrics(argv) -> int:
+    from .metrics import main as metrics_main
+
+    return metrics_main(argv)
+
+
+def run_score(argv) -> int:
+    from .scoring import main as scoring_main
+
+    return scoring_main(argv)
+
+
+def run_export(argv) -> int:
+    from .export import main as export_main
+
+    return export_main(argv)
+
+
+def run_phrases(argv) -> int:
+    from .phrases import main as phrases_main
+
+    return phrases_main(argv)
+
+
+def run_schema(argv) -> int:
+    from .schema import main as schema_main
+
+    return schema_main(argv)
+
+
+def run_dag(argv) -> int:
+    from .dag import main as dag_main
+
+    return dag_main(argv)
+
+
+# Commands whose arguments are parsed by another module's main().
+DELEGATED = {
+    "live": (run_live, "replay a call through live-call mode"),
+    "queue": (run_queue, "job queue commands (enqueue, work, status, retry)"),
+    "metrics": (run_metrics, "conversation metrics across a corpus of call files"),
+    "score": (run_score, "score compliance checklists automatically from utterance features"),
+    "export": (run_export, "stream utterances and compliance scores to CSV or Parquet"),
+    "phrases": (run_phrases, "most frequent phrases per stage across a corpus (count-min sketches)"),
+    "schema": (run_schema, "convert call files between schema versions (v2 stores utterances once)"),
+    "dag": (run_dag, "re-run only the stages affected by rule or parameter changes"),
+}
+
+
+def main(argv=None, backend=None) -> int:
+    """
+    Run a pipeline command.
+
+    Args:
+        argv: Command line arguments; defaults to ``sys.argv[1:]``
+        backend: Chunk backend for ``transcribe`` (see pipeline.chunked),
+            instead of AssemblyAI
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in DELEGATED:
+        return DELEGATED[argv[0]][0](argv[1:])
+
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="HVAC call processing pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    transcribe = commands.add_parser("transcribe", help="transcribe a recording into a tagged call file")
+    transcribe.add_argument("audio", help="local audio file or URL")
+    transcribe.add_argument("-o", "--output", default=os.path.join("data", "call.json"))
+    transcribe.add_argument("--call-type", default=DEFAULT_CALL_TYPE)
+    transcribe.add_argument("--chunk-minutes", type=float, default=0.0,
+                            help="transcribe long recordings as overlapping chunks (needs ffmpeg)")
+    transcribe.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP_S)
+    transcribe.set_defaults(handler=cmd_transcribe, backend=backend)
+
+    tag = commands.add_parser("tag", help="re-tag utterances and rebuild segments")
+    tag.add_argument("call_file")
+    tag.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP_S)
+    tag.set_defaults(handler=cmd_tag)
+
+    seed = commands.add_parser("seed", help="seed the compliance checklist from segments")
+    seed.add_argument("call_file")
+    seed.add_argument("--force", action="store_true", help="replace an existing checklist")
+    seed.set_defaults(handler=cmd_seed)
+
+    evidence = commands.add_parser("evidence", help="print short evidence for a stage")
+    evidence.add_argument("call_file")
+    evidence.add_argument("stage")
+    evidence.add_argument("--limit", type=int, default=2)
+    evidence.set_defaults(handler=cmd_evidence)
+
+    for name, (_, help_text) in DELEGATED.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
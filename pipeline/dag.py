@@ -0,0 +1,402 @@
+"""
+Memoized stage graph: re-run only what a rule or parameter change affects.
+
+Every call goes through five stages::
+
+    transcribe ─► tag ─► segment ─► evidence ─► summary
+         └──────────────────┘
+
+Each stage's output is stored in a SQLite database together with a key, which
+is a fingerprint of the stage's parameters plus the content hashes of its
+inputs. On a re-run, a stage whose key is unchanged is skipped without loading
+its output. A stage that produces the same output as before (for example,
+segments that come out identical after a rules edit) does not invalidate
+anything downstream.
+
+Stage parameters:
+
+    transcribe  source file path, size and mtime
+    tag         ``STAGE_RULES`` (fingerprinted per stage) and ``DEFAULT_STAGE``
+    segment     ``max_gap_s``
+    evidence    evidence stages of ``COMPLIANCE_TEMPLATES`` and the limit
+                (also records per-stage coverage: segments and seconds)
+    summary     ``COMPLIANCE_TEMPLATES``
+
+Tagging is also incremental inside a call: when only some stages' rules
+change, an utterance is only re-checked against rules whose outcome could
+differ from the last run.
+
+Usage:
+    python -m pipeline.dag run data/calls/ --store data/dag.sqlite3
+    python -m pipeline.dag run data/calls/ --max-gap 6 --write
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import jsonio, schema, stages
+from .sources import call_sources
+
+NODES = ('transcribe', 'tag', 'segment', 'evidence', 'summary')
+DEPS = {
+    'transcribe': (),
+    'tag': ('transcribe',),
+    'segment': ('transcribe', 'tag'),
+    'evidence': ('segment',),
+    'summary': ('evidence',),
+}
+# Bump a node's version when its code changes in a way that alters output.
+VERSIONS = {'transcribe': 1, 'tag': 1, 'segment': 1, 'evidence': 1, 'summary': 1}
+
+DEFAULT_STORE = os.path.join('data', 'dag.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    call_id TEXT NOT NULL,
+    node TEXT NOT NULL,
+    key TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    value BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (call_id, node)
+);
+"""
+
+
+def fingerprint(obj: Any) -> str:
+    """Stable short hash of JSON-serializable data."""
+    data = json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _content_hash(blob: bytes) -> str:
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+
+class Record(NamedTuple):
+    key: str
+    hash: str
+    meta: Dict[str, Any]  # {'params': ..., 'inputs': {dep: hash}}
+
+
+class OutputStore:
+    """Stage outputs keyed by ``(call_id, node)`` in a SQLite database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = os.fspath(db_path)
+        self._conn = sqlite3.connect(self.db_path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def records(self, call_id: str) -> Dict[str, Record]:
+        """Keys and hashes of every stored stage of a call (values are not loaded)."""
+        return {
+            node: Record(key, content_hash, json.loads(meta))
+            for node, key, content_hash, meta in self._conn.execute(
+                "SELECT node, key, hash, meta FROM outputs WHERE call_id = ?", (call_id,)
+            )
+        }
+
+    def value(self, call_id: str, node: str) -> Any:
+        row = self._conn.execute(
+            "SELECT value FROM outputs WHERE call_id = ? AND node = ?", (call_id, node)
+        ).fetchone()
+        if row is None:
+            raise KeyError((call_id, node))
+        return jsonio.loads(row[0])
+
+    def put(self, call_id: str, node: str, key: str, content_hash: str, meta: Dict[str, Any],
+            blob: bytes) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO outputs (call_id, node, key, hash, meta, value, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (call_id, node, key, content_hash, json.dumps(meta), blob, time.time()),
+        )
+
+    def call_ids(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT DISTINCT call_id FROM outputs ORDER BY call_id")]
+
+
+class RunResult(NamedTuple):
+    call_id: str
+    computed: List[str]
+    hashes: Dict[str, str]
+
+
+def _retag_incremental(texts: Sequence[str], old_tags: Sequence[str], old_rules: Sequence[Tuple[str, str]],
+                       new_rules: Sequence[Tuple[str, str]], compiled) -> Optional[List[str]]:
+    """
+    Update tags after a rules edit without re-running unchanged rules.
+
+    Tags are "first stage whose rules match". If a stage's rules did not
+    change, whether it matches is already known from the old tag: stages
+    before the old tag did not match, and the old tag's stage did.
+
+    Returns:
+        The new tags, or None if the stage list itself changed
+    """
+    names = [name for name, _ in new_rules]
+    if names != [name for name, _ in old_rules]:
+        return None
+    changed = [old[1] != new[1] for old, new in zip(old_rules, new_rules)]
+    if not any(changed):
+        return list(old_tags)
+    first_changed = changed.index(True)
+    index_of = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    tags = []
+    for text, old_tag in zip(texts, old_tags):
+        previous = index_of.get(old_tag, n)
+        if previous < first_changed:
+            tags.append(old_tag)
+            continue
+        t = text or ""
+        tag = stages.DEFAULT_STAGE
+        for j in range(first_changed, n):
+            if not changed[j]:
+                if j < previous:
+                    continue
+                if j == previous:
+                    tag = names[j]
+                    break
+            if compiled[j][1].search(t):
+                tag = names[j]
+                break
+        tags.append(tag)
+    return tags
+
+
+class StageGraph:
+    """
+    Runs the stage graph for calls against an ``OutputStore``.
+
+    Parameters default to the current values in ``pipeline.stages``, so an
+    edit to ``STAGE_RULES`` or ``COMPLIANCE_TEMPLATES`` is picked up by the
+    next run.
+    """
+
+    def __init__(self, store: OutputStore, rules=None, max_gap_s: float = stages.DEFAULT_MAX_GAP_S,
+                 templates=None, evidence_limit: int = 2):
+        self.store = store
+        self.rules = stages.STAGE_RULES if rules is None else rules
+        self.max_gap_s = max_gap_s
+        self.templates = stages.COMPLIANCE_TEMPLATES if templates is None else templates
+        self.evidence_limit = evidence_limit
+        self._compiled = stages.compile_rules(self.rules)
+        self._rule_fingerprints = [[name, fingerprint(keys)] for name, keys in self.rules]
+        self._evidence_stages = stages.evidence_stages(self.templates)
+
+    def params(self, node: str, source: str) -> Any:
+        if node == 'transcribe':
+            st = os.stat(source)
+            return {'source': os.path.abspath(source), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        if node == 'tag':
+            return {'rules': self._rule_fingerprints, 'default': stages.DEFAULT_STAGE}
+        if node == 'segment':
+            return {'max_gap_s': self.max_gap_s}
+        if node == 'evidence':
+            return {'stages': self._evidence_stages, 'limit': self.evidence_limit}
+        if node == 'summary':
+            return {'templates': [list(t) for t in self.templates]}
+        raise ValueError(f"Unknown node: {node}")
+
+    def run(self, call_id: str, source: str, targets: Iterable[str] = NODES) -> RunResult:
+        """
+        Bring a call's stage outputs up to date.
+
+        Args:
+            call_id: Identifier the outputs are stored under
+            source: Call file (``.json``/``.json.gz``/``.json.zst``) whose
+                utterances are used as the transcript, or an audio file to
+                transcribe with AssemblyAI
+            targets: Stages that must be up to date (their upstream stages
+                are always included)
+
+        Returns:
+            The stages that were recomputed and every stage's output hash
+        """
+        wanted = set()
+        for node in targets:
+            wanted.add(node)
+            wanted.update(self._upstream(node))
+
+        records = self.store.records(call_id)
+        values: Dict[str, Any] = {}
+        hashes: Dict[str, str] = {}
+        computed = []
+
+        def value(node: str) -> Any:
+            if node not in values:
+                values[node] = self.store.value(call_id, node)
+            return values[node]
+
+        for node in NODES:
+            if node not in wanted:
+                continue
+            params = self.params(node, source)
+            key = fingerprint([node, VERSIONS[node], params, [hashes[d] for d in DEPS[node]]])
+            old = records.get(node)
+            if old is not None and old.key == key:
+                hashes[node] = old.hash
+                continue
+
+            result = self._compute(node, source, value, old, hashes)
+            blob = jsonio.dumps(result)
+            hashes[node] = _content_hash(blob)
+            values[node] = result
+            inputs = {d: hashes[d] for d in DEPS[node]}
+            self.store.put(call_id, node, key, hashes[node], {'params': params, 'inputs': inputs}, blob)
+            computed.append(node)
+        return RunResult(call_id, computed, hashes)
+
+    def _upstream(self, node: str) -> List[str]:
+        found = []
+        for dep in DEPS[node]:
+            found.append(dep)
+            found.extend(self._upstream(dep))
+        return found
+
+    def _compute(self, node, source, value, old, hashes) -> Any:
+        if node == 'transcribe':
+            return self._transcribe(source)
+        if node == 'tag':
+            texts = [u['text'] for u in value('transcribe')['utterances']]
+            if old is not None and old.meta['inputs'].get('transcribe') == hashes['transcribe'] \
+                    and old.meta['params']['default'] == stages.DEFAULT_STAGE:
+                tags = _retag_incremental(texts, value('tag'), old.meta['params']['rules'],
+                                          self._rule_fingerprints, self._compiled)
+                if tags is not None:
+                    return tags
+            return [stages.tag_stage(t, self._compiled) for t in texts]
+        if node == 'segment':
+            utterances = value('transcribe')['utterances']
+            tagged = [dict(u, stage=tag) for u, tag in zip(utterances, value('tag'))]
+            return stages.merge_adjacent(tagged, max_gap_s=self.max_gap_s)
+        if node == 'evidence':
+            segments = value('segment')
+            coverage: Dict[str, Dict[str, float]] = {}
+            for seg in segments:
+                entry = coverage.setdefault(seg['stage'], {'segments': 0, 'seconds': 0.0})
+                entry['segments'] += 1
+                if isinstance(seg['start'], (int, float)) and isinstance(seg['end'], (int, float)):
+                    entry['seconds'] = round(entry['seconds'] + max(0.0, seg['end'] - seg['start']), 2)
+            return {
+                'evidence': stages.evidence_by_stage(segments, self._evidence_stages, self.evidence_limit),
+                'coverage': coverage,
+            }
+        if node == 'summary':
+            evidence = value('evidence')
+            return {
+                'compliance_check': stages.compliance_from_evidence(evidence['evidence'], self.templates),
+                'coverage': evidence['coverage'],
+            }
+        raise ValueError(f"Unknown node: {node}")
+
+    @staticmethod
+    def _transcribe(source: str) -> Dict[str, Any]:
+        if jsonio.is_call_file(source):
+            call_json = jsonio.load_file(source)
+        else:
+            from .transcription import transcribe, utterance_records
+
+            transcript = transcribe(source)
+            call_json = {'utterances': utterance_records(transcript.utterances or []),
+                         'full_transcript': transcript.text}
+        return {
+            'utterances': [
+                {'speaker': u.get('speaker'), 'start': u.get('start'), 'end': u.get('end'),
+                 'text': u.get('text') or ''}
+                for u in call_json.get('utterances', [])
+            ],
+            'full_transcript': schema.call_full_transcript(call_json),
+        }
+
+    def call_json(self, call_id: str) -> Dict[str, Any]:
+        """Stage outputs of a call assembled into call.json fields."""
+        transcript = self.store.value(call_id, 'transcribe')
+        tags = self.store.value(call_id, 'tag')
+        summary = self.store.value(call_id, 'summary')
+        return {
+            'utterances': [dict(u, stage=tag) for u, tag in zip(transcript['utterances'], tags)],
+            'segments': self.store.value(call_id, 'segment'),
+            'full_transcript': transcript['full_transcript'],
+            'compliance_check': summary['compliance_check'],
+        }
+
+
+def _write_back(graph: StageGraph, call_id: str, path: str) -> bool:
+    """Write tags, segments and (empty) compliance into a call file if they differ."""
+    call_json = jsonio.load_file(path)
+    fresh = graph.call_json(call_id)
+    if schema.schema_version(call_json) >= 2:
+        # Segments are derived from the utterances; record the gap they used.
+        updated = dict(call_json, utterances=fresh['utterances'], segment_max_gap_s=graph.max_gap_s)
+        updated.pop('segments', None)
+    else:
+        updated = dict(call_json, utterances=fresh['utterances'], segments=fresh['segments'])
+    updated['meta'] = {**call_json.get('meta', {}), 'stages_auto_tagged': True}
+    # Only seed compliance if empty (so manual scoring is never overwritten)
+    if not call_json.get('compliance_check'):
+        updated['compliance_check'] = fresh['compliance_check']
+    if updated == call_json:
+        return False
+    jsonio.dump_file(path, updated)
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Re-run pipeline stages whose inputs or parameters changed.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="bring stage outputs up to date")
+    run.add_argument('paths', nargs='+', help="call files or directories")
+    run.add_argument('--store', default=DEFAULT_STORE, help="stage output database")
+    run.add_argument('--max-gap', type=float, default=stages.DEFAULT_MAX_GAP_S)
+    run.add_argument('--write', action='store_true',
+                     help="write tags, segments and (empty) compliance back into call files that differ")
+
+    args = parser.parse_args(argv)
+    os.makedirs(os.path.dirname(os.path.abspath(args.store)), exist_ok=True)
+    store = OutputStore(args.store)
+    graph = StageGraph(store, max_gap_s=args.max_gap)
+
+    started = time.perf_counter()
+    counts = {node: 0 for node in NODES}
+    written = 0
+    sources = call_sources(args.paths)
+    try:
+        for i, (call_id, path) in enumerate(sources, 1):
+            result = graph.run(call_id, path)
+            for node in result.computed:
+                counts[node] += 1
+            if args.write and _write_back(graph, call_id, path):
+                written += 1
+            if i % 500 == 0:
+                store.commit()
+    finally:
+        store.close()
+
+    print(f"{len(sources)} calls in {time.perf_counter() - started:.2f}s; recomputed: "
+          + ", ".join(f"{node}={n}" for node, n in counts.items())
+          + (f"; wrote {written} call files" if args.write else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
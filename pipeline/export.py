@@ -0,0 +1,230 @@
+"""
+Streaming bulk export of utterances and compliance scores.
+
+Calls are read one at a time from call files or from the calls the job
+queue has finished building, flattened into rows by generators and
+written in chunks of ``chunk_rows`` rows, so memory stays flat however
+large the corpus is. Two tables are written to the output directory:
+
+    utterances.csv|parquet   call_id, index, speaker, stage, start, end, text
+    compliance.csv|parquet   call_id, stage, score, max, auto_scored, evidence, suggestion
+
+Parquet needs the optional ``pyarrow`` package, which is only imported
+when that format is used.
+
+Usage:
+    python -m pipeline export data/calls/ -o exports/
+    python -m pipeline export --queue data/pipeline.sqlite3 -o exports/ --format parquet
+"""
+
+import argparse
+import csv
+import importlib.util
+import itertools
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from . import jsonio
+from .sources import call_sources
+
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+FORMATS = ('csv', 'parquet')
+DEFAULT_CHUNK_ROWS = 50_000
+
+# (column, pyarrow type name) per table
+UTTERANCE_COLUMNS = [
+    ('call_id', 'string'), ('index', 'int32'), ('speaker', 'string'), ('stage', 'string'),
+    ('start', 'float64'), ('end', 'float64'), ('text', 'string'),
+]
+COMPLIANCE_COLUMNS = [
+    ('call_id', 'string'), ('stage', 'string'), ('score', 'float64'), ('max', 'float64'),
+    ('auto_scored', 'bool_'), ('evidence', 'string'), ('suggestion', 'string'),
+]
+
+Row = Tuple[Any, ...]
+
+
+def queue_sources(db_path: str, output_dir: str) -> Iterator[Tuple[str, str]]:
+    """``(call_id, path)`` for every call the job queue has finished building."""
+    from .jobqueue import JobQueue
+
+    queue = JobQueue(db_path, read_only=True)
+    try:
+        for call_id in queue.finished():
+            yield call_id, jsonio.resolve_call_file(os.path.join(output_dir, f'{call_id}.json'))
+    finally:
+        queue.close()
+
+
+def iter_calls(sources: Iterable[Tuple[str, str]], errors: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Load calls one at a time; unreadable files, and files whose top level
+    isn't a JSON object, are recorded in ``errors`` and skipped.
+    """
+    for call_id, path in sources:
+        try:
+            call_json = jsonio.load_file(path)
+        except (OSError, ValueError) as e:
+            errors.append(f"{path}: {type(e).__name__}: {e}")
+            continue
+        if not isinstance(call_json, dict):
+            errors.append(f"{path}: expected a JSON object, got {type(call_json).__name__}")
+            continue
+        yield call_id, call_json
+
+
+def _number(value: Any) -> Any:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def utterance_rows(call_id: str, call_json: Dict[str, Any]) -> Iterator[Row]:
+    for i, u in enumerate(call_json.get('utterances', [])):
+        yield (call_id, i, u.get('speaker'), u.get('stage'), _number(u.get('start')),
+               _number(u.get('end')), u.get('text'))
+
+
+def compliance_rows(call_id: str, call_json: Dict[str, Any]) -> Iterator[Row]:
+    for entry in call_json.get('compliance_check', []):
+        yield (call_id, entry.get('stage'), _number(entry.get('score')), _number(entry.get('max')),
+               bool(entry.get('auto_scored', False)), entry.get('evidence'), entry.get('suggestion'))
+
+
+class _CsvTable:
+    def __init__(self, path: str, columns: Sequence[Tuple[str, str]]):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write(self, rows: List[Row]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetTable:
+    def __init__(self, path: str, columns: Sequence[Tuple[str, str]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in columns])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+
+    def write(self, rows: List[Row]) -> None:
+        columns = list(zip(*rows))
+        arrays = [self._pa.array(values, type=field.type) for values, field in zip(columns, self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _ChunkedTable:
+    """Buffers rows and hands them to the file writer ``chunk_rows`` at a time."""
+
+    def __init__(self, table, chunk_rows: int):
+        self.table = table
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._buffer: List[Row] = []
+
+    def extend(self, rows: Iterable[Row]) -> None:
+        for row in rows:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.chunk_rows:
+                self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.table.write(self._buffer)
+            self.rows += len(self._buffer)
+            self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self.table.close()
+
+
+def export_calls(sources: Iterable[Tuple[str, str]], output_dir: str, fmt: str = 'csv',
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Stream calls into utterance and compliance tables.
+
+    Args:
+        sources: ``(call_id, path)`` pairs (see sources.call_sources and
+            queue_sources); consumed lazily
+        output_dir: Directory for the two table files
+        fmt: ``'csv'`` or ``'parquet'``
+        chunk_rows: Rows buffered per table before they are written
+
+    Returns:
+        Calls and rows written, output files and errors for skipped calls
+
+    Raises:
+        ImportError: If Parquet is requested but pyarrow is not installed
+        ValueError: If the format is unknown
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet' and not PYARROW_AVAILABLE:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+    table_class = _ParquetTable if fmt == 'parquet' else _CsvTable
+    os.makedirs(output_dir, exist_ok=True)
+    files = {name: os.path.join(output_dir, f'{name}.{fmt}') for name in ('utterances', 'compliance')}
+
+    errors: List[str] = []
+    calls = 0
+    utterances = _ChunkedTable(table_class(files['utterances'], UTTERANCE_COLUMNS), chunk_rows)
+    compliance = _ChunkedTable(table_class(files['compliance'], COMPLIANCE_COLUMNS), chunk_rows)
+    try:
+        for call_id, call_json in iter_calls(sources, errors):
+            utterances.extend(utterance_rows(call_id, call_json))
+            compliance.extend(compliance_rows(call_id, call_json))
+            calls += 1
+    finally:
+        utterances.close()
+        compliance.close()
+    return {
+        'calls': calls,
+        'utterance_rows': utterances.rows,
+        'compliance_rows': compliance.rows,
+        'files': files,
+        'errors': errors,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export utterances and compliance scores to CSV or Parquet.")
+    parser.add_argument('paths', nargs='*', help="call files or directories")
+    parser.add_argument('--queue', metavar='DB', help="export the calls this job queue has finished building")
+    parser.add_argument('--calls-dir', default=os.path.join('data', 'calls'),
+                        help="where the queue wrote finished call files (with --queue)")
+    parser.add_argument('-o', '--output', default='exports', help="output directory")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    if not args.paths and not args.queue:
+        parser.error("give call files/directories or --queue")
+    if args.format == 'parquet' and not PYARROW_AVAILABLE:
+        parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+    sources: Iterable[Tuple[str, str]] = call_sources(args.paths) if args.paths else []
+    if args.queue:
+        if not os.path.exists(args.queue):
+            parser.error(f"queue database not found: {args.queue}")
+        sources = itertools.chain(sources, queue_sources(args.queue, args.calls_dir))
+
+    result = export_calls(sources, args.output, args.format, args.chunk_rows)
+    for error in result['errors']:
+        print(error, file=sys.stderr)
+    print(f"exported {result['calls']} calls: {result['utterance_rows']} utterances -> "
+          f"{result['files']['utterances']}, {result['compliance_rows']} compliance rows -> "
+          f"{result['files']['compliance']}")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,436 @@
+"""
+Persistent SQLite-backed job queue for the processing pipeline.
+
+Every call moves through ``STAGES`` (transcribe → tag → score → build) as
+one job per stage. Jobs are stored in a local SQLite database, so a crash or
+restart loses nothing: jobs left ``running`` by a dead worker are handed out
+again once their lease expires. ``run_workers`` keeps extending the lease of
+every job while its handler runs, and a worker whose lease was lost can no
+longer record a result for the job. Failed jobs are retried with exponential
+backoff up to ``max_attempts``, and ``enqueue`` applies backpressure when
+too many calls are waiting to be transcribed.
+
+Each ``JobQueue`` instance owns one SQLite connection; give every worker
+thread or process its own instance.
+"""
+
+import json
+import math
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+STAGES = ('transcribe', 'tag', 'score', 'build')
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+STATES = (PENDING, RUNNING, DONE, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    call_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    state TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    error TEXT,
+    worker TEXT,
+    run_after REAL NOT NULL,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    UNIQUE (call_id, stage)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, run_after);
+CREATE INDEX IF NOT EXISTS jobs_by_finish ON jobs (stage, finished_at);
+"""
+
+
+class QueueFull(Exception):
+    """Raised when ``enqueue`` times out waiting for queue capacity."""
+
+
+class Job(NamedTuple):
+    id: int
+    call_id: str
+    stage: str
+    payload: Dict[str, Any]
+    attempts: int
+    worker: Optional[str] = None
+
+
+class JobQueue:
+    """
+    Job queue stored in a SQLite database file.
+    """
+
+    def __init__(self, db_path: str, max_pending: int = 1000, max_attempts: int = 3,
+                 lease_s: float = 600.0, backoff_s: float = 5.0, read_only: bool = False):
+        """
+        Open (and create if needed) a queue database.
+
+        Args:
+            db_path: SQLite database file
+            max_pending: Calls allowed to wait in the first stage before
+                ``enqueue`` blocks
+            max_attempts: Attempts per job before it is marked failed
+            lease_s: Seconds a claimed job may run before it is considered
+                abandoned and handed out again
+            backoff_s: Base retry delay; doubles with every failed attempt
+            read_only: Open an existing database for reading only (for
+                monitoring): no schema setup or pragmas, and every write
+                fails
+        """
+        self.db_path = os.fspath(db_path)
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.lease_s = lease_s
+        self.backoff_s = backoff_s
+        if read_only:
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + '?mode=ro'
+            self._conn = sqlite3.connect(uri, timeout=30, isolation_level=None, uri=True)
+            self._conn.row_factory = sqlite3.Row
+            return
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def _insert(self, call_id: str, stage: str, payload: Dict[str, Any], now: float) -> Optional[int]:
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO jobs (call_id, stage, state, payload, max_attempts, run_after, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (call_id, stage, PENDING, json.dumps(payload), self.max_attempts, now, now),
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def enqueue(self, call_id: str, payload: Dict[str, Any], stage: str = STAGES[0],
+                block: bool = True, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Add a call to the queue at ``stage``.
+
+        Enqueueing the same call and stage twice is a no-op. When
+        ``max_pending`` jobs are already waiting in that stage, this waits
+        for capacity (or raises ``QueueFull`` if ``block`` is false or the
+        timeout passes).
+
+        Returns:
+            The new job id, or None if the job already existed
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._transaction():
+                waiting = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE stage = ? AND state IN (?, ?)",
+                    (stage, PENDING, RUNNING),
+                ).fetchone()[0]
+                if waiting < self.max_pending:
+                    return self._insert(call_id, stage, payload, time.time())
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise QueueFull(f"{waiting} jobs waiting in stage {stage}")
+            time.sleep(0.5)
+
+    def recover(self) -> int:
+        """
+        Hand out again any running jobs whose lease has expired.
+
+        Returns:
+            Number of jobs returned to pending
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL "
+                "WHERE state = ? AND lease_expires < ?",
+                (PENDING, RUNNING, time.time()),
+            )
+            return cursor.rowcount
+
+    def claim(self, worker: str, stages: Sequence[str] = STAGES) -> Optional[Job]:
+        """
+        Atomically take the next runnable job.
+
+        Later stages are preferred so calls already in flight finish before
+        new ones are started.
+
+        Returns:
+            The claimed job, or None if nothing is runnable
+        """
+        now = time.time()
+        order = ' '.join(f"WHEN '{s}' THEN {i}" for i, s in enumerate(reversed(STAGES)))
+        placeholders = ','.join('?' * len(stages))
+        with self._transaction():
+            row = self._conn.execute(
+                f"SELECT * FROM jobs WHERE state = ? AND run_after <= ? AND stage IN ({placeholders}) "
+                f"ORDER BY CASE stage {order} END, id LIMIT 1",
+                (PENDING, now, *stages),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, worker = ?, "
+                "started_at = ?, lease_expires = ?, error = NULL WHERE id = ?",
+                (RUNNING, worker, now, now + self.lease_s, row['id']),
+            )
+        return Job(row['id'], row['call_id'], row['stage'], json.loads(row['payload']),
+                   row['attempts'] + 1, worker)
+
+    def _owns(self, job: Job, now: float) -> bool:
+        # The claim is identified by worker and attempt number; it is lost
+        # once the lease expires or the job is handed out again.
+        return self._conn.execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND state = ? AND worker = ? AND attempts = ? "
+            "AND lease_expires >= ?",
+            (job.id, RUNNING, job.worker, job.attempts, now),
+        ).fetchone() is not None
+
+    def heartbeat(self, job: Job) -> bool:
+        """
+        Extend a running job's lease.
+
+        Returns:
+            False if the caller no longer holds the job
+        """
+        now = time.time()
+        with self._transaction():
+            if not self._owns(job, now):
+                return False
+            self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ?", (now + self.lease_s, job.id)
+            )
+            return True
+
+    def complete(self, job: Job, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Mark a job done and queue the call's next stage.
+
+        Args:
+            job: The finished job
+            result: Payload for the next stage (merged over this job's payload)
+
+        Returns:
+            False (and nothing is recorded) if the caller no longer holds
+            the job
+        """
+        now = time.time()
+        with self._transaction():
+            if not self._owns(job, now):
+                return False
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, lease_expires = NULL WHERE id = ?",
+                (DONE, now, job.id),
+            )
+            index = STAGES.index(job.stage)
+            if index + 1 < len(STAGES):
+                self._insert(job.call_id, STAGES[index + 1], {**job.payload, **(result or {})}, now)
+            return True
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Record a failed attempt; retry later or give up after max_attempts.
+
+        Returns:
+            False (and nothing is recorded) if the caller no longer holds
+            the job
+        """
+        now = time.time()
+        with self._transaction():
+            if not self._owns(job, now):
+                return False
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job.id,)
+            ).fetchone()
+            if row['attempts'] < row['max_attempts']:
+                delay = self.backoff_s * 2 ** (row['attempts'] - 1)
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, error = ?, run_after = ?, worker = NULL, "
+                    "lease_expires = NULL WHERE id = ?",
+                    (PENDING, error, now + delay, job.id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, error = ?, finished_at = ?, lease_expires = NULL "
+                    "WHERE id = ?",
+                    (FAILED, error, now, job.id),
+                )
+            return True
+
+    def retry_failed(self, stage: Optional[str] = None) -> int:
+        """
+        Give failed jobs a fresh set of attempts.
+
+        Returns:
+            Number of jobs requeued
+        """
+        query = "UPDATE jobs SET state = ?, attempts = 0, run_after = ?, finished_at = NULL WHERE state = ?"
+        params: List[Any] = [PENDING, time.time(), FAILED]
+        if stage is not None:
+            query += " AND stage = ?"
+            params.append(stage)
+        with self._transaction():
+            return self._conn.execute(query, params).rowcount
+
+    def is_idle(self) -> bool:
+        """True if no job is pending or running."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)", (PENDING, RUNNING)
+        ).fetchone()[0] == 0
+
+    def finished(self, stage: str = STAGES[-1]) -> Iterator[str]:
+        """Call ids whose ``stage`` job is done, oldest first (streamed from the database)."""
+        for row in self._conn.execute(
+            "SELECT call_id FROM jobs WHERE stage = ? AND state = ? ORDER BY finished_at, id", (stage, DONE)
+        ):
+            yield row['call_id']
+
+    def stats(self, window_s: float = 300.0) -> Dict[str, Any]:
+        """
+        Queue depth and recent throughput per stage.
+
+        Args:
+            window_s: Window for throughput, in seconds
+
+        Returns:
+            Dictionary with per-stage job counts by state, jobs completed in
+            the window, throughput per minute and mean run time
+
+        Raises:
+            ValueError: If the window is not a positive number of seconds
+        """
+        if not math.isfinite(window_s) or window_s <= 0:
+            raise ValueError("window must be a positive number of seconds")
+        stages = {
+            stage: {**{state: 0 for state in STATES}, 'completed_in_window': 0,
+                    'per_minute': 0.0, 'mean_run_s': None}
+            for stage in STAGES
+        }
+        for row in self._conn.execute("SELECT stage, state, COUNT(*) AS n FROM jobs GROUP BY stage, state"):
+            if row['stage'] in stages:
+                stages[row['stage']][row['state']] = row['n']
+        since = time.time() - window_s
+        for row in self._conn.execute(
+            "SELECT stage, COUNT(*) AS n, AVG(finished_at - started_at) AS mean_run "
+            "FROM jobs WHERE state = ? AND finished_at >= ? GROUP BY stage",
+            (DONE, since),
+        ):
+            if row['stage'] in stages:
+                stages[row['stage']]['completed_in_window'] = row['n']
+                stages[row['stage']]['per_minute'] = round(row['n'] / window_s * 60, 2)
+                stages[row['stage']]['mean_run_s'] = round(row['mean_run'], 3)
+        return {
+            'depth': sum(s[PENDING] + s[RUNNING] for s in stages.values()),
+            'window_s': window_s,
+            'stages': stages,
+        }
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` block for an autocommit connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def run_workers(db_path: str, handlers: Dict[str, Callable[[Job], Optional[Dict[str, Any]]]],
+                workers: int = 4, poll_s: float = 0.5, until_idle: bool = False,
+                stop: Optional[threading.Event] = None, **queue_options) -> None:
+    """
+    Run a pool of worker threads against a queue.
+
+    Each worker claims jobs for the stages it has handlers for, runs the
+    handler and records the outcome. A handler returns the payload for
+    the next stage (or None) and raises to signal failure. While a handler
+    runs, a heartbeat thread renews the job's lease every third of
+    ``lease_s``, so long jobs are not handed out a second time.
+
+    Args:
+        db_path: Queue database file
+        handlers: Mapping of stage name to handler
+        workers: Number of worker threads
+        poll_s: Sleep between polls when no job is runnable
+        until_idle: Return once no job is pending or running
+        stop: Event that stops the workers when set
+        **queue_options: Passed to JobQueue
+    """
+    stop = stop or threading.Event()
+    stages = tuple(s for s in STAGES if s in handlers)
+
+    def keep_leased(job: Job, interval: float, done: threading.Event) -> None:
+        # Own connection, opened on the first beat so short jobs never need one
+        beats = None
+        try:
+            while not done.wait(interval):
+                beats = beats or JobQueue(db_path, **queue_options)
+                if not beats.heartbeat(job):
+                    return
+        finally:
+            if beats is not None:
+                beats.close()
+
+    def work(name: str) -> None:
+        queue = JobQueue(db_path, **queue_options)
+        try:
+            while not stop.is_set():
+                queue.recover()
+                job = queue.claim(name, stages)
+                if job is None:
+                    if until_idle and queue.is_idle():
+                        return
+                    stop.wait(poll_s)
+                    continue
+                done = threading.Event()
+                heartbeat = threading.Thread(target=keep_leased, args=(job, queue.lease_s / 3, done),
+                                             daemon=True)
+                heartbeat.start()
+                try:
+                    result, error = handlers[job.stage](job), None
+                except Exception as e:
+                    result, error = None, f"{type(e).__name__}: {e}"
+                finally:
+                    done.set()
+                    heartbeat.join()
+                if error is None:
+                    queue.complete(job, result)
+                else:
+                    queue.fail(job, error)
+        finally:
+            queue.close()
+
+    threads = [
+        threading.Thread(target=work, args=(f"{os.getpid()}-{i}",), daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1.0)
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
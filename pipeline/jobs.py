@@ -0,0 +1,197 @@
+"""
+Queue-driven transcribe → tag → score → build pipeline.
+
+``CallPipeline`` provides one handler per queue stage. Stages hand their
+output to the next one through files in a per-call work directory, so any
+stage can be retried or resumed on its own:
+
+    <work_dir>/<call_id>/transcript.json   utterances + full transcript
+    <work_dir>/<call_id>/transcript.words.bin
+    <work_dir>/<call_id>/tagged.json       stage-tagged utterances + segments
+    <work_dir>/<call_id>/scored.json       auto-scored compliance checklist
+    <output_dir>/<call_id>.json            final call file (schema v2)
+    <output_dir>/<call_id>.words.bin       word timings, copied from the transcript
+
+Usage:
+    python -m pipeline.jobs enqueue recordings/*.m4a
+    python -m pipeline.jobs work --workers 4
+    python -m pipeline.jobs status
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+from typing import Any, Callable, Dict, Optional
+
+from . import jsonio
+from .chunked import DEFAULT_CHUNK_MS, AssemblyAIBackend, transcribe_chunked
+from .jobqueue import STAGES, Job, JobQueue, QueueFull, run_workers
+from .schema import to_v2
+from .scoring import compile_checklist, score_call
+from .stages import DEFAULT_MAX_GAP_S, compliance_seed, merge_adjacent, tag_utterances
+from .transcription import utterance_records, word_store_for
+from .words import words_path_for
+
+DEFAULT_DB = os.path.join('data', 'pipeline.sqlite3')
+DEFAULT_WORK_DIR = os.path.join('data', 'work')
+DEFAULT_OUTPUT_DIR = os.path.join('data', 'calls')
+
+
+class CallPipeline:
+    """Stage handlers for the job queue."""
+
+    def __init__(self, work_dir: str = DEFAULT_WORK_DIR, output_dir: str = DEFAULT_OUTPUT_DIR,
+                 backend=None, chunk_ms: int = DEFAULT_CHUNK_MS,
+                 max_gap_s: float = DEFAULT_MAX_GAP_S):
+        """
+        Args:
+            work_dir: Directory for intermediate per-call artifacts
+            output_dir: Directory for finished call files
+            backend: Transcription backend (see pipeline.chunked); defaults
+                to AssemblyAI, configured on first use
+            chunk_ms: Chunk length for long recordings
+            max_gap_s: Segment merge gap passed to merge_adjacent
+        """
+        self.work_dir = work_dir
+        self.output_dir = output_dir
+        self.backend = backend
+        self.chunk_ms = chunk_ms
+        self.max_gap_s = max_gap_s
+        self.checklist = compile_checklist()
+
+    def handlers(self) -> Dict[str, Callable[[Job], Optional[Dict[str, Any]]]]:
+        return {
+            'transcribe': self.transcribe,
+            'tag': self.tag,
+            'score': self.score,
+            'build': self.build,
+        }
+
+    def _artifact(self, job: Job, name: str) -> str:
+        directory = os.path.join(self.work_dir, job.call_id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+
+    def _get_backend(self):
+        if self.backend is None:
+            from .transcription import configure_api_key, make_config
+
+            configure_api_key()
+            self.backend = AssemblyAIBackend(make_config())
+        return self.backend
+
+    def transcribe(self, job: Job) -> Dict[str, Any]:
+        transcript = transcribe_chunked(job.payload['audio'], self._get_backend(), chunk_ms=self.chunk_ms)
+        path = self._artifact(job, 'transcript.json')
+
+        word_store_for(transcript.utterances).save(words_path_for(path))
+
+        jsonio.dump_file(path, {
+            'utterances': utterance_records(transcript.utterances),
+            'full_transcript': transcript.text,
+        })
+        return {'transcript': path}
+
+    def tag(self, job: Job) -> Dict[str, Any]:
+        transcript = jsonio.load_file(job.payload['transcript'])
+        utterances = tag_utterances(transcript['utterances'])
+        path = self._artifact(job, 'tagged.json')
+        jsonio.dump_file(path, {
+            'utterances': utterances,
+            'segments': merge_adjacent(utterances, max_gap_s=self.max_gap_s),
+        })
+        return {'tagged': path}
+
+    def score(self, job: Job) -> Dict[str, Any]:
+        tagged = jsonio.load_file(job.payload['tagged'])
+        path = self._artifact(job, 'scored.json')
+        scored = {'utterances': tagged['utterances'], 'compliance_check': compliance_seed(tagged['segments'])}
+        score_call(scored, self.checklist)
+        jsonio.dump_file(path, {'compliance_check': scored['compliance_check']})
+        return {'scored': path}
+
+    def build(self, job: Job) -> Dict[str, Any]:
+        transcript = jsonio.load_file(job.payload['transcript'])
+        tagged = jsonio.load_file(job.payload['tagged'])
+        scored = jsonio.load_file(job.payload['scored'])
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'{job.call_id}.json')
+        meta = {
+            'call_type': job.payload.get('call_type', 'Service call (HVAC)'),
+            'date_analyzed': datetime.date.today().isoformat(),
+            'transcribed_with': 'AssemblyAI (speaker_labels, timestamps, word_boost)',
+            'stages_auto_tagged': True,
+            'source_audio': job.payload['audio'],
+        }
+        # Word timings go next to the call file, as cmd_transcribe writes them
+        words_path = words_path_for(job.payload['transcript'])
+        if os.path.exists(words_path):
+            shutil.copyfile(words_path, words_path_for(path))
+            meta['word_timings'] = os.path.basename(words_path_for(path))
+        jsonio.dump_file(path, to_v2({
+            'meta': meta,
+            'compliance_check': scored['compliance_check'],
+            'sales_insights': [],
+            'utterances': tagged['utterances'],
+            'full_transcript': transcript['full_transcript'],
+        }, max_gap_s=self.max_gap_s))
+        return {'output': path}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the call processing pipeline from a job queue.")
+    parser.add_argument('--db', default=DEFAULT_DB, help="queue database file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help="queue recordings for processing")
+    enqueue.add_argument('audio', nargs='+', help="audio files")
+    enqueue.add_argument('--call-type', help="meta.call_type for the finished calls")
+    enqueue.add_argument('--timeout', type=float, help="give up waiting for queue capacity after N seconds")
+
+    work = commands.add_parser('work', help="run a worker pool")
+    work.add_argument('--workers', type=int, default=4)
+    work.add_argument('--work-dir', default=DEFAULT_WORK_DIR)
+    work.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    work.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                      help="only run these stages")
+    work.add_argument('--until-idle', action='store_true', help="exit when the queue is empty")
+    work.add_argument('--lease', type=float, default=600.0,
+                      help="seconds before a job held by a dead worker is handed out again")
+
+    commands.add_parser('status', help="print queue depth and throughput")
+
+    retry = commands.add_parser('retry', help="requeue failed jobs")
+    retry.add_argument('--stage', choices=STAGES)
+
+    args = parser.parse_args(argv)
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+
+    if args.command == 'enqueue':
+        queue = JobQueue(args.db)
+        for audio in args.audio:
+            call_id = os.path.splitext(os.path.basename(audio))[0]
+            payload = {'audio': os.path.abspath(audio)}
+            if args.call_type:
+                payload['call_type'] = args.call_type
+            try:
+                job_id = queue.enqueue(call_id, payload, timeout=args.timeout)
+            except QueueFull as e:
+                print(f"queue full: {e}", file=sys.stderr)
+                return 1
+            print(f"{call_id}: {'queued as job %d' % job_id if job_id else 'already queued'}")
+    elif args.command == 'work':
+        handlers = CallPipeline(args.work_dir, args.output_dir).handlers()
+        run_workers(args.db, {s: handlers[s] for s in args.stages},
+                    workers=args.workers, until_idle=args.until_idle, lease_s=args.lease)
+    elif args.command == 'status':
+        print(json.dumps(JobQueue(args.db).stats(), indent=2))
+    elif args.command == 'retry':
+        print(f"requeued {JobQueue(args.db).retry_failed(args.stage)} jobs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+JSON reading and writing for call and analysis files.
+
+Parsing goes through a pluggable backend: ``orjson`` when it is installed,
+the stdlib ``json`` module otherwise. Set ``CALL_JSON_BACKEND=json`` to force
+the stdlib backend, or call ``set_backend``.
+
+Files ending in ``.json.gz`` or ``.json.zst`` are transparently
+(de)compressed; zstd needs the optional ``zstandard`` package, which is
+only imported the first time a ``.zst`` file is used.
+"""
+
+import gzip
+import importlib.util
+import json
+import os
+import stat
+import tempfile
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+ZSTD_AVAILABLE = importlib.util.find_spec('zstandard') is not None
+
+CALL_FILE_SUFFIXES = ('.json', '.json.gz', '.json.zst')
+
+
+def _new_file_mode() -> int:
+    # Mode a plain open() gives a new file. os.umask() can only be read by
+    # setting it, which races with other threads creating files, so read the
+    # umask from /proc, or else create a scratch file and look at its mode.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('Umask:'):
+                    return 0o666 & ~int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'mode')
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+        return stat.S_IMODE(os.stat(path).st_mode)
+
+
+NEW_FILE_MODE = _new_file_mode()
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch this regardless of the backend in use.
+JSONDecodeError = json.JSONDecodeError
+
+_backend = 'orjson' if orjson is not None and os.getenv('CALL_JSON_BACKEND', 'orjson') != 'json' else 'json'
+
+
+def get_backend() -> str:
+    """Name of the JSON backend in use: ``'orjson'`` or ``'json'``."""
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    """
+    Select the JSON backend.
+
+    Args:
+        name: ``'orjson'`` or ``'json'``
+
+    Raises:
+        ImportError: If orjson is requested but not installed
+        ValueError: If the name is unknown
+    """
+    global _backend
+    if name not in ('orjson', 'json'):
+        raise ValueError(f"Unknown JSON backend: {name}")
+    if name == 'orjson' and orjson is None:
+        raise ImportError("orjson is not installed")
+    _backend = name
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document from bytes or text."""
+    if _backend == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes (non-ASCII characters are kept as-is).
+
+    Args:
+        obj: JSON-serializable data
+        indent: Pretty-print with two-space indentation
+    """
+    if _backend == 'orjson':
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def _compression(file_path: str) -> Optional[str]:
+    name = os.fspath(file_path)
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise ImportError(f"zstandard is required to read or write {name}")
+        return 'zstd'
+    return None
+
+
+def read_bytes(file_path: str) -> bytes:
+    """Read a file, decompressing ``.gz``/``.zst`` files."""
+    compression = _compression(file_path)
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    if compression == 'gzip':
+        return gzip.decompress(data)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def write_bytes_atomic(file_path: str, data: bytes) -> None:
+    """
+    Write bytes to a file atomically.
+
+    The data is written to a temporary file in the same directory and then
+    renamed over the target, so readers never see a partially written file.
+    The target keeps its permissions; a new file gets the same permissions
+    ``open()`` would give it (``mkstemp`` alone would make it 0600).
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_file(file_path: str) -> Any:
+    """
+    Load a JSON file, decompressing ``.json.gz``/``.json.zst`` transparently.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        JSONDecodeError: If the file contains invalid JSON
+    """
+    return loads(read_bytes(file_path))
+
+
+def dump_file(file_path: str, obj: Any, indent: bool = True, level: int = 3) -> None:
+    """
+    Atomically write a JSON file, compressing by suffix.
+
+    Args:
+        file_path: Destination path (``.json``, ``.json.gz`` or ``.json.zst``)
+        obj: JSON-serializable data
+        indent: Pretty-print with two-space indentation
+        level: Compression level for compressed files
+    """
+    compression = _compression(file_path)
+    data = dumps(obj, indent=indent)
+    if compression == 'gzip':
+        data = gzip.compress(data, compresslevel=level, mtime=0)
+    elif compression == 'zstd':
+        import zstandard
+        data = zstandard.ZstdCompressor(level=level).compress(data)
+    write_bytes_atomic(file_path, data)
+
+
+def is_call_file(file_path: str) -> bool:
+    """True if the path has a call file suffix (plain or compressed JSON)."""
+    return os.fspath(file_path).endswith(CALL_FILE_SUFFIXES)
+
+
+def resolve_call_file(file_path: str) -> str:
+    """
+    Find a call file, falling back to its compressed variants.
+
+    ``media/call.json`` resolves to ``media/call.json.gz`` or
+    ``media/call.json.zst`` when only a compressed copy exists.
+
+    Returns:
+        The first existing path, or ``file_path`` unchanged if none exist
+    """
+    file_path = os.fspath(file_path)
+    if os.path.exists(file_path) or not file_path.endswith('.json'):
+        return file_path
+    for suffix in CALL_FILE_SUFFIXES[1:]:
+        candidate = file_path[:-len('.json')] + suffix
+        if os.path.exists(candidate):
+            return candidate
+    return file_path
@@ -0,0 +1,262 @@
+"""
+Live-call mode: incremental stage tagging while the call is in progress.
+
+Partial utterances from a streaming source are tagged with ``STAGE_RULES``
+as they arrive. Finalized utterances are folded into the merged segments,
+per-stage evidence and rolling compliance estimates without reprocessing
+anything that came before, so a supervisor can watch stage coverage with
+sub-second lag.
+
+A source is any async iterable of utterance events::
+
+    {"id": 7, "speaker": "Tech", "start": 81.2, "end": 84.0,
+     "text": "So the two equipment options", "final": False}
+
+Events for the same ``id`` carry the growing text of one utterance; the last
+one has ``final`` set. ``FileReplaySource`` replays a finished ``call.json``
+this way and stands in for a live transcription stream when testing.
+
+Usage:
+    python -m pipeline.live data/call.json --speed 20
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from . import jsonio
+from .stages import (
+    COMPLIANCE_TEMPLATES,
+    DEFAULT_MAX_GAP_S,
+    extend_segments,
+    format_evidence,
+    tag_stage,
+)
+
+
+def estimate_score(evidence_count: int, max_score: float) -> float:
+    """
+    Rough rolling score for a stage from how much evidence has been seen.
+
+    Each additional utterance tagged with the stage closes half of the
+    remaining gap to ``max_score``. This is a live indicator only; it is
+    never written into ``compliance_check``.
+    """
+    return round(max_score * (1 - 0.5 ** evidence_count), 1)
+
+
+class LiveCallState:
+    """
+    Incrementally maintained analysis of a call in progress.
+
+    Every finalized utterance costs one ``tag_stage`` call plus O(1) updates
+    to the segments, per-stage statistics and evidence picks.
+    """
+
+    def __init__(self, max_gap_s: float = DEFAULT_MAX_GAP_S, evidence_limit: int = 2):
+        self.max_gap_s = max_gap_s
+        self.evidence_limit = evidence_limit
+        self.utterances: List[Dict[str, Any]] = []
+        self.segments: List[Dict[str, Any]] = []
+        self.pending: Dict[Any, Dict[str, Any]] = {}
+        self.stage_stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'utterances': 0, 'seconds': 0.0}
+        )
+        # First few segments per stage; these dicts are the live segment
+        # objects, so merges into them are reflected in the evidence.
+        self.stage_segments: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.last_lag_ms = 0.0
+
+    def apply(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Tag one utterance event and fold it into the running state.
+
+        Args:
+            event: Partial or final utterance event from a streaming source
+
+        Returns:
+            The tagged utterance
+        """
+        utterance = {
+            'speaker': event.get('speaker', ''),
+            'start': event.get('start'),
+            'end': event.get('end'),
+            'text': event.get('text') or '',
+        }
+        utterance['stage'] = tag_stage(utterance['text'])
+
+        key = event.get('id', len(self.utterances))
+        if not event.get('final', True):
+            self.pending[key] = utterance
+        else:
+            self.pending.pop(key, None)
+            self._finalize(utterance)
+
+        emitted_at = event.get('emitted_at')
+        if emitted_at is not None:
+            self.last_lag_ms = (time.monotonic() - emitted_at) * 1000
+        return utterance
+
+    def _finalize(self, utterance: Dict[str, Any]) -> None:
+        self.utterances.append(utterance)
+        stage = utterance['stage']
+        stats = self.stage_stats[stage]
+        stats['utterances'] += 1
+        if isinstance(utterance['start'], (int, float)) and isinstance(utterance['end'], (int, float)):
+            stats['seconds'] += max(0.0, utterance['end'] - utterance['start'])
+
+        new_seg = extend_segments(self.segments, utterance, self.max_gap_s)
+        picks = self.stage_segments[stage]
+        if new_seg is not None and len(picks) < self.evidence_limit:
+            picks.append(new_seg)
+
+    def current_stage(self) -> Optional[str]:
+        """Stage of the most recent utterance, including in-progress ones."""
+        if self.pending:
+            return next(reversed(self.pending.values()))['stage']
+        if self.utterances:
+            return self.utterances[-1]['stage']
+        return None
+
+    def compliance_estimates(self) -> List[Dict[str, Any]]:
+        """Rolling score estimate and evidence for each checklist stage."""
+        estimates = []
+        for stage, evidence_stage, max_score, _suggestion in COMPLIANCE_TEMPLATES:
+            count = self.stage_stats[evidence_stage]['utterances'] if evidence_stage in self.stage_stats else 0
+            estimates.append({
+                'stage': stage,
+                'estimate': estimate_score(count, max_score),
+                'max': max_score,
+                'evidence': format_evidence(self.stage_segments.get(evidence_stage, [])),
+            })
+        return estimates
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Point-in-time view for a supervisor display.
+
+        Returns:
+            Dictionary with per-stage coverage, rolling compliance estimates,
+            the current stage and processing lag
+        """
+        elapsed = 0.0
+        if self.utterances and isinstance(self.utterances[-1]['end'], (int, float)):
+            elapsed = self.utterances[-1]['end']
+        return {
+            'elapsed_s': elapsed,
+            'current_stage': self.current_stage(),
+            'total_utterances': len(self.utterances),
+            'total_segments': len(self.segments),
+            'coverage': {
+                stage: {'utterances': int(s['utterances']), 'seconds': round(s['seconds'], 2)}
+                for stage, s in self.stage_stats.items()
+            },
+            'compliance': self.compliance_estimates(),
+            'lag_ms': round(self.last_lag_ms, 3),
+        }
+
+
+class FileReplaySource:
+    """
+    Replay a finished call file as a stream of partial utterance events.
+
+    Each utterance is revealed ``partial_words`` words at a time, paced by
+    its timestamps. ``speed`` scales playback (2.0 is twice real time);
+    ``speed=0`` replays as fast as possible.
+    """
+
+    def __init__(self, file_path: str, speed: float = 1.0, partial_words: int = 4):
+        self.file_path = file_path
+        self.speed = speed
+        self.partial_words = max(1, partial_words)
+
+    def _load_utterances(self) -> List[Dict[str, Any]]:
+        data = jsonio.load_file(self.file_path)
+        utterances = data.get('utterances', [])
+        return sorted(utterances, key=lambda u: u.get('start') or 0)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for idx, u in enumerate(self._load_utterances()):
+            words = (u.get('text') or '').split()
+            start = u.get('start') or 0
+            end = u.get('end') or start
+            steps = max(1, -(-len(words) // self.partial_words))
+            for step in range(1, steps + 1):
+                at = start + (end - start) * step / steps
+                if self.speed > 0:
+                    delay = t0 + at / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                final = step == steps
+                yield {
+                    'id': idx,
+                    'speaker': u.get('speaker', ''),
+                    'start': u.get('start'),
+                    'end': u.get('end') if final else round(at, 2),
+                    'text': ' '.join(words[:step * self.partial_words]),
+                    'final': final,
+                    'emitted_at': time.monotonic(),
+                }
+
+
+async def run_live(source, state: Optional[LiveCallState] = None,
+                   on_update: Optional[Callable[[LiveCallState, Dict[str, Any]], Any]] = None) -> LiveCallState:
+    """
+    Consume a streaming source and keep a LiveCallState up to date.
+
+    Args:
+        source: Async iterable of utterance events
+        state: Existing state to continue, or None to start a new one
+        on_update: Optional callback (sync or async) called as
+            ``on_update(state, utterance)`` after every event
+
+    Returns:
+        The final LiveCallState
+    """
+    state = state or LiveCallState()
+    async for event in source:
+        utterance = state.apply(event)
+        if on_update is not None:
+            result = on_update(state, utterance)
+            if inspect.isawaitable(result):
+                await result
+    return state
+
+
+def _print_update(state: LiveCallState, utterance: Dict[str, Any]) -> None:
+    # Only report finalized utterances; partials would flood the console.
+    if not state.utterances or utterance is not state.utterances[-1]:
+        return
+    snap = state.snapshot()
+    covered = ', '.join(
+        f"{c['stage']} {c['estimate']}/{c['max']}" for c in snap['compliance'] if c['estimate']
+    ) or '—'
+    minutes, seconds = divmod(int(snap['elapsed_s']), 60)
+    print(f"[{minutes:02d}:{seconds:02d}] {snap['current_stage']:<22} "
+          f"lag={snap['lag_ms']:.1f}ms  {covered}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a call file through live-call mode.")
+    parser.add_argument('call_file', help="call.json to replay")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="playback speed multiplier (0 = as fast as possible)")
+    parser.add_argument('--partial-words', type=int, default=4,
+                        help="words revealed per partial event")
+    args = parser.parse_args(argv)
+
+    source = FileReplaySource(args.call_file, speed=args.speed, partial_words=args.partial_words)
+    state = asyncio.run(run_live(source, on_update=_print_update))
+    print(json.dumps(state.snapshot()['coverage'], indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
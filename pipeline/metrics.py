@@ -0,0 +1,334 @@
+"""
+Conversation metrics computed with NumPy over a batch of calls.
+
+Utterances from every call in the batch are flattened into parallel arrays
+(start, end, speaker code, stage code) with per-call offsets. All metrics are
+then computed with whole-array operations, with no Python loop per utterance:
+
+    talk time    seconds and share of talk per speaker
+    silence      gaps of at least ``min_silence_s`` where nobody is talking
+    overlaps     time where utterances overlap, and how often it happens
+    interruptions
+                 utterances that start while a different speaker is still
+                 talking, counted for the speaker who cut in
+    stage time   seconds spent in each stage
+
+Usage:
+    python -m pipeline.metrics data/calls/ > corpus_metrics.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from . import jsonio
+from .stages import DEFAULT_STAGE
+
+DEFAULT_MIN_SILENCE_S = 2.0
+
+
+_START = itemgetter('start')
+_END = itemgetter('end')
+_SPEAKER = itemgetter('speaker')
+_STAGE = itemgetter('stage')
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _float_array(values: List[Any]) -> np.ndarray:
+    """Float array with NaN for None and other non-numeric values."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([v if _is_number(v) else None for v in values], dtype=np.float64)
+
+
+def _codes() -> defaultdict:
+    """Mapping that assigns 0, 1, 2, ... to keys in order of first lookup."""
+    codes = defaultdict()
+    codes.default_factory = codes.__len__
+    return codes
+
+
+class UtteranceArrays:
+    """
+    Utterance timing for a batch of calls as flat NumPy arrays.
+
+    Utterance ``j`` of call ``i`` is at index ``offsets[i] + j``. Utterances
+    without numeric start/end times are skipped; speaker and stage are
+    stored as integer codes into ``speakers`` and ``stages``.
+    """
+
+    def __init__(self, calls: Iterable[Sequence[Dict[str, Any]]]):
+        """
+        Args:
+            calls: For each call, its list of utterance dicts (speaker,
+                start, end and optionally stage)
+        """
+        starts: List[Any] = []
+        ends: List[Any] = []
+        speakers: List[Any] = []
+        stages: List[Any] = []
+        lengths: List[int] = []
+        for utterances in calls:
+            # itemgetter keeps the per-utterance work in C; fall back to
+            # .get() for utterances with missing keys.
+            n = len(starts)
+            try:
+                starts.extend(map(_START, utterances))
+                ends.extend(map(_END, utterances))
+                speakers.extend(map(_SPEAKER, utterances))
+                stages.extend(map(_STAGE, utterances))
+            except KeyError:
+                del starts[n:], ends[n:], speakers[n:], stages[n:]
+                starts.extend(u.get('start') for u in utterances)
+                ends.extend(u.get('end') for u in utterances)
+                speakers.extend(u.get('speaker') for u in utterances)
+                stages.extend(u.get('stage') for u in utterances)
+            lengths.append(len(starts) - n)
+
+        start = _float_array(starts)
+        end = _float_array(ends)
+        speaker_codes = _codes()
+        speaker = np.fromiter(map(speaker_codes.__getitem__, speakers), dtype=np.int64, count=len(speakers))
+        stage_codes = _codes()
+        stage = np.fromiter(map(stage_codes.__getitem__, stages), dtype=np.int64, count=len(stages))
+
+        # Drop utterances without numeric start/end times.
+        timed = np.isfinite(start) & np.isfinite(end)
+        if not timed.all():
+            call = np.repeat(np.arange(len(lengths)), lengths)
+            lengths = np.bincount(call[timed], minlength=len(lengths))
+            start, end, speaker, stage = start[timed], end[timed], speaker[timed], stage[timed]
+
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.stage = stage
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)))
+        self.speakers = [name if name else 'Unknown' for name in speaker_codes]
+        self.stages = [name if name else DEFAULT_STAGE for name in stage_codes]
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+
+class BatchMetrics:
+    """Per-call metric arrays for a batch; row ``i`` belongs to call ``i``."""
+
+    def __init__(self, arrays: UtteranceArrays, min_silence_s: float = DEFAULT_MIN_SILENCE_S):
+        """
+        Args:
+            arrays: Utterance arrays of the batch
+            min_silence_s: Shortest gap counted as silence
+        """
+        self.speakers = arrays.speakers
+        self.stages = arrays.stages
+        self.min_silence_s = min_silence_s
+        n_calls = len(arrays)
+        n_speakers = max(len(arrays.speakers), 1)
+        n_stages = max(len(arrays.stages), 1)
+
+        call = np.repeat(np.arange(n_calls), arrays.lengths)
+        duration = np.clip(arrays.end - arrays.start, 0.0, None)
+
+        # Weighted bincounts come back as int64 when there are no weights at
+        # all (no timed utterances), hence the casts here and below.
+        talk = np.bincount(call * n_speakers + arrays.speaker, weights=duration,
+                           minlength=n_calls * n_speakers)
+        self.talk = talk.astype(float).reshape(n_calls, n_speakers)
+        stage_seconds = np.bincount(call * n_stages + arrays.stage, weights=duration,
+                                    minlength=n_calls * n_stages)
+        self.stage_seconds = stage_seconds.astype(float).reshape(n_calls, n_stages)
+
+        # Times are shifted by ``call * span`` so that one sort and one
+        # running maximum over the whole batch never mix up two calls.
+        if arrays.start.size:
+            base = min(arrays.start.min(), arrays.end.min())
+            span = max(arrays.start.max(), arrays.end.max()) - base + 1.0
+        else:
+            base, span = 0.0, 1.0
+        offset = call * span - base
+
+        # Sort by start time within each call (usually already in order).
+        key = arrays.start + offset
+        if np.all(key[1:] >= key[:-1]):
+            start, end, speaker = arrays.start, arrays.end, arrays.speaker
+        else:
+            order = np.argsort(key, kind='stable')
+            start, end, speaker = arrays.start[order], arrays.end[order], arrays.speaker[order]
+
+        self.duration = np.zeros(n_calls)
+        nonempty = arrays.lengths > 0
+        if start.size:
+            first = arrays.offsets[:-1][nonempty]
+            self.duration[nonempty] = np.maximum.reduceat(end, first) - np.minimum.reduceat(start, first)
+
+        # Latest end time so far within the call, and the utterance it
+        # belongs to.
+        shifted = end + offset
+        running = np.maximum.accumulate(shifted) if shifted.size else shifted
+        owner = np.maximum.accumulate(np.where(shifted == running, np.arange(start.size), 0)) \
+            if shifted.size else np.zeros(0, dtype=np.int64)
+        running_end = running - offset
+
+        same_call = call[1:] == call[:-1]
+        nxt = call[1:]
+        gap = start[1:] - running_end[:-1]
+
+        silent = same_call & (gap >= min_silence_s)
+        self.silence_total = np.bincount(nxt[silent], weights=gap[silent], minlength=n_calls).astype(float)
+        self.silence_count = np.bincount(nxt[silent], minlength=n_calls)
+        self.longest_silence = np.zeros(n_calls)
+        np.maximum.at(self.longest_silence, nxt[silent], gap[silent])
+
+        overlapping = same_call & (gap < 0)
+        overlap = np.minimum(end[1:], running_end[:-1]) - start[1:]
+        self.overlap_total = np.bincount(nxt[overlapping], weights=overlap[overlapping],
+                                         minlength=n_calls).astype(float)
+        self.overlap_count = np.bincount(nxt[overlapping], minlength=n_calls)
+
+        cut_in = overlapping & (speaker[1:] != speaker[owner[:-1]])
+        self.interruptions = np.bincount(nxt[cut_in] * n_speakers + speaker[1:][cut_in],
+                                         minlength=n_calls * n_speakers).reshape(n_calls, n_speakers)
+
+    def __len__(self) -> int:
+        return len(self.duration)
+
+    def talk_ratio(self) -> np.ndarray:
+        """Share of talk time per speaker, shape (calls, speakers)."""
+        total = self.talk.sum(axis=1, keepdims=True)
+        return np.divide(self.talk, total, out=np.zeros_like(self.talk), where=total > 0)
+
+    def silence_ratio(self) -> np.ndarray:
+        return np.divide(self.silence_total, self.duration, out=np.zeros_like(self.duration),
+                         where=self.duration > 0)
+
+    def call(self, index: int) -> Dict[str, Any]:
+        """Metrics of one call as plain Python data."""
+        talk_total = float(self.talk[index].sum())
+        ratio = self.talk_ratio()[index]
+        speakers = [
+            {
+                'speaker': name,
+                'seconds': round(float(self.talk[index, i]), 2),
+                'ratio': round(float(ratio[i]), 4),
+                'interruptions': int(self.interruptions[index, i]),
+            }
+            for i, name in enumerate(self.speakers)
+            if self.talk[index, i] > 0 or self.interruptions[index, i] > 0
+        ]
+        speakers.sort(key=lambda s: s['seconds'], reverse=True)
+        stage_total = float(self.stage_seconds[index].sum())
+        stages = [
+            {
+                'stage': name,
+                'seconds': round(float(self.stage_seconds[index, i]), 2),
+                'ratio': round(float(self.stage_seconds[index, i]) / stage_total, 4) if stage_total else 0.0,
+            }
+            for i, name in enumerate(self.stages)
+            if self.stage_seconds[index, i] > 0
+        ]
+        duration = float(self.duration[index])
+        return {
+            'duration_s': round(duration, 2),
+            'talk_s': round(talk_total, 2),
+            'speakers': speakers,
+            'silence': {
+                'total_s': round(float(self.silence_total[index]), 2),
+                'count': int(self.silence_count[index]),
+                'longest_s': round(float(self.longest_silence[index]), 2),
+                'ratio': round(float(self.silence_total[index]) / duration, 4) if duration else 0.0,
+                'min_gap_s': self.min_silence_s,
+            },
+            'overlap': {
+                'total_s': round(float(self.overlap_total[index]), 2),
+                'count': int(self.overlap_count[index]),
+            },
+            'interruptions': int(self.interruptions[index].sum()),
+            'stages': stages,
+        }
+
+    def corpus(self) -> Dict[str, Any]:
+        """Totals and distributions across every call in the batch."""
+        minutes = self.duration.sum() / 60.0
+        talk = self.talk.sum(axis=0)
+        stage_seconds = self.stage_seconds.sum(axis=0)
+        silence_ratio = self.silence_ratio()
+
+        def per_minute(counts) -> float:
+            return round(float(counts.sum()) / minutes, 3) if minutes else 0.0
+
+        return {
+            'calls': len(self),
+            'hours': round(float(self.duration.sum()) / 3600.0, 2),
+            'duration_s': _distribution(self.duration),
+            'talk_ratio': {name: round(float(talk[i] / talk.sum()), 4) if talk.sum() else 0.0
+                           for i, name in enumerate(self.speakers)},
+            'silence_ratio': _distribution(silence_ratio, digits=4),
+            'overlaps_per_minute': per_minute(self.overlap_count),
+            'interruptions_per_minute': {name: per_minute(self.interruptions[:, i])
+                                         for i, name in enumerate(self.speakers)},
+            'stage_share': {name: round(float(stage_seconds[i] / stage_seconds.sum()), 4)
+                            if stage_seconds.sum() else 0.0
+                            for i, name in enumerate(self.stages)},
+        }
+
+
+def _distribution(values: np.ndarray, digits: int = 2) -> Dict[str, Optional[float]]:
+    if not values.size:
+        return {'mean': None, 'p50': None, 'p90': None, 'max': None}
+    p50, p90 = np.percentile(values, [50, 90])
+    return {
+        'mean': round(float(values.mean()), digits),
+        'p50': round(float(p50), digits),
+        'p90': round(float(p90), digits),
+        'max': round(float(values.max()), digits),
+    }
+
+
+def batch_metrics(calls: Iterable[Sequence[Dict[str, Any]]],
+                  min_silence_s: float = DEFAULT_MIN_SILENCE_S) -> BatchMetrics:
+    """Metrics for a batch of calls, given each call's utterances."""
+    return BatchMetrics(UtteranceArrays(calls), min_silence_s)
+
+
+def call_metrics(utterances: Sequence[Dict[str, Any]],
+                 min_silence_s: float = DEFAULT_MIN_SILENCE_S) -> Dict[str, Any]:
+    """Metrics for a single call."""
+    return batch_metrics([utterances], min_silence_s).call(0)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Conversation metrics across a corpus of call files.")
+    parser.add_argument('paths', nargs='+', help="call files or directories")
+    parser.add_argument('--min-silence', type=float, default=DEFAULT_MIN_SILENCE_S,
+                        help="shortest gap counted as silence, in seconds")
+    parser.add_argument('--per-call', action='store_true', help="include every call's metrics")
+    args = parser.parse_args(argv)
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if jsonio.is_call_file(name))
+        else:
+            files.append(path)
+    metrics = batch_metrics((jsonio.load_file(f).get('utterances', []) for f in files), args.min_silence)
+    report: Dict[str, Any] = {'corpus': metrics.corpus()}
+    if args.per_call:
+        report['calls'] = {f: metrics.call(i) for i, f in enumerate(files)}
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
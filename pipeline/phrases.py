@@ -0,0 +1,448 @@
+"""
+Streaming phrase frequencies per stage with bounded memory.
+
+Exact n-gram counts across thousands of calls grow with the corpus. Here
+each stage gets a count-min sketch (a ``depth`` x ``width`` table of
+counters indexed by blake2b hashes of the phrase) plus a heavy-hitter list
+of the ``capacity`` phrases with the highest estimates seen so far, so
+memory is fixed by the sketch size whatever the corpus size.
+
+An estimate is never below the true count and, with probability at least
+``1 - e**-depth``, at most ``e / width`` times the stage's total n-gram
+count above it (reported as ``max_overcount``). Sketches are updated
+conservatively, so in practice the error is far below that bound.
+
+Counters built over different files merge: the sketch tables add up (the
+sum still bounds every count from above) and the heavy-hitter candidates
+are re-estimated against the merged table. That's how batches counted in
+parallel worker processes are combined, and how a saved state
+(``--state``) is extended with new calls later (``--merge``). A state
+remembers the filters its calls were selected by (``--speaker``,
+``--min-compliance``) and only merges with counts selected the same way.
+
+Usage:
+    python -m pipeline phrases data/calls/ -o data/phrases.json --state data/phrases.npz
+    python -m pipeline phrases data/calls/ --speaker Tech --min-compliance 0.8
+    python -m pipeline phrases data/new_calls/ --merge data/phrases.npz --state data/phrases.npz
+"""
+
+import argparse
+import hashlib
+import heapq
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import jsonio
+from .sources import call_sources
+from .stages import DEFAULT_STAGE, STAGE_RULES
+
+DEFAULT_WIDTH = 1 << 16
+DEFAULT_DEPTH = 4
+DEFAULT_CAPACITY = 200
+DEFAULT_TOP_K = 25
+DEFAULT_NGRAMS = (2, 4)
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_REPORT = os.path.join('data', 'phrases.json')
+
+# Phrases made only of these words ("and then", "you know it") are skipped.
+STOPWORDS = frozenset("""
+    a about all also am an and any are as at be been but by can could did do does
+    for from get go going got had has have he her here him his how i if in is it its
+    just know let like me my no not now of oh ok okay on one or our out right s so
+    that the their them then there they this to uh um up us was we well were what
+    when where which who will with would yeah yes you your
+    i'm it's that's there's we'll we're we've you're don't didn't
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)*")
+_ORDER = {stage: i for i, (stage, _) in enumerate(STAGE_RULES)}
+_COUNT = itemgetter(1)
+
+
+def words(text: str) -> List[str]:
+    """Lowercased words of a text, keeping contractions ("we'd") whole."""
+    return _WORD_RE.findall((text or '').lower().replace('’', "'"))
+
+
+def _ngrams(tokens: List[str], ngrams: Tuple[int, int]) -> Iterator[str]:
+    low, high = ngrams
+    return chain.from_iterable(map(' '.join, zip(*[tokens[i:] for i in range(n)]))
+                               for n in range(low, high + 1))
+
+
+def _is_phrase(ngram: str) -> bool:
+    return not STOPWORDS.issuperset(ngram.split(' '))
+
+
+def phrases(text: str, ngrams: Tuple[int, int] = DEFAULT_NGRAMS) -> List[str]:
+    """Word n-grams of a text, skipping all-stopword ones."""
+    return [ngram for ngram in _ngrams(words(text), ngrams) if _is_phrase(ngram)]
+
+
+class CountMinSketch:
+    """Count-min sketch over strings, updated and queried in batches."""
+
+    def __init__(self, width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH,
+                 table: Optional[np.ndarray] = None):
+        """
+        Args:
+            width: Counters per row; the error bound shrinks as 1/width
+            depth: Rows (independent hashes); the failure odds shrink as e**-depth
+            table: Existing counters of shape (depth, width), e.g. loaded
+                from a saved state
+        """
+        if not 1 <= depth <= 16:
+            raise ValueError("depth must be between 1 and 16")
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64) if table is None else table
+        self._rows = np.arange(depth)
+
+    def _columns(self, keys: Sequence[str]) -> np.ndarray:
+        """Counter index of every key in every row, shape (len(keys), depth)."""
+        size = 4 * self.depth
+        digests = b''.join(hashlib.blake2b(key.encode('utf-8'), digest_size=size).digest() for key in keys)
+        hashes = np.frombuffer(digests, dtype='<u4').reshape(len(keys), self.depth)
+        return (hashes % self.width).astype(np.intp)
+
+    def add(self, counts: Dict[str, int]) -> Tuple[List[str], np.ndarray]:
+        """
+        Add counts for many keys.
+
+        Returns:
+            The keys and their estimates after the update
+        """
+        keys = list(counts)
+        if not keys:
+            return keys, np.zeros(0, dtype=np.int64)
+        columns = self._columns(keys)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(keys))
+        # Conservative update: raise each key's counters only as far as its
+        # new estimate needs, which keeps collisions from inflating them.
+        estimates = self.table[self._rows, columns].min(axis=1) + values
+        np.maximum.at(self.table, (self._rows, columns), estimates[:, None])
+        return keys, estimates
+
+    def estimate(self, keys: Sequence[str]) -> np.ndarray:
+        """Estimated counts of ``keys`` (never below the true counts)."""
+        if not keys:
+            return np.zeros(0, dtype=np.int64)
+        return self.table[self._rows, self._columns(keys)].min(axis=1)
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        """Add another sketch's counts into this one."""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Only sketches of the same width and depth can be merged")
+        self.table += other.table
+
+
+class HeavyHitters:
+    """The ``capacity`` keys with the highest estimates offered so far."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def offer(self, keys: Sequence[str], estimates: np.ndarray) -> None:
+        """Consider keys with their current estimates."""
+        counts = self.counts
+        if len(counts) >= self.capacity:
+            # Only keys that can enter (or are already in) the list matter.
+            floor = min(counts.values())
+            selected = np.flatnonzero(estimates >= floor)
+            keys = [keys[i] for i in selected]
+            estimates = estimates[selected]
+        counts.update(zip(keys, estimates.tolist()))
+        if len(counts) > self.capacity:
+            self.counts = dict(heapq.nlargest(self.capacity, counts.items(), key=_COUNT))
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """The ``k`` highest counts, ties in alphabetical order."""
+        return sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+class PhraseCounter:
+    """Per-stage phrase sketches and heavy hitters for a set of calls."""
+
+    def __init__(self, width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH,
+                 capacity: int = DEFAULT_CAPACITY, ngrams: Tuple[int, int] = DEFAULT_NGRAMS,
+                 filters: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            width: Sketch width (see CountMinSketch)
+            depth: Sketch depth (see CountMinSketch)
+            capacity: Candidate phrases tracked per stage; keep it a few
+                times larger than the top-k that will be reported
+            ngrams: Shortest and longest phrase, in words
+            filters: How the counted calls are selected (``speaker`` and
+                ``min_compliance``, see count_corpus); None means all calls
+        """
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.ngrams = tuple(ngrams)
+        self.filters = {'speaker': None, 'min_compliance': None, **(filters or {})}
+        self.sketches: Dict[str, CountMinSketch] = {}
+        self.heavy: Dict[str, HeavyHitters] = {}
+        self.totals: Dict[str, int] = defaultdict(int)
+        self.calls = 0
+
+    def _stage(self, stage: str) -> Tuple[CountMinSketch, HeavyHitters]:
+        if stage not in self.sketches:
+            self.sketches[stage] = CountMinSketch(self.width, self.depth)
+            self.heavy[stage] = HeavyHitters(self.capacity)
+        return self.sketches[stage], self.heavy[stage]
+
+    def add_call(self, utterances: Iterable[Dict[str, Any]], speaker: Optional[str] = None) -> None:
+        """
+        Count the phrases of one call's tagged utterances.
+
+        Args:
+            utterances: Utterance dicts with text and stage
+            speaker: Only count utterances by this speaker
+        """
+        # Exact counts within one call are small; the sketch sees each
+        # distinct phrase once per call.
+        per_stage: Dict[str, Counter] = defaultdict(Counter)
+        for u in utterances:
+            if speaker is not None and u.get('speaker') != speaker:
+                continue
+            per_stage[u.get('stage') or DEFAULT_STAGE].update(_ngrams(words(u.get('text', '')), self.ngrams))
+        for stage, ngram_counts in per_stage.items():
+            counts = {ngram: n for ngram, n in ngram_counts.items() if _is_phrase(ngram)}
+            sketch, heavy = self._stage(stage)
+            heavy.offer(*sketch.add(counts))
+            self.totals[stage] += sum(counts.values())
+        self.calls += 1
+
+    def merge(self, other: 'PhraseCounter') -> None:
+        """Add another counter's calls into this one."""
+        if (other.width, other.depth, other.ngrams) != (self.width, self.depth, self.ngrams):
+            raise ValueError("Only counters with the same sketch size and n-gram range can be merged")
+        if other.filters != self.filters:
+            raise ValueError(f"Can't merge phrases counted with {describe_filters(other.filters)} "
+                             f"into phrases counted with {describe_filters(self.filters)}")
+        for stage, other_sketch in other.sketches.items():
+            sketch, heavy = self._stage(stage)
+            sketch.merge(other_sketch)
+            keys = list(heavy.counts.keys() | other.heavy[stage].counts.keys())
+            heavy.counts = {}
+            heavy.offer(keys, sketch.estimate(keys))
+            self.totals[stage] += other.totals[stage]
+        self.calls += other.calls
+
+    def estimate(self, stage: str, phrase: str) -> int:
+        """Estimated count of one phrase in one stage."""
+        if stage not in self.sketches:
+            return 0
+        return int(self.sketches[stage].estimate([phrase])[0])
+
+    def report(self, top_k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+        """Top phrases per stage, stages in tagging-rule order."""
+        stages = sorted(self.sketches, key=lambda stage: (_ORDER.get(stage, len(_ORDER)), stage))
+        return {
+            'calls': self.calls,
+            'ngrams': list(self.ngrams),
+            'filters': dict(self.filters),
+            'sketch': {'width': self.width, 'depth': self.depth,
+                       'confidence': round(1 - math.exp(-self.depth), 4)},
+            'stages': [
+                {
+                    'stage': stage,
+                    'ngrams': self.totals[stage],
+                    'max_overcount': math.ceil(math.e / self.width * self.totals[stage]),
+                    'phrases': [{'phrase': phrase, 'count': count}
+                                for phrase, count in self.heavy[stage].top(top_k)],
+                }
+                for stage in stages
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        """Write the sketches and candidates to a ``.npz`` file."""
+        stages = list(self.sketches)
+        meta = {
+            'width': self.width, 'depth': self.depth, 'capacity': self.capacity,
+            'ngrams': list(self.ngrams), 'filters': self.filters, 'calls': self.calls, 'stages': stages,
+            'totals': [self.totals[stage] for stage in stages],
+            'candidates': [self.heavy[stage].counts for stage in stages],
+        }
+        tmp_path = f'{path}.tmp.npz'
+        np.savez_compressed(tmp_path, meta=np.frombuffer(jsonio.dumps(meta), dtype=np.uint8),
+                            **{f'table_{i}': self.sketches[stage].table for i, stage in enumerate(stages)})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'PhraseCounter':
+        """Read a counter written by ``save``."""
+        with np.load(path) as data:
+            meta = jsonio.loads(data['meta'].tobytes())
+            counter = cls(meta['width'], meta['depth'], meta['capacity'], tuple(meta['ngrams']),
+                          meta['filters'])
+            counter.calls = meta['calls']
+            for i, stage in enumerate(meta['stages']):
+                sketch, heavy = counter._stage(stage)
+                sketch.table = data[f'table_{i}'].astype(np.int64)
+                heavy.counts = dict(meta['candidates'][i])
+                counter.totals[stage] = meta['totals'][i]
+        return counter
+
+
+def describe_filters(filters: Dict[str, Any]) -> str:
+    """Filters as shown in messages, e.g. ``speaker=Tech, min_compliance=0.8``."""
+    described = ', '.join(f'{name}={value}' for name, value in filters.items() if value is not None)
+    return described or 'no filters'
+
+
+def compliance_ratio(call_json: Dict[str, Any]) -> Optional[float]:
+    """Share of the compliance checklist's points scored, or None without a checklist."""
+    checks = call_json.get('compliance_check') or []
+    max_total = sum(check.get('max', 5) for check in checks)
+    if not max_total:
+        return None
+    return sum(check.get('score', 0) for check in checks) / max_total
+
+
+def _count_batch(paths: Sequence[str], params: Dict[str, Any], speaker: Optional[str],
+                 min_compliance: Optional[float]) -> Tuple[PhraseCounter, int, List[str]]:
+    counter = PhraseCounter(**params)
+    skipped = 0
+    errors = []
+    for path in paths:
+        try:
+            call_json = jsonio.load_file(path)
+            if min_compliance is not None and (compliance_ratio(call_json) or 0.0) < min_compliance:
+                skipped += 1
+                continue
+            counter.add_call(call_json.get('utterances', []), speaker)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            errors.append(f"{path}: {type(e).__name__}: {e}")
+    return counter, skipped, errors
+
+
+def count_corpus(paths: Sequence[str], workers: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+                 speaker: Optional[str] = None, min_compliance: Optional[float] = None,
+                 counter: Optional[PhraseCounter] = None, **params) -> Dict[str, Any]:
+    """
+    Count phrases across many call files, in batches spread over a process pool.
+
+    Every batch is counted into its own PhraseCounter and merged into
+    ``counter`` as it completes.
+
+    Args:
+        paths: Call files with tagged utterances
+        workers: Worker processes; 0 uses one per CPU, 1 runs in-process
+        batch_size: Calls handed to a worker at a time
+        speaker: Only count utterances by this speaker
+        min_compliance: Skip calls whose compliance checklist scored below
+            this share of its points (e.g. 0.8)
+        counter: Counter to merge into, counted with the same filters; a
+            new one is made from ``params`` (PhraseCounter arguments) if
+            omitted
+
+    Returns:
+        The counter, counts of calls counted and skipped, errors and
+        throughput
+    """
+    filters = {'speaker': speaker, 'min_compliance': min_compliance}
+    counter = counter if counter is not None else PhraseCounter(filters=filters, **params)
+    params = {'width': counter.width, 'depth': counter.depth,
+              'capacity': counter.capacity, 'ngrams': counter.ngrams, 'filters': filters}
+    workers = workers or os.cpu_count() or 1
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    calls_before = counter.calls
+    skipped = 0
+    errors: List[str] = []
+    started = time.perf_counter()
+    if workers == 1:
+        results = (_count_batch(batch, params, speaker, min_compliance) for batch in batches)
+        for batch_counter, s, e in results:
+            counter.merge(batch_counter)
+            skipped += s
+            errors.extend(e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_count_batch, batch, params, speaker, min_compliance) for batch in batches]
+            for future in futures:
+                batch_counter, s, e = future.result()
+                counter.merge(batch_counter)
+                skipped += s
+                errors.extend(e)
+    elapsed = time.perf_counter() - started
+    counted = counter.calls - calls_before
+    return {
+        'counter': counter,
+        'calls': counted,
+        'skipped': skipped,
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'calls_per_minute': round(counted / elapsed * 60) if elapsed else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Count the most frequent phrases per stage across call files.")
+    parser.add_argument('paths', nargs='*', help="call files or directories")
+    parser.add_argument('-o', '--output', default=DEFAULT_REPORT, help="report JSON file (read by the web app)")
+    parser.add_argument('--state', metavar='FILE', help="also save the sketches (.npz) for later merges")
+    parser.add_argument('--merge', metavar='FILE', action='append', default=[],
+                        help="start from saved sketches (repeatable)")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help="phrases reported per stage")
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help="candidate phrases tracked per stage")
+    parser.add_argument('--ngrams', type=int, nargs=2, default=DEFAULT_NGRAMS, metavar=('MIN', 'MAX'),
+                        help="shortest and longest phrase in words")
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH)
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH)
+    parser.add_argument('--speaker', help="only count this speaker's utterances (e.g. Tech)")
+    parser.add_argument('--min-compliance', type=float, help="only count calls scoring at least this share")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes (default: one per CPU)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if not args.paths and not args.merge:
+        parser.error("give call files or directories, or --merge saved sketches")
+
+    filters = {'speaker': args.speaker, 'min_compliance': args.min_compliance}
+    counter = None
+    for path in args.merge:
+        loaded = PhraseCounter.load(path)
+        if loaded.filters != filters:
+            parser.error(f"{path} was counted with {describe_filters(loaded.filters)}, not "
+                         f"{describe_filters(filters)}; pass the same --speaker and --min-compliance")
+        if counter is None:
+            counter = loaded
+        else:
+            try:
+                counter.merge(loaded)
+            except ValueError as e:
+                parser.error(f"{path}: {e}")
+    if counter is None:
+        counter = PhraseCounter(args.width, args.depth, args.capacity, tuple(args.ngrams), filters)
+
+    files = [path for _, path in call_sources(args.paths)]
+    result = count_corpus(files, args.workers, args.batch_size, args.speaker, args.min_compliance, counter)
+    for error in result['errors']:
+        print(error, file=sys.stderr)
+
+    report = counter.report(args.top_k)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    jsonio.dump_file(args.output, report)
+    if args.state:
+        counter.save(args.state)
+    print(f"counted {result['calls']} calls ({result['skipped']} skipped) in {result['seconds']}s "
+          f"({result['calls_per_minute']} calls/min); {counter.calls} calls in total, "
+          f"report written to {args.output}")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
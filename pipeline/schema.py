@@ -0,0 +1,169 @@
+"""
+Call file schema versions and migration between them.
+
+Version 1 files (everything written before ``schema_version`` existed)
+store the words of a call three times: as the tagged ``utterances``, again
+as the merged ``segments`` and once more joined up in ``full_transcript``.
+Version 2 files store the utterances once and record the segment merge gap
+in ``segment_max_gap_s``; segments are derived from the utterances with the
+merge_adjacent rules and the transcript by joining the utterance texts.
+
+Migration is lossless by default: stored ``segments`` or ``full_transcript``
+that differ from the derived ones (hand-edited segments, the transcription
+service's own transcript text) stay in the version 2 file, and stored values
+always take precedence over derived ones. Only values that match what would
+be derived are dropped, unless ``--drop-mismatched`` is given.
+
+Usage:
+    python -m pipeline schema data/calls/ --dry-run
+    python -m pipeline schema data/calls/
+    python -m pipeline schema data/call.json --to 1
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List, Optional
+
+from . import jsonio
+from .sources import call_sources
+from .stages import DEFAULT_MAX_GAP_S, merge_adjacent
+
+SCHEMA_VERSION = 2
+DERIVED_FIELDS = ('segments', 'full_transcript')
+
+
+def schema_version(call_json: Dict[str, Any]) -> int:
+    """Schema version of a call document (1 if it doesn't say)."""
+    return call_json.get('schema_version', 1)
+
+
+def derive_segments(call_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Segments merged from the call's tagged utterances."""
+    max_gap_s = call_json.get('segment_max_gap_s', DEFAULT_MAX_GAP_S)
+    return merge_adjacent(call_json.get('utterances', []), max_gap_s=max_gap_s)
+
+
+def derive_full_transcript(call_json: Dict[str, Any]) -> str:
+    """Transcript text joined from the call's utterances."""
+    return ' '.join(u.get('text', '') for u in call_json.get('utterances', []))
+
+
+def call_segments(call_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Stored segments, or segments derived from the utterances."""
+    if 'segments' in call_json:
+        return call_json['segments']
+    return derive_segments(call_json)
+
+
+def call_full_transcript(call_json: Dict[str, Any]) -> str:
+    """Stored transcript text, or text joined from the utterances."""
+    if 'full_transcript' in call_json:
+        return call_json['full_transcript']
+    return derive_full_transcript(call_json)
+
+
+def to_v2(call_json: Dict[str, Any], max_gap_s: Optional[float] = None,
+          drop_mismatched: bool = False) -> Dict[str, Any]:
+    """
+    Version 2 copy of a call document.
+
+    Args:
+        call_json: Call data of either version
+        max_gap_s: Segment merge gap to record; defaults to the one already
+            recorded, else DEFAULT_MAX_GAP_S
+        drop_mismatched: Also drop stored segments/transcript that differ
+            from what would be derived (losing them); by default only
+            values that match the derived ones are dropped
+
+    Returns:
+        A new dict; ``call_json`` is not modified
+    """
+    if max_gap_s is None:
+        max_gap_s = call_json.get('segment_max_gap_s', DEFAULT_MAX_GAP_S)
+    converted = {'schema_version': SCHEMA_VERSION, 'segment_max_gap_s': max_gap_s}
+    converted.update((key, value) for key, value in call_json.items()
+                     if key not in DERIVED_FIELDS and key not in converted)
+    if not drop_mismatched:
+        derived = {'segments': derive_segments, 'full_transcript': derive_full_transcript}
+        for field in DERIVED_FIELDS:
+            if field in call_json and call_json[field] != derived[field](converted):
+                converted[field] = call_json[field]
+    return converted
+
+
+def to_v1(call_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Version 1 copy of a call document, with segments and transcript filled in."""
+    converted = {key: value for key, value in call_json.items()
+                 if key not in ('schema_version', 'segment_max_gap_s')}
+    converted['full_transcript'] = call_full_transcript(call_json)
+    converted['segments'] = call_segments(call_json)
+    return converted
+
+
+def migrate_file(path: str, version: int = SCHEMA_VERSION, drop_mismatched: bool = False,
+                 dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Convert one call file to ``version`` in place.
+
+    Returns:
+        ``path``, the versions before and after, the encoded sizes and
+        which stored fields differed from the derived ones (kept unless
+        ``drop_mismatched``)
+    """
+    call_json = jsonio.load_file(path)
+    before = schema_version(call_json)
+    converted = to_v2(call_json, drop_mismatched=drop_mismatched) if version >= 2 else to_v1(call_json)
+    mismatched = []
+    if 'segments' in call_json and call_json['segments'] != derive_segments(call_json):
+        mismatched.append('segments')
+    if 'full_transcript' in call_json and call_json['full_transcript'] != derive_full_transcript(call_json):
+        mismatched.append('full_transcript')
+    changed = converted != call_json
+    if changed and not dry_run:
+        jsonio.dump_file(path, converted)
+    return {
+        'path': path,
+        'from': before,
+        'to': schema_version(converted),
+        'bytes_before': len(jsonio.dumps(call_json)),
+        'bytes_after': len(jsonio.dumps(converted)),
+        'mismatched': mismatched,
+        'changed': changed,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert call files between schema versions.")
+    parser.add_argument('paths', nargs='+', help="call files or directories")
+    parser.add_argument('--to', type=int, choices=(1, 2), default=SCHEMA_VERSION, help="target schema version")
+    parser.add_argument('--drop-mismatched', action='store_true',
+                        help="also drop stored segments/transcript that differ from the derived ones "
+                             "(loses them)")
+    parser.add_argument('--dry-run', action='store_true', help="report without writing files")
+    args = parser.parse_args(argv)
+
+    before = after = converted = 0
+    errors = 0
+    for _, path in call_sources(args.paths):
+        try:
+            result = migrate_file(path, args.to, args.drop_mismatched, args.dry_run)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            errors += 1
+            continue
+        before += result['bytes_before']
+        after += result['bytes_after']
+        converted += result['changed']
+        note = ''
+        if result['mismatched'] and result['to'] >= 2:
+            kept = 'dropped' if args.drop_mismatched else 'kept'
+            note = f"  ({kept} stored {' and '.join(result['mismatched'])}: differ from derived)"
+        print(f"{path}: v{result['from']} -> v{result['to']}  "
+              f"{result['bytes_before']:,} -> {result['bytes_after']:,} bytes{note}")
+    action = "would convert" if args.dry_run else "converted"
+    print(f"{action} {converted} files; {before:,} -> {after:,} bytes (uncompressed JSON)")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
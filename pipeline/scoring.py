@@ -0,0 +1,270 @@
+"""
+Automated compliance scoring from utterance features.
+
+One pass over a call's tagged utterances collects, for every checklist
+stage, the features a reviewer would look at:
+
+    coverage    the stage happens at all (utterances tagged with it)
+    keywords    how many distinct stage keywords were said
+    time        seconds spent in the stage
+    share       the technician's share of talk time in the stage
+
+Each feature is scaled to 0–1 against the stage's ``ScoringProfile`` and
+the weighted sum is mapped to a whole-number score from 0 to ``max``.
+
+Scored entries are marked ``"auto_scored": true``; scores set by a reviewer
+(through the app's compliance API) are marked ``"manual": true``. Re-running
+the scorer keeps manual scores, including a deliberate 0, unless
+``overwrite`` is set.
+
+Usage:
+    python -m pipeline.scoring data/calls/ --workers 4
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+from . import jsonio
+from .sources import call_sources
+from .stages import COMPLIANCE_TEMPLATES, STAGE_RULES
+
+FEATURE_WEIGHTS = {'coverage': 0.25, 'keywords': 0.3, 'time': 0.25, 'share': 0.2}
+TECH_SPEAKER = 'Tech'
+DEFAULT_BATCH_SIZE = 200
+
+
+class ScoringProfile(NamedTuple):
+    target_seconds: float     # time in stage that earns the full time score
+    target_keywords: int      # distinct keywords that earn the full keyword score
+    tech_share: float         # ideal technician share of talk in the stage
+    keywords: Optional[List[str]] = None  # defaults to the evidence stage's STAGE_RULES
+
+
+SCORING_PROFILES = {
+    "Introduction": ScoringProfile(20, 2, 0.7),
+    "Problem Diagnosis": ScoringProfile(90, 3, 0.5),
+    "Solution Explanation": ScoringProfile(180, 5, 0.75),
+    "Upsell Attempts": ScoringProfile(45, 2, 0.75),
+    "Maintenance Plan Offer": ScoringProfile(30, 2, 0.8, [
+        r"\bmaintenance\b", r"\bservice plan\b", r"\bmembership\b", r"\btune-?up\b",
+        r"\bannual\b", r"\b(twice|two visits) a year\b",
+    ]),
+    "Closing & Thank You": ScoringProfile(30, 3, 0.6),
+}
+DEFAULT_PROFILE = ScoringProfile(60, 3, 0.6)
+
+
+class _Checklist(NamedTuple):
+    stage: str
+    evidence_stage: str
+    profile: ScoringProfile
+    patterns: List[Pattern]
+
+
+def compile_checklist(templates=COMPLIANCE_TEMPLATES, rules=STAGE_RULES,
+                      profiles: Optional[Dict[str, ScoringProfile]] = None) -> List[_Checklist]:
+    """Keyword patterns and scoring profile for every checklist stage."""
+    profiles = SCORING_PROFILES if profiles is None else profiles
+    rule_keywords = dict(rules)
+    checklist = []
+    for stage, evidence_stage, _max_score, _suggestion in templates:
+        profile = profiles.get(stage, DEFAULT_PROFILE)
+        keywords = profile.keywords or rule_keywords.get(evidence_stage, [])
+        checklist.append(_Checklist(stage, evidence_stage, profile, [re.compile(k, re.I) for k in keywords]))
+    return checklist
+
+
+def extract_features(utterances: Sequence[Dict[str, Any]], checklist: Sequence[_Checklist]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-stage features from tagged utterances, in a single pass.
+
+    Returns:
+        Features keyed by checklist stage: utterances, keywords (distinct
+        hits), seconds and tech_share
+    """
+    by_evidence: Dict[str, List[int]] = {}
+    for i, item in enumerate(checklist):
+        by_evidence.setdefault(item.evidence_stage, []).append(i)
+
+    n = len(checklist)
+    counts = [0] * n
+    seconds = [0.0] * n
+    tech_seconds = [0.0] * n
+    hits: List[set] = [set() for _ in range(n)]
+
+    for u in utterances:
+        indexes = by_evidence.get(u.get('stage'))
+        if not indexes:
+            continue
+        start, end = u.get('start'), u.get('end')
+        length = max(0.0, end - start) if isinstance(start, (int, float)) and isinstance(end, (int, float)) else 0.0
+        is_tech = u.get('speaker') == TECH_SPEAKER
+        text = u.get('text') or ''
+        for i in indexes:
+            counts[i] += 1
+            seconds[i] += length
+            if is_tech:
+                tech_seconds[i] += length
+            patterns = checklist[i].patterns
+            found = hits[i]
+            # One search per keyword not yet found, unlike stages.compile_rules,
+            # which only needs the first match: finditer over one alternation
+            # misses keywords whose matches overlap, and can't skip found ones.
+            if len(found) < len(patterns):
+                for k, pattern in enumerate(patterns):
+                    if k not in found and pattern.search(text):
+                        found.add(k)
+
+    return {
+        item.stage: {
+            'utterances': counts[i],
+            'keywords': len(hits[i]),
+            'seconds': round(seconds[i], 2),
+            'tech_share': round(tech_seconds[i] / seconds[i], 4) if seconds[i] else 0.0,
+        }
+        for i, item in enumerate(checklist)
+    }
+
+
+def score_from_features(features: Dict[str, Any], profile: ScoringProfile, max_score: float) -> int:
+    """Map one stage's features to a whole-number score between 0 and ``max_score``."""
+    if not features['utterances']:
+        return 0
+    parts = {
+        'coverage': 1.0,
+        'keywords': min(features['keywords'] / profile.target_keywords, 1.0) if profile.target_keywords else 1.0,
+        'time': min(features['seconds'] / profile.target_seconds, 1.0) if profile.target_seconds else 1.0,
+        'share': 1.0 - min(abs(features['tech_share'] - profile.tech_share) / 0.5, 1.0),
+    }
+    value = sum(FEATURE_WEIGHTS[name] * part for name, part in parts.items())
+    return int(min(max_score, max(0, round(value * max_score))))
+
+
+def is_manual(entry: Dict[str, Any]) -> bool:
+    """
+    True if a compliance entry was scored by hand.
+
+    Files from before the ``manual`` flag carry no marker; there a
+    non-zero score the scorer didn't set counts as manual.
+    """
+    return bool(entry.get('manual')) or (not entry.get('auto_scored') and bool(entry.get('score', 0)))
+
+
+def score_call(call_json: Dict[str, Any], checklist: Optional[Sequence[_Checklist]] = None,
+               overwrite: bool = False) -> int:
+    """
+    Score a call's compliance checklist in place.
+
+    Entries missing from ``compliance_check`` are not created; seed the
+    checklist first (see stages.compliance_seed).
+
+    Args:
+        call_json: Call data with tagged utterances and a compliance_check
+        checklist: Compiled checklist (compile_checklist()); compiled on
+            each call if omitted
+        overwrite: Also rescore entries that were scored by hand
+
+    Returns:
+        Number of entries whose score changed
+    """
+    checklist = checklist if checklist is not None else compile_checklist()
+    features = extract_features(call_json.get('utterances', []), checklist)
+    profiles = {item.stage: item.profile for item in checklist}
+    changed = 0
+    for entry in call_json.get('compliance_check', []):
+        stage = entry.get('stage')
+        if stage not in features:
+            continue
+        if not overwrite and is_manual(entry):
+            continue
+        score = score_from_features(features[stage], profiles[stage], entry.get('max', 5))
+        if entry.get('score') != score or not entry.get('auto_scored') or 'manual' in entry:
+            changed += 1
+        entry['score'] = score
+        entry['auto_scored'] = True
+        entry.pop('manual', None)
+    return changed
+
+
+def _score_batch(paths: Sequence[str], overwrite: bool, dry_run: bool) -> Tuple[int, int, List[str]]:
+    checklist = compile_checklist()
+    written = 0
+    errors = []
+    for path in paths:
+        try:
+            call_json = jsonio.load_file(path)
+            if score_call(call_json, checklist, overwrite) and not dry_run:
+                jsonio.dump_file(path, call_json)
+                written += 1
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            errors.append(f"{path}: {type(e).__name__}: {e}")
+    return len(paths), written, errors
+
+
+def score_corpus(paths: Sequence[str], workers: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+                 overwrite: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Score many call files, in batches spread over a process pool.
+
+    Args:
+        paths: Call files to score (rewritten in place)
+        workers: Worker processes; 0 uses one per CPU, 1 runs in-process
+        batch_size: Calls handed to a worker at a time
+        overwrite: Also rescore entries that were scored by hand
+        dry_run: Score but don't write files
+
+    Returns:
+        Counts of calls processed and files written, errors and throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    started = time.perf_counter()
+    processed = written = 0
+    errors: List[str] = []
+    if workers == 1:
+        results = (_score_batch(batch, overwrite, dry_run) for batch in batches)
+        for n, w, e in results:
+            processed, written = processed + n, written + w
+            errors.extend(e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_score_batch, batch, overwrite, dry_run) for batch in batches]
+            for future in futures:
+                n, w, e = future.result()
+                processed, written = processed + n, written + w
+                errors.extend(e)
+    elapsed = time.perf_counter() - started
+    return {
+        'calls': processed,
+        'written': written,
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'calls_per_minute': round(processed / elapsed * 60) if elapsed else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score compliance checklists of call files automatically.")
+    parser.add_argument('paths', nargs='+', help="call files or directories")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes (default: one per CPU)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--overwrite', action='store_true', help="also rescore entries scored by hand")
+    parser.add_argument('--dry-run', action='store_true', help="score without writing files")
+    args = parser.parse_args(argv)
+
+    files = [path for _, path in call_sources(args.paths)]
+    result = score_corpus(files, args.workers, args.batch_size, args.overwrite, args.dry_run)
+    for error in result['errors']:
+        print(error, file=sys.stderr)
+    print(f"scored {result['calls']} calls in {result['seconds']}s "
+          f"({result['calls_per_minute']} calls/min); wrote {result['written']} files")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Inverted search index over call utterances for the static site.
+
+The index is built at build time and shipped as its own JSON asset, so the
+browser never scans utterance text. Layout (all lists are parallel):
+
+    {
+      "version": 1,
+      "calls": [{"id": "call", "offset": 0, "count": 134}, ...],
+      "tokens": ["a", "ac", "afternoon", ...],          # sorted
+      "postings": [[0, 3, 1], ...],                      # delta-encoded ids
+      "prefixes": {"a": [0, 57], "af": [2, 4], ...}      # token ranges
+    }
+
+Utterance ids are global positions: a call's utterance ``i`` has id
+``offset + i``, which the page renders as ``data-utterance-id``. Tokens are
+sorted, so every token starting with a prefix sits in one contiguous range;
+``prefixes`` stores that range for prefixes up to ``PREFIX_TABLE_LENGTH``
+characters and longer prefixes are found by binary search inside it.
+
+Tokenization must match ``tokenize`` in static/js/app.js: NFC-normalized,
+lowercase, apostrophes dropped, runs of Unicode letters and digits (so
+"café" stays one token). Prefixes count code points, and tokens are sorted
+by UTF-16 code units, the order JavaScript compares strings in, so the
+page's binary search agrees with the index for any script.
+
+Usage:
+    python -m pipeline.search_index service_call_analyzer/media/call.json -o dist/search-index.json
+"""
+
+import argparse
+import bisect
+import re
+import sys
+import unicodedata
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from . import jsonio
+from .sources import call_sources
+
+INDEX_VERSION = 1
+PREFIX_TABLE_LENGTH = 3
+
+# Letters and digits: \w without the underscore
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_APOSTROPHES_RE = re.compile(r"['’]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a text."""
+    return _TOKEN_RE.findall(_APOSTROPHES_RE.sub('', unicodedata.normalize('NFC', text or '').lower()))
+
+
+def _utf16(token: str) -> bytes:
+    # Sort key matching JavaScript's string comparison
+    return token.encode('utf-16-be', 'surrogatepass')
+
+
+def _delta_encode(ids: Sequence[int]) -> List[int]:
+    previous = 0
+    encoded = []
+    for i in ids:
+        encoded.append(i - previous)
+        previous = i
+    return encoded
+
+
+def build_search_index(calls: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Build the inverted index for one or more calls.
+
+    Args:
+        calls: ``(call_id, call_json)`` pairs, in page order
+
+    Returns:
+        JSON-serializable index (see module docstring)
+    """
+    postings: Dict[str, List[int]] = {}
+    call_entries = []
+    next_id = 0
+    for call_id, call_json in calls:
+        utterances = call_json.get('utterances', [])
+        call_entries.append({'id': call_id, 'offset': next_id, 'count': len(utterances)})
+        for u in utterances:
+            for token in set(tokenize(u.get('text', ''))):
+                postings.setdefault(token, []).append(next_id)
+            next_id += 1
+
+    tokens = sorted(postings, key=_utf16)
+    prefixes: Dict[str, List[int]] = {}
+    for position, token in enumerate(tokens):
+        for length in range(1, min(len(token), PREFIX_TABLE_LENGTH) + 1):
+            prefix = token[:length]
+            if prefix in prefixes:
+                prefixes[prefix][1] = position + 1
+            else:
+                prefixes[prefix] = [position, position + 1]
+
+    return {
+        'version': INDEX_VERSION,
+        'calls': call_entries,
+        'tokens': tokens,
+        'postings': [_delta_encode(postings[token]) for token in tokens],
+        'prefixes': prefixes,
+    }
+
+
+def search(index: Dict[str, Any], query: str) -> List[int]:
+    """
+    Utterance ids matching every word of ``query`` as a prefix.
+
+    Reference implementation of the lookup done by app.js, used to check
+    built indexes.
+    """
+    tokens = index['tokens']
+    result = None
+    for word in tokenize(query):
+        lo, hi = index['prefixes'].get(word[:PREFIX_TABLE_LENGTH], (0, 0))
+        if len(word) > PREFIX_TABLE_LENGTH:
+            lo = bisect.bisect_left(tokens, _utf16(word), lo, hi, key=_utf16)
+            hi = bisect.bisect_left(tokens, _utf16(word + '\uffff'), lo, hi, key=_utf16)
+        ids = set()
+        for position in range(lo, hi):
+            current = 0
+            for delta in index['postings'][position]:
+                current += delta
+                ids.add(current)
+        result = ids if result is None else result & ids
+    return sorted(result or ())
+
+
+def write_search_index(file_path: str, calls: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Build the index and write it as compact JSON; returns the index."""
+    index = build_search_index(calls)
+    jsonio.write_bytes_atomic(file_path, jsonio.dumps(index))
+    return index
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the static site's search index for call files.")
+    parser.add_argument('paths', nargs='+', help="call files or directories, in page order")
+    parser.add_argument('-o', '--output', default='search-index.json', help="index file to write")
+    args = parser.parse_args(argv)
+
+    sources = call_sources(args.paths)
+    index = write_search_index(args.output, ((call_id, jsonio.load_file(path)) for call_id, path in sources))
+    print(f"indexed {sum(call['count'] for call in index['calls'])} utterances from {len(sources)} calls, "
+          f"{len(index['tokens'])} tokens")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Finding call files on disk.
+
+Command-line tools take call files and directories; ``call_sources`` turns
+them into ``(call_id, path)`` pairs, where the call id is the file name
+without its call file suffix (``.json``, ``.json.gz`` or ``.json.zst``).
+"""
+
+import os
+from typing import Iterable, List, Tuple
+
+from . import jsonio
+
+
+def call_sources(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """``(call_id, path)`` for call files, expanding directories."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if jsonio.is_call_file(name):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    sources = []
+    for path in found:
+        name = os.path.basename(path)
+        for suffix in sorted(jsonio.CALL_FILE_SUFFIXES, key=len, reverse=True):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        else:
+            name = os.path.splitext(name)[0]
+        sources.append((name, path))
+    return sources
@@ -0,0 +1,192 @@
+"""
+Keyword stage tagging, segment merging and compliance seeding.
+
+These are the A–D steps of the enrichment pass: every utterance is tagged
+with the first matching stage from ``STAGE_RULES``, neighbouring utterances
+of the same stage are merged into segments, a compliance checklist is
+seeded with short evidence pulled from those segments, and ``enrich_call``
+writes all of it into a call's JSON.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+# --- A) Keyword rules (order matters: earlier wins ties) ---
+STAGE_RULES = [
+    ("Introduction", [
+        r"\b(hello|hey|hi)\b", r"\bmy name is\b", r"\b(i'?m with|from)\b",
+        r"\bcompany\b", r"\bis now a good time\b"
+    ]),
+    ("Problem Diagnosis", [
+        r"\b(problem|issue|symptom|concern|leak|mold|noise|efficien\w*|hot|cold|not working|diagnos\w*)\b"
+    ]),
+    ("Solution Explanation", [
+        r"\b(option|solution|we can|recommend|install|replace|upgrade|like-?for-?like)\b",
+        r"\bheat pump\b", r"\bfurnace\b", r"\bcondenser\b", r"\bcoil\b", r"\bthermostat\b",
+        r"\bseer\b", r"\br[- ]?32\b", r"\br[- ]?410a\b", r"\binverter\b", r"\bduct\b",
+        r"\bpermit\b", r"\bhers\b", r"\brebate\b", r"\bwarranty\b"
+    ]),
+    ("Upsell Attempts", [
+        r"\bmaintenance\b", r"\bservice plan\b", r"\bmembership\b",
+        r"\bduct sealing\b", r"\bfilter\b", r"\bgrille\b", r"\buv\b", r"\bmerv\b"
+    ]),
+    ("Financing", [
+        r"\bfinanc\w*\b", r"\bmonthly payment\b", r"\bapr\b", r"\binterest\b",
+        r"\b12 months\b", r"\bno interest\b", r"\bterm\b"
+    ]),
+    ("Closing & Thank You", [
+        r"\bemail\b", r"\bfollow ?up\b", r"\bdecid(e|ing)\b", r"\b(spouse|wife|husband)\b",
+        r"\bdeposit\b", r"\bdown payment\b", r"\bcredit\b", r"\bcard\b", r"\bthank(s| you)\b"
+    ]),
+]
+
+
+def compile_rules(rules) -> List[Tuple[str, Pattern]]:
+    """
+    Compile each stage's keywords into one case-insensitive alternation.
+
+    A single ``search`` per stage matches exactly when any of its keywords
+    would, at about half the cost of trying them one by one.
+    """
+    return [(stage, re.compile("|".join(f"(?:{k})" for k in keys), re.I)) for stage, keys in rules]
+
+
+COMPILED_RULES = compile_rules(STAGE_RULES)
+
+DEFAULT_STAGE = "General"
+DEFAULT_MAX_GAP_S = 8.0
+
+# --- C) Compliance checklist templates: (stage, evidence stage, max, suggestion) ---
+COMPLIANCE_TEMPLATES = [
+    ("Introduction", "Introduction", 5,
+     "Open with name, company, role, purpose; confirm it’s a good time."),
+    ("Problem Diagnosis", "Problem Diagnosis", 5,
+     "Probe symptoms, duration, comfort by room, prior fixes, utility bills, constraints."),
+    ("Solution Explanation", "Solution Explanation", 5,
+     "Compare options, costs, rebates, permits/HERS, warranties, trade-offs, savings."),
+    ("Upsell Attempts", "Upsell Attempts", 5,
+     "Offer only need-based upsells; tie benefits to diagnosed issues."),
+    ("Maintenance Plan Offer", "Upsell Attempts", 5,
+     "Pitch plan explicitly—price, cadence, inclusions; link to warranty terms."),
+    ("Closing & Thank You", "Closing & Thank You", 5,
+     "Recap decisions, email quotes, schedule follow-up with all decision-makers, thank the customer."),
+]
+
+
+def tag_stage(text: str, compiled_rules: Sequence[Tuple[str, Pattern]] = COMPILED_RULES) -> str:
+    t = text or ""
+    for stage, pattern in compiled_rules:
+        if pattern.search(t):
+            return stage
+    return DEFAULT_STAGE
+
+
+def tag_utterances(utterances: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies of ``utterances`` with a ``stage`` key added to each."""
+    return [dict(u, stage=tag_stage(u.get("text", ""))) for u in utterances]
+
+
+def extend_segments(segments: List[Dict[str, Any]], seg: Dict[str, Any],
+                    max_gap_s: float = DEFAULT_MAX_GAP_S) -> Optional[Dict[str, Any]]:
+    """
+    Append one tagged utterance to a list of merged segments, in place.
+
+    The utterance is merged into the last segment if it has the same stage
+    and starts within ``max_gap_s`` of that segment's end; otherwise a copy
+    of it is appended as a new segment.
+
+    Returns:
+        The newly created segment, or None if the utterance was merged
+    """
+    if segments:
+        last = segments[-1]
+        same_stage = (seg["stage"] == last["stage"])
+        gap = (seg["start"] - last["end"]) if isinstance(seg["start"], (int, float)) and isinstance(last["end"], (int, float)) else 0
+        if same_stage and 0 <= gap <= max_gap_s:
+            last["end"] = seg["end"]
+            last["text"] = (last["text"] + " " + seg["text"]).strip()
+            return None
+    new_seg = dict(seg)
+    segments.append(new_seg)
+    return new_seg
+
+
+def merge_adjacent(segments, max_gap_s=DEFAULT_MAX_GAP_S):
+    """Merge neighbors if same stage and start/end are close in time."""
+    merged = []
+    for seg in segments:
+        extend_segments(merged, seg, max_gap_s)
+    return merged
+
+
+def format_evidence(picks: List[Dict[str, Any]]) -> str:
+    """Render segments as a short ``[ts] Speaker: “text”`` evidence string."""
+    out = []
+    for s in picks:
+        ts = ""
+        if isinstance(s["start"], (int, float)) and isinstance(s["end"], (int, float)):
+            ts = f"{s['start']:.0f}s–{s['end']:.0f}s"
+        text = s["text"].strip()
+        if len(text) > 160:
+            text = text[:157] + "..."
+        who = s["speaker"]
+        out.append(f"[{ts}] {who}: “{text}”")
+    return " | ".join(out) or "—"
+
+
+def short_evidence(segments, stage, limit=2):
+    """Evidence string from the first ``limit`` segments tagged ``stage``."""
+    picks = [s for s in segments if s["stage"] == stage][:limit]
+    return format_evidence(picks)
+
+
+def evidence_stages(templates=COMPLIANCE_TEMPLATES) -> List[str]:
+    """Stages the compliance templates pull evidence from, in template order."""
+    return list(dict.fromkeys(evidence_stage for _, evidence_stage, _, _ in templates))
+
+
+def evidence_by_stage(segments, stages: Iterable[str], limit=2) -> Dict[str, str]:
+    """Short evidence string for each of ``stages``."""
+    return {stage: short_evidence(segments, stage, limit) for stage in stages}
+
+
+def compliance_from_evidence(evidence: Dict[str, str], templates=COMPLIANCE_TEMPLATES) -> List[Dict[str, Any]]:
+    """Unscored compliance checklist from per-stage evidence strings."""
+    return [
+        {
+            "stage": stage, "score": 0, "max": max_score,
+            "evidence": evidence.get(evidence_stage, "—"),
+            "suggestion": suggestion,
+        }
+        for stage, evidence_stage, max_score, suggestion in templates
+    ]
+
+
+def compliance_seed(segments, templates=COMPLIANCE_TEMPLATES) -> List[Dict[str, Any]]:
+    """Unscored compliance checklist with evidence pulled from ``segments``."""
+    return compliance_from_evidence(evidence_by_stage(segments, evidence_stages(templates)), templates)
+
+
+def enrich_call(call_json: Dict[str, Any], max_gap_s: float = DEFAULT_MAX_GAP_S) -> Dict[str, Any]:
+    """
+    Tag a call's utterances and rebuild its segments, in place.
+
+    The compliance checklist is only seeded when it is empty, so manual
+    scoring is never overwritten.
+
+    Args:
+        call_json: Call data with an ``utterances`` list
+        max_gap_s: Segment merge gap passed to merge_adjacent
+
+    Returns:
+        The same ``call_json``
+    """
+    utterances = tag_utterances(call_json.get("utterances", []))
+    segments = merge_adjacent(utterances, max_gap_s=max_gap_s)
+    call_json["utterances"] = utterances
+    call_json["segments"] = segments
+    call_json["meta"] = {**call_json.get("meta", {}), "stages_auto_tagged": True}
+    if not call_json.get("compliance_check"):
+        call_json["compliance_check"] = compliance_seed(segments)
+    call_json.setdefault("sales_insights", [])
+    return call_json
@@ -0,0 +1,214 @@
+"""
+Multi-resolution stage timeline of a call for the call-flow view.
+
+The page draws a fixed number of bins (``bins`` per view) whatever the
+call length. Level ``z`` splits the call into ``bins * 2**z`` equal bins;
+a view zoomed in ``2**z`` times shows ``bins`` consecutive bins of level
+``z``. Levels stop once bins would be shorter than ``min_bin_s``; past
+that the page shows the utterances themselves.
+
+Each level is cut into tiles of ``bins`` bins, so level ``z`` has ``2**z``
+tiles and any view needs at most two of them. The page first fetches the
+index, which describes the levels but holds no bins:
+
+    {
+      "version": 2,
+      "start": 0.0, "end": 5431.2,          # seconds covered by the bins
+      "bins": 100,                           # bins per view and per tile
+      "stages": ["Introduction", ...],       # order of first appearance
+      "speakers": ["Tech", "Customer"],
+      "levels": [{"bin_s": 54.31, "tiles": 1}, {"bin_s": 27.16, "tiles": 2}, ...],
+      "tile_url": "{level}/{tile}/"          # relative to the index URL
+    }
+
+and then the tiles the current view covers, fetched as it zooms and pans:
+
+    {
+      "level": 1, "tile": 0,
+      "offset": 0,                           # index of the first bin in the level
+      "stage_s": [[12.4, 0, ...], ...],      # per bin: seconds per stage
+      "speaker_s": [[30.1, 8.2], ...]        # per bin: seconds per speaker
+    }
+
+Seconds are talk time, so overlapping speech counts once per utterance and
+silence counts nowhere: a bin's total divided by ``bin_s`` is how busy it is.
+A tile is computed from only the utterances that overlap it, so serving a
+view costs the same whatever the call length, bar the coarsest tiles.
+
+Usage (static files for a site without the Django API):
+    python -m pipeline.timeline service_call_analyzer/media/call.json -o dist/timeline
+"""
+
+import argparse
+import bisect
+import functools
+import math
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from . import jsonio
+from .stages import DEFAULT_STAGE
+
+TIMELINE_VERSION = 2
+DEFAULT_BINS = 100
+DEFAULT_MIN_BIN_S = 2.0
+MAX_LEVELS = 10
+# Computed tiles kept per timeline; a view needs two, zooming a few more.
+MAX_CACHED_TILES = 64
+TILE_URL = '{level}/{tile}/'
+STATIC_TILE_URL = '{level}/{tile}.json'
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compact(value: float) -> float:
+    # Tenths of a second, with whole numbers (mostly 0) written as ints.
+    value = round(value, 1)
+    return value if value % 1 else int(value)
+
+
+def _rounded(rows: List[List[float]]) -> List[List[float]]:
+    return [[_compact(value) for value in row] for row in rows]
+
+
+class Timeline:
+    """
+    Stage and speaker occupancy of one call, served one tile at a time.
+
+    Building it only sorts the utterances; tiles are computed on first
+    request and the most recent ``MAX_CACHED_TILES`` are kept.
+
+    Args:
+        utterances: Tagged utterances with start/end in seconds; ones
+            without numeric times are skipped
+        bins: Bins per view and per tile (the coarsest level is one tile)
+        min_bin_s: Shortest bin worth zooming in to
+    """
+
+    def __init__(self, utterances: Sequence[Dict[str, Any]], bins: int = DEFAULT_BINS,
+                 min_bin_s: float = DEFAULT_MIN_BIN_S):
+        timed = [u for u in utterances if _is_number(u.get('start')) and _is_number(u.get('end'))]
+        stages: Dict[str, int] = {}
+        speakers: Dict[str, int] = {}
+        for u in timed:
+            stages.setdefault(u.get('stage') or DEFAULT_STAGE, len(stages))
+            speakers.setdefault(u.get('speaker') or 'Unknown', len(speakers))
+        self.stages = list(stages)
+        self.speakers = list(speakers)
+        self.bins = bins
+
+        self.start = min(min((u['start'] for u in timed), default=0.0), 0.0)
+        self.end = max((u['end'] for u in timed), default=self.start)
+        self.duration = max(self.end - self.start, 0.0)
+        n_levels = 1
+        while n_levels < MAX_LEVELS and self.duration / (bins * 2 ** n_levels) >= min_bin_s:
+            n_levels += 1
+        self.n_levels = n_levels
+
+        # Utterances by start, with the latest end seen so far, so the ones
+        # overlapping a tile are found by bisection.
+        spoken = sorted((u for u in timed if u['end'] > u['start']), key=lambda u: u['start'])
+        self._starts = [u['start'] for u in spoken]
+        self._ends = [u['end'] for u in spoken]
+        self._stage = [stages[u.get('stage') or DEFAULT_STAGE] for u in spoken]
+        self._speaker = [speakers[u.get('speaker') or 'Unknown'] for u in spoken]
+        self._reach = []
+        reach = -math.inf
+        for end in self._ends:
+            reach = max(reach, end)
+            self._reach.append(reach)
+
+        self.tile = functools.lru_cache(maxsize=MAX_CACHED_TILES)(self._tile)
+
+    def bin_seconds(self, level: int) -> float:
+        return self.duration / (self.bins * 2 ** level)
+
+    def index(self, tile_url: str = TILE_URL) -> Dict[str, Any]:
+        """The timeline's layout, without bins (see the module docstring)."""
+        return {
+            'version': TIMELINE_VERSION,
+            'start': round(self.start, 3),
+            'end': round(self.end, 3),
+            'bins': self.bins,
+            'stages': self.stages,
+            'speakers': self.speakers,
+            'levels': [{'bin_s': round(self.bin_seconds(level), 3), 'tiles': 2 ** level}
+                       for level in range(self.n_levels)],
+            'tile_url': tile_url,
+        }
+
+    def tiles(self) -> Iterator[Tuple[int, int]]:
+        """Every (level, tile) pair, coarsest level first."""
+        for level in range(self.n_levels):
+            for tile in range(2 ** level):
+                yield level, tile
+
+    def _tile(self, level: int, tile: int) -> Dict[str, Any]:
+        if not (0 <= level < self.n_levels and 0 <= tile < 2 ** level):
+            raise IndexError(f"No tile {tile} at level {level}")
+        bins = self.bins
+        bin_s = self.bin_seconds(level)
+        stage_s = [[0.0] * len(self.stages) for _ in range(bins)]
+        speaker_s = [[0.0] * len(self.speakers) for _ in range(bins)]
+
+        if bin_s:
+            t0 = self.start + tile * bins * bin_s
+            t1 = t0 + bins * bin_s
+            first_u = bisect.bisect_right(self._reach, t0)
+            last_u = bisect.bisect_left(self._starts, t1)
+            for i in range(first_u, last_u):
+                lo = max(self._starts[i], t0) - t0
+                hi = min(self._ends[i], t1) - t0
+                if hi <= lo:
+                    continue
+                stage, speaker = self._stage[i], self._speaker[i]
+                first = min(int(lo / bin_s), bins - 1)
+                last = min(int(math.ceil(hi / bin_s)), bins)
+                for j in range(first, last):
+                    overlap = min(hi, (j + 1) * bin_s) - max(lo, j * bin_s)
+                    if overlap > 0:
+                        stage_s[j][stage] += overlap
+                        speaker_s[j][speaker] += overlap
+
+        return {
+            'level': level,
+            'tile': tile,
+            'offset': tile * bins,
+            'stage_s': _rounded(stage_s),
+            'speaker_s': _rounded(speaker_s),
+        }
+
+
+def write_timeline(directory: str, utterances: Sequence[Dict[str, Any]], **kwargs) -> Timeline:
+    """
+    Write a timeline as static files: ``index.json`` and one
+    ``<level>/<tile>.json`` per tile. Returns the timeline.
+    """
+    timeline = Timeline(utterances, **kwargs)
+    os.makedirs(directory, exist_ok=True)
+    jsonio.write_bytes_atomic(os.path.join(directory, 'index.json'),
+                              jsonio.dumps(timeline.index(STATIC_TILE_URL)))
+    for level, tile in timeline.tiles():
+        os.makedirs(os.path.join(directory, str(level)), exist_ok=True)
+        jsonio.write_bytes_atomic(os.path.join(directory, str(level), f'{tile}.json'),
+                                  jsonio.dumps(timeline.tile(level, tile)))
+    return timeline
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write a call's timeline index and tiles as static files.")
+    parser.add_argument('path', help="call file")
+    parser.add_argument('-o', '--output', default='timeline', help="directory for index.json and the tiles")
+    args = parser.parse_args(argv)
+
+    call_json = jsonio.load_file(jsonio.resolve_call_file(args.path))
+    timeline = write_timeline(args.output, call_json.get('utterances', []))
+    print(f"wrote {2 ** timeline.n_levels - 1} tiles over {timeline.n_levels} levels to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
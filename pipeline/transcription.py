@@ -0,0 +1,154 @@
+"""
+AssemblyAI transcription helpers.
+
+``assemblyai`` and ``python-dotenv`` are imported only when a transcription
+is actually requested, so importing this module is cheap.
+"""
+
+import os
+import sys
+from typing import Any, Dict, Iterable, List
+
+from .words import WordStore
+
+# HVAC vocabulary to improve recognition
+HVAC_WORD_BOOST = [
+    "HERS", "SEER", "R-32", "R32", "R-410A", "R410A",
+    "heat pump", "furnace", "condenser", "coil",
+    "thermostat", "Daikin", "Bryant", "Bosch",
+    "duct sealing", "MERV", "Energy Star",
+    "Silicon Valley Clean Energy", "SVCE", "TECH Clean California",
+    "inverter", "line set", "whip", "grille"
+]
+
+
+def configure_api_key() -> None:
+    """
+    Load ``.env`` and set the AssemblyAI API key.
+
+    Raises:
+        RuntimeError: If ASSEMBLYAI_API_KEY is not set
+    """
+    import assemblyai as aai
+    from dotenv import load_dotenv
+
+    load_dotenv()  # loads .env if present
+    api_key = os.getenv("ASSEMBLYAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("Set ASSEMBLYAI_API_KEY in your environment.")
+    aai.settings.api_key = api_key
+
+
+def make_config(**overrides: Any):
+    """
+    Transcription config tuned for two-party HVAC calls.
+
+    Notes:
+    - speaker_labels=True to get diarization (utterances array)
+    - speakers_expected=2 to help diarizer converge
+    - disfluencies=False (set True if you want "um/uh" to coach)
+    - for true stereo recordings (tech on L, customer on R) pass
+      ``dual_channel=True``
+    - pass ``redact_pii=True`` (and ``redact_pii_policies``) if the audio
+      might contain payment details
+
+    Args:
+        **overrides: Extra ``assemblyai.TranscriptionConfig`` arguments
+
+    Returns:
+        ``assemblyai.TranscriptionConfig``
+    """
+    import assemblyai as aai
+
+    options = dict(
+        speech_model=aai.SpeechModel.universal,  # good general model
+        speaker_labels=True,
+        speakers_expected=2,       # we have Tech + Customer
+        punctuate=True,
+        format_text=True,
+        disfluencies=False,
+        word_boost=HVAC_WORD_BOOST,
+        sentiment_analysis=False,  # set True if you want per-utterance sentiment
+        auto_chapters=False,       # set True to get rough sections
+        entity_detection=False,    # set True to extract brands/components
+    )
+    options.update(overrides)
+    return aai.TranscriptionConfig(**options)
+
+
+def transcribe(audio_file: str, config=None, chunk_ms: int = 0, backend=None):
+    """
+    Transcribe a recording (blocking).
+
+    Args:
+        audio_file: Local path or URL
+        config: ``assemblyai.TranscriptionConfig``; defaults to make_config()
+        chunk_ms: If positive, split the recording into overlapping chunks of
+            this length that are transcribed concurrently (needs ffmpeg)
+        backend: Chunk backend (see pipeline.chunked, e.g. ``FakeBackend``)
+            to use instead of AssemblyAI; without ``chunk_ms`` the whole
+            recording is one chunk
+
+    Returns:
+        A completed AssemblyAI transcript, or a ``chunked.StitchedTranscript``
+
+    Raises:
+        RuntimeError: If the API key is missing or the transcription failed
+    """
+    if backend is not None:
+        from .chunked import transcribe_chunked
+
+        return transcribe_chunked(audio_file, backend, chunk_ms=chunk_ms if chunk_ms > 0 else sys.maxsize)
+    configure_api_key()
+    config = config or make_config()
+    if chunk_ms > 0:
+        from .chunked import AssemblyAIBackend, transcribe_chunked
+
+        transcript = transcribe_chunked(audio_file, AssemblyAIBackend(config), chunk_ms=chunk_ms)
+    else:
+        import assemblyai as aai
+
+        transcript = aai.Transcriber(config=config).transcribe(audio_file)
+    if transcript.status == "error":
+        raise RuntimeError(f"Transcription failed: {transcript.error}")
+    return transcript
+
+
+def map_speaker(label: str) -> str:
+    # AssemblyAI may label speakers as "A", "B", "SPK_0", "SPK_1", etc.
+    # For most 2-person calls, SPK_0/A will be the Tech. Adjust if needed.
+    if label in ("A", "SPK_0", "0"):
+        return "Tech"
+    if label in ("B", "SPK_1", "1"):
+        return "Customer"
+    return f"Speaker {label}"
+
+
+def utterance_records(utterances: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Convert transcript utterances (times in ms) to call.json utterances.
+
+    Args:
+        utterances: Objects with speaker, start, end and text attributes,
+            such as AssemblyAI utterances or ``chunked.Utterance``
+
+    Returns:
+        Utterance dicts with speaker names and times in seconds
+    """
+    return [
+        {
+            "speaker": map_speaker(u.speaker),
+            "start": round(u.start / 1000, 2) if u.start is not None else None,
+            "end": round(u.end / 1000, 2) if u.end is not None else None,
+            "text": u.text or "",
+        }
+        for u in utterances
+    ]
+
+
+def word_store_for(utterances: Iterable[Any]) -> WordStore:
+    """Word timings of transcript utterances, indexed by utterance order."""
+    word_store = WordStore()
+    for u in utterances:
+        word_store.add_utterance((w.text, w.start, w.end) for w in (u.words or []))
+    return word_store
@@ -0,0 +1,234 @@
+"""
+Compact columnar store for word-level timestamps.
+
+AssemblyAI returns a start/end time for every word. Storing those as a
+dict per word inside ``call.json`` would multiply its size, so words are
+kept in a sidecar file next to the call (``call.words.bin``) instead:
+
+    starts      integer milliseconds, delta-encoded against the previous word
+    durations   end - start in milliseconds
+    text        one shared UTF-8 buffer, sliced by per-word byte lengths
+    utterances  number of words in each utterance, in utterance order
+
+The columns are zlib-compressed; delta-encoded times compress to a couple of
+bytes per word. In memory, ``WordStore`` keeps absolute times in ``array``
+columns, so looking up the word at a point in time is a binary search.
+"""
+
+import bisect
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from .jsonio import write_bytes_atomic
+
+MAGIC = b'HVWD'
+VERSION = 1
+WORDS_SUFFIX = '.words.bin'
+
+# magic, version, reserved, n_words, n_utterances, text bytes
+HEADER = struct.Struct('<4sHHIIQ')
+
+
+class Word(NamedTuple):
+    index: int
+    text: str
+    start: int
+    end: int
+    utterance: int
+
+
+def words_path_for(call_path: str) -> str:
+    """Sidecar word store path for a call file (``call.json`` -> ``call.words.bin``)."""
+    for suffix in ('.json.gz', '.json.zst', '.json'):
+        if call_path.endswith(suffix):
+            return call_path[:-len(suffix)] + WORDS_SUFFIX
+    return call_path + WORDS_SUFFIX
+
+
+def _le_bytes(column: array) -> bytes:
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_le_bytes(typecode: str, data: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+class WordStore:
+    """
+    Word timings for one call, in columnar form.
+
+    Build one with ``add_utterance`` (in utterance order) or ``load``.
+    """
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.text_offsets = array('Q', [0])
+        self.utterance_offsets = array('I', [0])
+        self._text = bytearray()
+        self._sorted_starts: Optional[array] = None
+        self._order: Optional[array] = None
+        self._reach: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def utterance_count(self) -> int:
+        return len(self.utterance_offsets) - 1
+
+    def add_utterance(self, words: Iterable[Tuple[str, int, int]]) -> None:
+        """
+        Append the words of the next utterance.
+
+        Args:
+            words: ``(text, start_ms, end_ms)`` for each word, in order
+        """
+        for text, start, end in words:
+            encoded = (text or '').encode('utf-8')
+            self._text.extend(encoded)
+            self.text_offsets.append(len(self._text))
+            self.starts.append(int(start))
+            self.ends.append(int(end))
+        self.utterance_offsets.append(len(self.starts))
+        self._sorted_starts = None
+
+    def text(self, index: int) -> str:
+        """Text of one word."""
+        return self._text[self.text_offsets[index]:self.text_offsets[index + 1]].decode('utf-8')
+
+    def utterance_of(self, index: int) -> int:
+        """Index of the utterance a word belongs to."""
+        return bisect.bisect_right(self.utterance_offsets, index) - 1
+
+    def word(self, index: int) -> Word:
+        if not 0 <= index < len(self.starts):
+            raise IndexError('word index out of range')
+        return Word(index, self.text(index), self.starts[index], self.ends[index],
+                    self.utterance_of(index))
+
+    def words_for_utterance(self, utterance: int) -> List[Word]:
+        """All words of one utterance, in order."""
+        first = self.utterance_offsets[utterance]
+        last = self.utterance_offsets[utterance + 1]
+        return [Word(i, self.text(i), self.starts[i], self.ends[i], utterance)
+                for i in range(first, last)]
+
+    def _search_index(self) -> Tuple[array, Optional[array], array]:
+        if self._sorted_starts is None:
+            starts = self.starts
+            if all(a <= b for a, b in zip(starts, starts[1:])):
+                self._sorted_starts, self._order = starts, None
+                ends = self.ends
+            else:
+                # Diarized utterances can overlap; search a sorted view.
+                order = sorted(range(len(starts)), key=starts.__getitem__)
+                self._order = array('I', order)
+                self._sorted_starts = array('q', (starts[i] for i in order))
+                ends = [self.ends[i] for i in order]
+            # Latest end among the words up to each sorted position: a word
+            # that started earlier can still be running after later ones end.
+            self._reach = array('q', accumulate(ends, max))
+        return self._sorted_starts, self._order, self._reach
+
+    def index_at(self, t_ms: int) -> int:
+        """
+        Index of the last word starting at or before ``t_ms``, or -1.
+
+        Useful for seeking: the returned word is current or just finished.
+        """
+        sorted_starts, order, _ = self._search_index()
+        pos = bisect.bisect_right(sorted_starts, t_ms) - 1
+        if pos < 0:
+            return -1
+        return order[pos] if order is not None else pos
+
+    def word_at(self, t_ms: int) -> Optional[Word]:
+        """
+        Word being spoken at ``t_ms``, in O(log n) plus the number of
+        words overlapping it.
+
+        Returns:
+            The word whose ``[start, end)`` contains ``t_ms`` (the latest
+            starting one when overlapping utterances have several), or None
+            during silence
+        """
+        sorted_starts, order, reach = self._search_index()
+        pos = bisect.bisect_right(sorted_starts, t_ms) - 1
+        while pos >= 0 and reach[pos] > t_ms:
+            index = order[pos] if order is not None else pos
+            if t_ms < self.ends[index]:
+                return self.word(index)
+            pos -= 1
+        return None
+
+    def to_bytes(self) -> bytes:
+        """Encode the store in the compressed sidecar format."""
+        deltas = array('q', (b - a for a, b in zip([0] + list(self.starts[:-1]), self.starts)))
+        durations = array('q', (e - s for s, e in zip(self.starts, self.ends)))
+        lengths = array('I', (b - a for a, b in zip(self.text_offsets, self.text_offsets[1:])))
+        counts = array('I', (b - a for a, b in zip(self.utterance_offsets, self.utterance_offsets[1:])))
+        payload = b''.join((
+            _le_bytes(deltas), _le_bytes(durations), _le_bytes(lengths),
+            _le_bytes(counts), bytes(self._text),
+        ))
+        header = HEADER.pack(MAGIC, VERSION, 0, len(self.starts), len(counts), len(self._text))
+        return header + zlib.compress(payload, 9)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'WordStore':
+        """
+        Decode a store from the sidecar format.
+
+        Raises:
+            ValueError: If the data is not a supported word store
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("Not a word store")
+        magic, version, _reserved, n_words, n_utterances, n_text = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unsupported word store")
+        payload = zlib.decompress(data[HEADER.size:])
+
+        pos = 0
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal pos
+            size = array(typecode).itemsize * count
+            column = _from_le_bytes(typecode, payload[pos:pos + size])
+            pos += size
+            return column
+
+        deltas = take('q', n_words)
+        durations = take('q', n_words)
+        lengths = take('I', n_words)
+        counts = take('I', n_utterances)
+
+        store = cls()
+        store.starts = array('q', accumulate(deltas))
+        store.ends = array('q', (s + d for s, d in zip(store.starts, durations)))
+        store.text_offsets = array('Q', accumulate(lengths, initial=0))
+        store.utterance_offsets = array('I', accumulate(counts, initial=0))
+        store._text = bytearray(payload[pos:pos + n_text])
+        return store
+
+    def save(self, file_path: str) -> None:
+        """Atomically write the store to a sidecar file."""
+        write_bytes_atomic(file_path, self.to_bytes())
+
+    @classmethod
+    def load(cls, file_path: str) -> 'WordStore':
+        """Load a store from a sidecar file."""
+        with open(file_path, 'rb') as file:
+            return cls.from_bytes(file.read())
@@ -1,6 +1,22 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class CallAnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'call_analysis'
+
+    def ready(self):
+        if not settings.WARM_START:
+            return
+        from .warmup import warm_start
+
+        try:
+            warm_start()
+        except Exception:
+            # A failed warm start only costs the first request its speed.
+            logger.exception("Warm start failed; the first request will load everything")
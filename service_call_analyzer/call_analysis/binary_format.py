@@ -0,0 +1,345 @@
+"""
+Compact memory-mapped binary format for call data.
+
+A ``.hvcall`` file holds the same call as ``call.json`` in a layout that can
+be opened without parsing:
+
+    header      fixed-size struct (see ``HEADER``)
+    labels      UTF-8 JSON ``{"speakers": [...], "stages": [...]}``
+    document    UTF-8 JSON of everything except utterances, segments and
+                the full transcript (meta, compliance_check, ...)
+    utterances  fixed-width ``RECORD`` per utterance
+    segments    fixed-width ``RECORD`` per merged segment
+    text heap   UTF-8 text of every utterance, segment and the transcript
+
+``MappedCall`` memory-maps the file, so opening it only reads the header;
+labels and the document are decoded on first use and utterance text is
+decoded only when that utterance is accessed. Read-only mappings of the
+same file share physical pages across worker processes.
+"""
+
+import math
+import mmap
+import struct
+from collections.abc import Sequence
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pipeline import jsonio
+from pipeline.schema import schema_version
+
+MAGIC = b'HVCB'
+VERSION = 1
+BINARY_SUFFIX = '.hvcall'
+
+# magic, version, reserved, n_utterances, n_segments,
+# labels (offset, length), document (offset, length),
+# utterances offset, segments offset, heap (offset, length),
+# transcript (offset, length) within the heap
+HEADER = struct.Struct('<4sHHII' + 'Q' * 10)
+
+# start, end, text offset within the heap, text length, speaker, stage
+RECORD = struct.Struct('<ddQIHH')
+
+NO_LABEL = 0xFFFF
+
+
+class _Labels:
+    """Interns speaker/stage names into small integer ids."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def id_for(self, name: Optional[str]) -> int:
+        if name is None:
+            return NO_LABEL
+        if name not in self._ids:
+            if len(self.names) >= NO_LABEL:
+                raise ValueError("Too many distinct labels for binary call format")
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+        return self._ids[name]
+
+
+def _encode_time(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else math.nan
+
+
+def _decode_time(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def encode_call(json_data: Dict[str, Any]) -> bytes:
+    """
+    Encode call data into the binary format.
+
+    Only the speaker, start, end, text and stage fields of utterances and
+    segments are stored; any other per-utterance keys are dropped.
+
+    Args:
+        json_data: Call data as loaded from a call JSON file
+
+    Returns:
+        The encoded file contents
+    """
+    speakers = _Labels()
+    stages = _Labels()
+    heap = bytearray()
+
+    def add_text(text: str) -> Tuple[int, int]:
+        encoded = (text or '').encode('utf-8')
+        offset = len(heap)
+        heap.extend(encoded)
+        return offset, len(encoded)
+
+    def pack_records(rows: List[Dict[str, Any]]) -> bytes:
+        out = bytearray()
+        for row in rows:
+            text_off, text_len = add_text(row.get('text', ''))
+            out += RECORD.pack(
+                _encode_time(row.get('start')),
+                _encode_time(row.get('end')),
+                text_off,
+                text_len,
+                speakers.id_for(row.get('speaker', '')),
+                stages.id_for(row.get('stage')),
+            )
+        return bytes(out)
+
+    utterances = list(json_data.get('utterances', []))
+    segments = list(json_data.get('segments', []))
+    utterance_records = pack_records(utterances)
+    segment_records = pack_records(segments)
+    transcript_off, transcript_len = add_text(json_data.get('full_transcript', ''))
+
+    document = {
+        key: value for key, value in json_data.items()
+        if key not in ('utterances', 'segments', 'full_transcript')
+    }
+    labels_bytes = jsonio.dumps({'speakers': speakers.names, 'stages': stages.names})
+    document_bytes = jsonio.dumps(document)
+
+    labels_off = HEADER.size
+    document_off = labels_off + len(labels_bytes)
+    # Keep the record tables 8-byte aligned.
+    utterances_off = -(-(document_off + len(document_bytes)) // 8) * 8
+    padding = utterances_off - (document_off + len(document_bytes))
+    segments_off = utterances_off + len(utterance_records)
+    heap_off = segments_off + len(segment_records)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, len(utterances), len(segments),
+        labels_off, len(labels_bytes),
+        document_off, len(document_bytes),
+        utterances_off, segments_off,
+        heap_off, len(heap),
+        transcript_off, transcript_len,
+    )
+    return b''.join((
+        header, labels_bytes, document_bytes, b'\0' * padding,
+        utterance_records, segment_records, bytes(heap),
+    ))
+
+
+def write_binary_call(json_data: Dict[str, Any], file_path: str) -> None:
+    """
+    Atomically write call data to a binary call file.
+
+    Args:
+        json_data: Call data as loaded from a call JSON file
+        file_path: Destination ``.hvcall`` path
+    """
+    jsonio.write_bytes_atomic(file_path, encode_call(json_data))
+
+
+def binary_path_for(source_path: str) -> str:
+    """Binary file path next to a (possibly compressed) call JSON file."""
+    for suffix in reversed(jsonio.CALL_FILE_SUFFIXES):
+        if source_path.endswith(suffix):
+            return source_path[:-len(suffix)] + BINARY_SUFFIX
+    return source_path + BINARY_SUFFIX
+
+
+def convert_json_to_binary(source_path: str, dest_path: Optional[str] = None) -> str:
+    """
+    Convert a call JSON file to the binary format.
+
+    Args:
+        source_path: Call JSON file to read
+        dest_path: Output path; defaults to the source path with a
+            ``.hvcall`` suffix in place of ``.json`` or a compressed variant
+
+    Returns:
+        Path of the written binary file
+    """
+    if dest_path is None:
+        dest_path = binary_path_for(source_path)
+    write_binary_call(jsonio.load_file(source_path), dest_path)
+    return dest_path
+
+
+class RecordSequence(Sequence):
+    """
+    Lazy read-only sequence over a record table of a mapped call.
+
+    Items are built as utterance dicts on access; their text is decoded
+    from the mapped heap at that point.
+    """
+
+    def __init__(self, call: 'MappedCall', offset: int, count: int):
+        self._call = call
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('record index out of range')
+        return self._call._record_dict(self._offset + index * RECORD.size)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._count):
+            yield self._call._record_dict(self._offset + i * RECORD.size)
+
+    def text(self, index: int) -> str:
+        """Decode only the text of one record."""
+        return str(self.text_bytes(index), 'utf-8')
+
+    def text_bytes(self, index: int) -> memoryview:
+        """Zero-copy view of one record's UTF-8 text in the mapped file."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('record index out of range')
+        _, _, text_off, text_len, _, _ = RECORD.unpack_from(
+            self._call._view, self._offset + index * RECORD.size
+        )
+        start = self._call._heap_off + text_off
+        return self._call._view[start:start + text_len]
+
+    def iter_timing(self) -> Iterator[Tuple[Optional[float], Optional[float], str, Optional[str]]]:
+        """Yield ``(start, end, speaker, stage)`` without decoding any text."""
+        speakers, stages = self._call._speakers, self._call._stages
+        for start, end, _, _, speaker, stage in RECORD.iter_unpack(
+            self._call._view[self._offset:self._offset + self._count * RECORD.size]
+        ):
+            yield (
+                _decode_time(start), _decode_time(end),
+                speakers[speaker] if speaker != NO_LABEL else '',
+                stages[stage] if stage != NO_LABEL else None,
+            )
+
+
+class MappedCall:
+    """
+    Read-only, memory-mapped view of a binary call file.
+
+    Use as a context manager or call ``close`` when done; sequences and
+    text views obtained from it are invalid after closing.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Open and map a binary call file.
+
+        Args:
+            file_path: Path to a ``.hvcall`` file
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file is not a supported binary call file
+        """
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError(f"Not a binary call file: {file_path}")
+        (magic, version, _reserved, n_utterances, n_segments,
+         self._labels_off, self._labels_len, self._document_off, self._document_len,
+         utterances_off, segments_off, self._heap_off, self._heap_len,
+         self._transcript_off, self._transcript_len) = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported binary call file: {file_path}")
+        self.utterances = RecordSequence(self, utterances_off, n_utterances)
+        self.segments = RecordSequence(self, segments_off, n_segments)
+
+    def close(self) -> None:
+        """
+        Release the mapping.
+
+        Raises:
+            BufferError: If views returned by ``text_bytes`` are still alive
+        """
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> 'MappedCall':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _json_section(self, offset: int, length: int) -> Any:
+        return jsonio.loads(bytes(self._view[offset:offset + length]))
+
+    @cached_property
+    def _label_table(self) -> Dict[str, List[str]]:
+        return self._json_section(self._labels_off, self._labels_len)
+
+    @property
+    def _speakers(self) -> List[str]:
+        return self._label_table['speakers']
+
+    @property
+    def _stages(self) -> List[str]:
+        return self._label_table['stages']
+
+    @cached_property
+    def document(self) -> Dict[str, Any]:
+        """Top-level call data other than utterances, segments and transcript."""
+        return self._json_section(self._document_off, self._document_len)
+
+    @property
+    def full_transcript(self) -> str:
+        start = self._heap_off + self._transcript_off
+        return str(self._view[start:start + self._transcript_len], 'utf-8')
+
+    def _record_dict(self, position: int) -> Dict[str, Any]:
+        start, end, text_off, text_len, speaker, stage = RECORD.unpack_from(self._view, position)
+        text_start = self._heap_off + text_off
+        record = {
+            'speaker': self._speakers[speaker] if speaker != NO_LABEL else '',
+            'start': _decode_time(start),
+            'end': _decode_time(end),
+            'text': str(self._view[text_start:text_start + text_len], 'utf-8'),
+        }
+        if stage != NO_LABEL:
+            record['stage'] = self._stages[stage]
+        return record
+
+    def to_json_data(self) -> Dict[str, Any]:
+        """
+        Call data in the same shape as a loaded call JSON file.
+
+        Utterances and segments are lazy sequences backed by the mapping.
+        """
+        json_data = dict(self.document)
+        json_data['utterances'] = self.utterances
+        # Schema v2 calls derive segments and the transcript when they are
+        # not stored; don't turn "not stored" into "stored empty".
+        derived = schema_version(json_data) >= 2
+        if len(self.segments) or not derived:
+            json_data['segments'] = self.segments
+        if self._transcript_len or not derived:
+            json_data['full_transcript'] = self.full_transcript
+        return json_data
@@ -1,8 +1,25 @@
-import json
 import os
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from collections import defaultdict
 
+from pipeline import jsonio
+from pipeline.schema import derive_full_transcript, derive_segments
+from pipeline.timeline import Timeline
+
+from .binary_format import MappedCall
+
+COMPLIANCE_FIELDS = ('score', 'max', 'evidence', 'suggestion')
+ANALYSIS_FIELDS = ('analysis', 'key_points', 'recommendations')
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_string_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
 
 class CallData:
     """
@@ -17,13 +34,47 @@ class CallData:
         Args:
             json_data: Dictionary containing call data from JSON file
         """
+        self.json_data = json_data
         self.meta = json_data.get('meta', {})
-        self.compliance_check = json_data.get('compliance_check', [])
+        self.compliance_check = json_data.setdefault('compliance_check', [])
         self.utterances = json_data.get('utterances', [])
-        self.segments = json_data.get('segments', [])
         self.sales_insights = json_data.get('sales_insights', [])
-        self.full_transcript = json_data.get('full_transcript', '')
+        # Schema v2 files don't store these; they are derived on first use.
+        self._segments: Optional[List[Dict[str, Any]]] = json_data.get('segments')
+        self._full_transcript: Optional[str] = json_data.get('full_transcript')
+
+        # Per-stage compliance views are built on first access and dropped
+        # individually when a stage is edited; summary totals are kept as
+        # running sums so edits never rescan the checklist.
+        self._compliance_by_stage: Dict[str, Dict[str, Any]] = {}
+        for check in self.compliance_check:
+            stage = check.get('stage')
+            if stage and stage not in self._compliance_by_stage:
+                self._compliance_by_stage[stage] = check
+        self._compliance_views: Dict[str, Dict[str, Any]] = {}
+        self._score_total = sum(check.get('score', 0) for check in self.compliance_check)
+        self._max_total = sum(check.get('max', 5) for check in self.compliance_check)
+        self._conversation_metrics: Optional[Dict[str, Any]] = None
+        self._utterances_by_stage: Optional[Dict[str, Tuple[Dict[str, Any], ...]]] = None
+        self._timeline: Optional[Timeline] = None
+        # Set by from_binary_file: the utterances hold only the fields the
+        # binary format keeps.
+        self._from_binary = False
         
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        """Merged stage segments, as stored or derived from the utterances."""
+        if self._segments is None:
+            self._segments = derive_segments(self.json_data)
+        return self._segments
+
+    @property
+    def full_transcript(self) -> str:
+        """Full transcript text, as stored or joined from the utterances."""
+        if self._full_transcript is None:
+            self._full_transcript = derive_full_transcript(self.json_data)
+        return self._full_transcript
+
     def get_stages(self) -> List[str]:
         """
         Extract unique stages from compliance check data.
@@ -31,12 +82,7 @@ class CallData:
         Returns:
             List of stage names in order
         """
-        stages = []
-        for check in self.compliance_check:
-            stage = check.get('stage')
-            if stage and stage not in stages:
-                stages.append(stage)
-        return stages
+        return list(self._compliance_by_stage)
     
     def get_utterances_by_stage(self, stage: str) -> List[Dict[str, Any]]:
         """
@@ -55,13 +101,18 @@ class CallData:
         # Sort by start time to ensure chronological order
         return sorted(stage_utterances, key=lambda x: x.get('start', 0))
     
-    def get_all_utterances_grouped_by_stage(self) -> Dict[str, List[Dict[str, Any]]]:
+    def get_all_utterances_grouped_by_stage(self) -> Dict[str, Tuple[Dict[str, Any], ...]]:
         """
         Group all utterances by their stage, with chronological ordering within each stage.
+
+        The grouping is built on first access and reused. Each call returns
+        a new dictionary of tuples, so callers can't change the cached one.
         
         Returns:
-            Dictionary with stage names as keys and chronologically sorted lists of utterances as values
+            Dictionary with stage names as keys and chronologically sorted tuples of utterances as values
         """
+        if self._utterances_by_stage is not None:
+            return dict(self._utterances_by_stage)
         grouped = defaultdict(list)
         for utterance in self.utterances:
             stage = utterance.get('stage', 'General')
@@ -71,7 +122,8 @@ class CallData:
         for stage in grouped:
             grouped[stage].sort(key=lambda x: x.get('start', 0))
         
-        return dict(grouped)
+        self._utterances_by_stage = {stage: tuple(items) for stage, items in grouped.items()}
+        return dict(self._utterances_by_stage)
     
     def get_compliance_data(self, stage: str) -> Optional[Dict[str, Any]]:
         """
@@ -83,15 +135,19 @@ class CallData:
         Returns:
             Dictionary containing score, evidence, and suggestions for the stage
         """
-        for check in self.compliance_check:
-            if check.get('stage') == stage:
-                return {
-                    'score': check.get('score', 0),
-                    'max_score': check.get('max', 5),
-                    'evidence': check.get('evidence', ''),
-                    'suggestion': check.get('suggestion', '')
-                }
-        return None
+        check = self._compliance_by_stage.get(stage)
+        if check is None:
+            return None
+        view = self._compliance_views.get(stage)
+        if view is None:
+            view = {
+                'score': check.get('score', 0),
+                'max_score': check.get('max', 5),
+                'evidence': check.get('evidence', ''),
+                'suggestion': check.get('suggestion', '')
+            }
+            self._compliance_views[stage] = view
+        return view
     
     def get_all_compliance_data(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -100,17 +156,10 @@ class CallData:
         Returns:
             Dictionary with stage names as keys and compliance data as values
         """
-        compliance_data = {}
-        for check in self.compliance_check:
-            stage = check.get('stage')
-            if stage:
-                compliance_data[stage] = {
-                    'score': check.get('score', 0),
-                    'max_score': check.get('max', 5),
-                    'evidence': check.get('evidence', ''),
-                    'suggestion': check.get('suggestion', '')
-                }
-        return compliance_data
+        return {
+            stage: self.get_compliance_data(stage)
+            for stage in self._compliance_by_stage
+        }
     
     def format_timestamp(self, seconds: float) -> str:
         """
@@ -135,12 +184,8 @@ class CallData:
         """
         total_utterances = len(self.utterances)
         stages = self.get_stages()
-        total_compliance_score = sum(
-            check.get('score', 0) for check in self.compliance_check
-        )
-        max_compliance_score = sum(
-            check.get('max', 5) for check in self.compliance_check
-        )
+        total_compliance_score = self._score_total
+        max_compliance_score = self._max_total
         
         return {
             'call_type': self.meta.get('call_type', 'Unknown'),
@@ -156,10 +201,120 @@ class CallData:
             )
         }
 
+    def get_conversation_metrics(self) -> Dict[str, Any]:
+        """
+        Talk time per speaker, silence gaps, overlaps, interruptions and
+        time per stage, computed from utterance timing on first access.
+
+        Returns:
+            Dictionary of metrics (see pipeline.metrics.BatchMetrics.call)
+        """
+        if self._conversation_metrics is None:
+            # NumPy is only imported once metrics are actually requested.
+            from pipeline.metrics import call_metrics
+            self._conversation_metrics = call_metrics(self.utterances)
+        return self._conversation_metrics
+
+    def get_timeline(self) -> Timeline:
+        """
+        Stage and speaker occupancy per time bin at several zoom levels,
+        served one tile at a time from utterance timing.
+
+        Returns:
+            Timeline of the call (see pipeline.timeline)
+        """
+        if self._timeline is None:
+            self._timeline = Timeline(self.utterances)
+        return self._timeline
+
+    def update_compliance(self, stage: str, changes: Dict[str, Any],
+                          replace: bool = False) -> Dict[str, Any]:
+        """
+        Update one stage's compliance entry in place.
+
+        Only the edited stage's cached view is invalidated; the summary
+        totals are adjusted by the score and max deltas.
+
+        Args:
+            stage: Stage name to update
+            changes: New values for any of score, max, evidence, suggestion
+            replace: Replace the whole entry (creating it if needed) instead
+                of patching an existing one
+
+        Returns:
+            Compliance data for the stage after the update
+
+        Raises:
+            KeyError: If patching a stage that has no compliance entry
+            ValueError: If the changes contain unknown or invalid fields
+        """
+        unknown = set(changes) - set(COMPLIANCE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown compliance fields: {', '.join(sorted(unknown))}")
+
+        check = self._compliance_by_stage.get(stage)
+        if check is None and not replace:
+            raise KeyError(stage)
+
+        current = {} if replace or check is None else check
+        updated = {
+            'stage': stage,
+            'score': changes.get('score', current.get('score', 0)),
+            'max': changes.get('max', current.get('max', 5)),
+            'evidence': changes.get('evidence', current.get('evidence', '')),
+            'suggestion': changes.get('suggestion', current.get('suggestion', '')),
+        }
+        if not _is_number(updated['max']) or updated['max'] <= 0:
+            raise ValueError("'max' must be a positive number")
+        if not _is_number(updated['score']) or not 0 <= updated['score'] <= updated['max']:
+            raise ValueError("'score' must be a number between 0 and max")
+        for field in ('evidence', 'suggestion'):
+            if not isinstance(updated[field], str):
+                raise ValueError(f"'{field}' must be a string")
+
+        if check is None:
+            check = {}
+            self.compliance_check.append(check)
+            self._compliance_by_stage[stage] = check
+        else:
+            self._score_total -= check.get('score', 0)
+            self._max_total -= check.get('max', 5)
+        if replace:
+            check.clear()
+        if 'score' in changes:
+            # A reviewer's score (even 0) is kept when the checklist is
+            # auto-scored again; see pipeline.scoring
+            check.pop('auto_scored', None)
+            check['manual'] = True
+        check.update(updated)
+        self._score_total += check['score']
+        self._max_total += check['max']
+        self._compliance_views.pop(stage, None)
+        return self.get_compliance_data(stage)
+
+    def save(self, file_path: str) -> None:
+        """
+        Atomically write the call data back to a JSON file.
+
+        Args:
+            file_path: Destination path
+        """
+        json_data = self.json_data
+        if self._from_binary and os.path.exists(file_path):
+            # Loaded from a binary call file, which keeps only the utterance
+            # fields the app reads: save the edited document over the
+            # original file's utterances, segments and transcript.
+            json_data = jsonio.load_file(file_path)
+            json_data.update((key, value) for key, value in self.json_data.items()
+                             if key not in ('utterances', 'segments', 'full_transcript'))
+        jsonio.dump_file(file_path, json_data)
+
     @classmethod
     def from_json_file(cls, file_path: str) -> 'CallData':
         """
         Create CallData instance from JSON file.
+
+        ``.json.gz`` and ``.json.zst`` files are decompressed transparently.
         
         Args:
             file_path: Path to JSON file containing call data
@@ -175,12 +330,41 @@ class CallData:
             raise FileNotFoundError(f"Call data file not found: {file_path}")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                json_data = json.load(file)
+            json_data = jsonio.load_file(file_path)
             return cls(json_data)
-        except json.JSONDecodeError as e:
+        except jsonio.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in file {file_path}: {e}")
 
+    @classmethod
+    def from_binary_file(cls, file_path: str) -> 'CallData':
+        """
+        Create CallData instance from a memory-mapped binary call file.
+
+        Utterances and segments are decoded into lists and the mapping is
+        closed before returning, so no file stays mapped per instance.
+        
+        Args:
+            file_path: Path to a ``.hvcall`` file (see binary_format)
+            
+        Returns:
+            CallData instance
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If file is not a supported binary call file
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Call data file not found: {file_path}")
+        
+        with MappedCall(file_path) as mapped:
+            json_data = mapped.to_json_data()
+            json_data['utterances'] = list(json_data['utterances'])
+            if 'segments' in json_data:
+                json_data['segments'] = list(json_data['segments'])
+        call_data = cls(json_data)
+        call_data._from_binary = True
+        return call_data
+
 
 class CustomAnalysis:
     """
@@ -210,9 +394,8 @@ class CustomAnalysis:
             return {'stages': {}}
         
         try:
-            with open(self.analysis_file_path, 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except (json.JSONDecodeError, IOError):
+            return jsonio.load_file(self.analysis_file_path)
+        except (jsonio.JSONDecodeError, IOError):
             # Return empty structure if file is invalid
             return {'stages': {}}
     
@@ -258,4 +441,126 @@ class CustomAnalysis:
             stage_data.get('analysis') or 
             stage_data.get('key_points') or 
             stage_data.get('recommendations')
-        )
\ No newline at end of file
+        )
+
+    def update_stage_analysis(self, stage: str, changes: Dict[str, Any],
+                              replace: bool = False) -> Dict[str, Any]:
+        """
+        Update custom analysis for one stage in place.
+
+        Args:
+            stage: Stage name to update
+            changes: New values for any of analysis, key_points, recommendations
+            replace: Replace the whole entry (creating it if needed) instead
+                of patching an existing one
+
+        Returns:
+            Custom analysis for the stage after the update
+
+        Raises:
+            KeyError: If patching a stage that has no analysis entry
+            ValueError: If the changes contain unknown or invalid fields
+        """
+        unknown = set(changes) - set(ANALYSIS_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown analysis fields: {', '.join(sorted(unknown))}")
+        if 'analysis' in changes and not isinstance(changes['analysis'], str):
+            raise ValueError("'analysis' must be a string")
+        for field in ('key_points', 'recommendations'):
+            if field in changes and not _is_string_list(changes[field]):
+                raise ValueError(f"'{field}' must be a list of strings")
+
+        stages_data = self.analysis_data.setdefault('stages', {})
+        if stage not in stages_data and not replace:
+            raise KeyError(stage)
+        if replace or stage not in stages_data:
+            stages_data[stage] = {'analysis': '', 'key_points': [], 'recommendations': []}
+        stages_data[stage].update(changes)
+        return stages_data[stage]
+
+    def save(self) -> None:
+        """Atomically write the analysis data back to its file."""
+        jsonio.dump_file(self.analysis_file_path, self.analysis_data)
+
+
+class DataFileCache:
+    """
+    Per-process cache of objects loaded from data files.
+
+    Entries are keyed by path and reloaded when the file's modification
+    time or size changes. Edits go through ``update`` so the in-memory
+    object is changed in place and written back without a reload.
+    """
+
+    def __init__(self, loader: Callable[[str], Any]):
+        """
+        Initialize the cache.
+
+        Args:
+            loader: Callable that builds the cached object from a file path
+        """
+        self.loader = loader
+        self._entries: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _signature(file_path: str) -> Tuple[int, int]:
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path: str) -> Any:
+        """
+        Get the cached object for a file, loading it if missing or stale.
+
+        Args:
+            file_path: Path to the data file
+
+        Returns:
+            The loaded object
+        """
+        file_path = os.fspath(file_path)
+        with self._lock:
+            try:
+                signature = self._signature(file_path)
+            except FileNotFoundError:
+                self._entries.pop(file_path, None)
+                return self.loader(file_path)
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+            obj = self.loader(file_path)
+            self._entries[file_path] = (signature, obj)
+            return obj
+
+    def update(self, file_path: str, mutate: Callable[[Any], Any],
+               save: Callable[[Any], None]) -> Any:
+        """
+        Apply an edit to the cached object and persist it.
+
+        Args:
+            file_path: Path to the data file
+            mutate: Callable applied to the cached object; it should
+                validate before changing anything. Its return value is
+                passed through
+            save: Callable that writes the object back to ``file_path``
+
+        Returns:
+            Whatever ``mutate`` returned
+        """
+        file_path = os.fspath(file_path)
+        with self._lock:
+            obj = self.get(file_path)
+            result = mutate(obj)
+            try:
+                save(obj)
+            except BaseException:
+                # Memory and disk disagree now; reload from disk next time.
+                self._entries.pop(file_path, None)
+                raise
+            self._entries[file_path] = (self._signature(file_path), obj)
+            return result
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
\ No newline at end of file
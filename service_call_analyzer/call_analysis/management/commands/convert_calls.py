@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from call_analysis.binary_format import binary_path_for, convert_json_to_binary
+from pipeline import jsonio
+
+
+class Command(BaseCommand):
+    help = 'Convert call JSON files to the memory-mapped binary call format.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help='Call JSON files (.json, .json.gz, .json.zst) or directories containing them')
+        parser.add_argument('--output-dir',
+                            help='Write .hvcall files here instead of next to the sources')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        sources = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                sources.extend(
+                    os.path.join(path, name) for name in sorted(os.listdir(path))
+                    if jsonio.is_call_file(name)
+                )
+            elif os.path.isfile(path):
+                sources.append(path)
+            else:
+                raise CommandError(f'No such file or directory: {path}')
+
+        for source in sources:
+            dest = None
+            if output_dir:
+                dest = os.path.join(output_dir, os.path.basename(binary_path_for(source)))
+            started = time.perf_counter()
+            try:
+                dest = convert_json_to_binary(source, dest)
+            except ValueError as e:
+                raise CommandError(f'Could not convert {source}: {e}')
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stdout.write(
+                f'{source} -> {dest} '
+                f'({os.path.getsize(source):,} -> {os.path.getsize(dest):,} bytes, {elapsed_ms:.1f} ms)'
+            )
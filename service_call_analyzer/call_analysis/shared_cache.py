@@ -0,0 +1,204 @@
+"""
+Cross-process cache of parsed calls.
+
+Every worker process used to parse ``call.json`` and keep its own copy of
+the call. ``SharedCallCache`` stores each parsed call once on local disk in
+the memory-mapped ``.hvcall`` format (see binary_format), together with its
+conversation metrics, and hands out ``CallData`` objects decoded from it.
+A worker that misses maps the file and decodes its records instead of
+parsing JSON; the mapping is closed once decoded, so each worker still
+holds its own decoded copy of the utterances.
+
+Entries are keyed by the source file's path, modification time and size;
+editing the source (for example through the compliance API) simply makes
+a new entry.
+
+Population is atomic: the first worker to miss takes an ``flock`` on the
+entry's lock stripe, parses the source and publishes the files with an
+atomic rename; workers that miss at the same time wait on the lock and map
+the result instead of parsing again. When the entries exceed ``max_bytes``
+the least recently used ones are deleted.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from pipeline import jsonio
+
+from .binary_format import BINARY_SUFFIX, write_binary_call
+from .data_processing import CallData
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: population is still atomic, just not deduplicated
+    fcntl = None
+
+METRICS_SUFFIX = '.metrics.json'
+LOCK_STRIPES = 64
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class _FileLock:
+    """Exclusive ``flock`` on a lock file; a no-op where flock is unavailable."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, 'a+b')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class SharedCallCache:
+    """
+    File-backed call cache shared by all worker processes on a machine.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Cache directory (created if needed); should be on a
+                local filesystem so flock and mmap behave
+            max_bytes: Total size of cached entries before the least
+                recently used ones are evicted
+        """
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self._lock_dir = os.path.join(self.directory, 'locks')
+        os.makedirs(self._lock_dir, exist_ok=True)
+
+    def _key(self, source_path: str) -> str:
+        stat = os.stat(source_path)
+        identity = f'{os.path.abspath(source_path)}\0{stat.st_mtime_ns}\0{stat.st_size}'
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + BINARY_SUFFIX, base + METRICS_SUFFIX
+
+    def _lock(self, name: str) -> _FileLock:
+        return _FileLock(os.path.join(self._lock_dir, f'{name}.lock'))
+
+    def load(self, source_path: str) -> CallData:
+        """
+        Call data for a source file, parsing it at most once per version.
+
+        Args:
+            source_path: Call JSON file (plain or compressed)
+
+        Returns:
+            CallData backed by the shared mapping, with conversation
+            metrics already filled in
+
+        Raises:
+            FileNotFoundError: If the source file doesn't exist
+            ValueError: If the source is not valid call JSON
+        """
+        source_path = os.fspath(source_path)
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"Call data file not found: {source_path}")
+        key = self._key(source_path)
+        binary_path, metrics_path = self._paths(key)
+        for attempt in range(2):
+            if not os.path.exists(binary_path):
+                with self._lock(f'entry-{int(key[:8], 16) % LOCK_STRIPES:02d}'):
+                    # Another worker may have populated it while we waited.
+                    if not os.path.exists(binary_path):
+                        self._populate(source_path, binary_path, metrics_path)
+                        self.evict(keep=binary_path)
+            try:
+                return self._open(binary_path, metrics_path)
+            except FileNotFoundError:
+                if attempt:
+                    raise  # evicted again straight away; the budget is too small
+
+    def _populate(self, source_path: str, binary_path: str, metrics_path: str) -> None:
+        call_data = CallData.from_json_file(source_path)
+        jsonio.write_bytes_atomic(metrics_path, jsonio.dumps(call_data.get_conversation_metrics()))
+        # The binary file is published last: its presence marks the entry complete.
+        write_binary_call(call_data.json_data, binary_path)
+
+    def _open(self, binary_path: str, metrics_path: str) -> CallData:
+        try:
+            os.utime(binary_path)  # recency for LRU eviction
+        except OSError:
+            pass
+        call_data = CallData.from_binary_file(binary_path)
+        try:
+            call_data._conversation_metrics = jsonio.load_file(metrics_path)
+        except (OSError, ValueError):
+            pass  # computed on first use instead
+        return call_data
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Cached entries with their total size and last use, least recent first."""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(BINARY_SUFFIX):
+                continue
+            binary_path, metrics_path = self._paths(name[:-len(BINARY_SUFFIX)])
+            try:
+                stat = os.stat(binary_path)
+            except FileNotFoundError:
+                continue
+            size = stat.st_size
+            try:
+                size += os.path.getsize(metrics_path)
+            except OSError:
+                pass
+            found.append({'path': binary_path, 'size': size, 'used': stat.st_mtime})
+        found.sort(key=lambda entry: entry['used'])
+        return found
+
+    def evict(self, max_bytes: Optional[int] = None, keep: Optional[str] = None) -> int:
+        """
+        Delete least recently used entries until the cache fits.
+
+        Args:
+            max_bytes: Size budget; defaults to the cache's ``max_bytes``
+            keep: Entry (``.hvcall`` path) that must survive, e.g. the one
+                just populated
+
+        Returns:
+            Number of entries deleted
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock('evict'):
+            entries = self.entries()
+            total = sum(entry['size'] for entry in entries)
+            deleted = 0
+            for entry in entries:
+                if total <= budget:
+                    break
+                binary_path = entry['path']
+                if binary_path == keep:
+                    continue
+                try:
+                    os.remove(binary_path)
+                except OSError:
+                    continue  # e.g. still mapped on Windows; try again next time
+                try:
+                    os.remove(binary_path[:-len(BINARY_SUFFIX)] + METRICS_SUFFIX)
+                except OSError:
+                    pass
+                total -= entry['size']
+                deleted += 1
+            return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(entry['size'] for entry in entries),
+            'max_bytes': self.max_bytes,
+        }
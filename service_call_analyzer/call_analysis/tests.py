@@ -1,3 +1,872 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import shutil
+import sqlite3
+import stat
+import string
+import tempfile
+import threading
+import time
+import unittest
 
-# Create your tests here.
+from django.conf import settings
+from django.test import Client, RequestFactory, SimpleTestCase
+from django.urls import reverse
+
+from call_analysis import views
+from call_analysis.binary_format import write_binary_call
+from call_analysis.data_processing import CallData
+from call_analysis.warmup import warm_start
+
+from pipeline import cli, jsonio, phrases, timeline as timeline_module
+from pipeline.chunked import (ChunkWord, FakeBackend, _map_speakers, plan_chunks, stitch,
+                              transcribe_chunked)
+from pipeline.dag import OutputStore, StageGraph
+from pipeline.export import PYARROW_AVAILABLE, export_calls, queue_sources
+from pipeline.jobqueue import STAGES, JobQueue, run_workers
+from pipeline.jobs import CallPipeline
+from pipeline.live import FileReplaySource, LiveCallState, run_live
+from pipeline.metrics import call_metrics
+from pipeline.schema import SCHEMA_VERSION, call_full_transcript, derive_full_transcript, derive_segments, to_v1, to_v2
+from pipeline.scoring import score_call
+from pipeline.search_index import build_search_index, search, tokenize
+from pipeline.sources import call_sources
+from pipeline.stages import STAGE_RULES, compile_rules, merge_adjacent, tag_stage, tag_utterances
+from pipeline.timeline import Timeline, write_timeline
+from pipeline.words import WordStore, words_path_for
+
+
+class JobQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, 'queue.sqlite3')
+
+    def test_long_job_keeps_its_lease(self):
+        queue = JobQueue(self.db_path)
+        queue.enqueue('call', {'audio': 'call.m4a'})
+        queue.close()
+        calls = []
+        lock = threading.Lock()
+
+        def transcribe(job):
+            with lock:
+                calls.append(job.call_id)
+            time.sleep(1.5)
+            return {}
+
+        handlers = {stage: lambda job: {} for stage in STAGES}
+        handlers['transcribe'] = transcribe
+        run_workers(self.db_path, handlers, workers=2, poll_s=0.05, until_idle=True, lease_s=0.5)
+        self.assertEqual(calls, ['call'])
+        queue = JobQueue(self.db_path)
+        self.addCleanup(queue.close)
+        self.assertEqual(list(queue.finished()), ['call'])
+
+    def test_pipeline_keeps_word_timings(self):
+        words = [ChunkWord(text, i * 400, i * 400 + 300, 'A' if i < 4 else 'B')
+                 for i, text in enumerate('hi this is sam from cool air thanks'.split())]
+        pipeline = CallPipeline(work_dir=os.path.join(self.tmp.name, 'work'),
+                                output_dir=os.path.join(self.tmp.name, 'calls'),
+                                backend=FakeBackend(words, jitter_ms=0))
+        queue = JobQueue(self.db_path)
+        queue.enqueue('call', {'audio': 'call.m4a'})
+        queue.close()
+        run_workers(self.db_path, pipeline.handlers(), workers=1, poll_s=0.05, until_idle=True)
+
+        path = os.path.join(self.tmp.name, 'calls', 'call.json')
+        call_json = jsonio.load_file(path)
+        self.assertEqual(call_json['meta']['word_timings'], 'call.words.bin')
+        self.assertEqual(call_full_transcript(call_json), ' '.join(w.text for w in words))
+        with open(words_path_for(path), 'rb') as built, \
+                open(os.path.join(self.tmp.name, 'work', 'call', 'transcript.words.bin'), 'rb') as work:
+            self.assertEqual(built.read(), work.read())
+
+    def test_read_only_queue(self):
+        JobQueue(self.db_path).close()
+        queue = JobQueue(self.db_path, read_only=True)
+        self.addCleanup(queue.close)
+        self.assertEqual(queue.stats()['depth'], 0)
+        with self.assertRaises(sqlite3.OperationalError):
+            queue.enqueue('call', {})
+
+    def test_status_view(self):
+        queue = JobQueue(self.db_path)
+        queue.enqueue('call', {})
+        queue.close()
+        url = reverse('call_analysis:pipeline_status')
+        with self.settings(PIPELINE_QUEUE_DB=self.db_path):
+            response = self.client.get(url, {'window': 60})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['depth'], 1)
+            for window in ('0', '-5', 'nan', 'soon'):
+                self.assertEqual(self.client.get(url, {'window': window}).status_code, 400, window)
+
+    def test_stale_worker_cannot_record_a_result(self):
+        queue = JobQueue(self.db_path, lease_s=0.1)
+        self.addCleanup(queue.close)
+        queue.enqueue('call', {})
+        stale = queue.claim('a')
+        time.sleep(0.2)
+        self.assertEqual(queue.recover(), 1)
+        current = queue.claim('b')
+
+        self.assertFalse(queue.heartbeat(stale))
+        self.assertFalse(queue.complete(stale, {'transcript': 'stale.json'}))
+        self.assertFalse(queue.fail(stale, 'stale'))
+        self.assertTrue(queue.complete(current, {'transcript': 'current.json'}))
+        tag = queue.claim('b', ('tag',))
+        self.assertEqual(tag.payload['transcript'], 'current.json')
+
+
+class WordStoreTests(SimpleTestCase):
+    def setUp(self):
+        # The third utterance overlaps both words of the first.
+        self.store = WordStore()
+        self.store.add_utterance([('hi', 0, 100), ('there', 120, 300)])
+        self.store.add_utterance([])
+        self.store.add_utterance([('yo', 50, 400), ('café', 410, 500)])
+
+    def test_word_at_with_overlapping_utterances(self):
+        cases = {0: 'hi', 60: 'yo', 110: 'yo', 200: 'there', 350: 'yo', 405: None, 450: 'café', 500: None}
+        for t, text in cases.items():
+            word = self.store.word_at(t)
+            self.assertEqual(word.text if word else None, text, t)
+        self.assertEqual(self.store.word_at(350).utterance, 2)
+
+    def test_index_at(self):
+        # The last word to start at or before t, whichever utterance it is in
+        self.assertEqual(self.store.index_at(-1), -1)
+        self.assertEqual(self.store.index_at(50), 2)
+        self.assertEqual(self.store.index_at(350), 1)
+        self.assertEqual(self.store.index_at(1000), 3)
+
+    def test_save_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = words_path_for(os.path.join(tmp, 'call.json'))
+            self.store.save(path)
+            loaded = WordStore.load(path)
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded.utterance_count, 3)
+        self.assertEqual([loaded.word(i) for i in range(4)], [self.store.word(i) for i in range(4)])
+        self.assertEqual(loaded.words_for_utterance(1), [])
+        self.assertEqual(loaded.word_at(350).text, 'yo')
+        with self.assertRaises(ValueError):
+            WordStore.from_bytes(b'not a word store at all')
+
+
+class CallMetricsTests(SimpleTestCase):
+    def test_no_utterances(self):
+        metrics = call_metrics([])
+        self.assertEqual(metrics['duration_s'], 0.0)
+        self.assertEqual(metrics['speakers'], [])
+        self.assertEqual(metrics['silence']['ratio'], 0.0)
+
+    def test_no_timed_utterances(self):
+        metrics = call_metrics([{'speaker': 'Tech', 'text': 'Hello', 'start': None, 'end': None}])
+        self.assertEqual(metrics['talk_s'], 0.0)
+        self.assertEqual(metrics['stages'], [])
+
+    def test_talk_ratio(self):
+        metrics = call_metrics([
+            {'speaker': 'Tech', 'text': 'Hi', 'start': 0.0, 'end': 3.0, 'stage': 'Introduction'},
+            {'speaker': 'Customer', 'text': 'Hello', 'start': 3.0, 'end': 4.0, 'stage': 'Introduction'},
+        ])
+        ratios = {s['speaker']: s['ratio'] for s in metrics['speakers']}
+        self.assertEqual(ratios, {'Tech': 0.75, 'Customer': 0.25})
+
+
+class WriteBytesAtomicTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'call.json')
+
+    def mode(self):
+        return stat.S_IMODE(os.stat(self.path).st_mode)
+
+    def test_keeps_existing_mode(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{}')
+        os.chmod(self.path, 0o644)
+        jsonio.write_bytes_atomic(self.path, b'{"a": 1}')
+        self.assertEqual(self.mode(), 0o644)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'{"a": 1}')
+
+    def test_new_file_gets_default_mode(self):
+        jsonio.write_bytes_atomic(self.path, b'{}')
+        self.assertEqual(self.mode(), jsonio.NEW_FILE_MODE)
+        self.assertEqual(os.listdir(self.tmp.name), ['call.json'])
+
+    def test_new_file_mode_matches_open(self):
+        with open(self.path, 'wb'):
+            pass
+        self.assertEqual(self.mode(), jsonio.NEW_FILE_MODE)
+
+
+class JsonioTests(SimpleTestCase):
+    DATA = {'text': 'café – ok', 'utterances': [{'start': 1.5, 'end': 2, 'speaker': None}]}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(jsonio.set_backend, jsonio.get_backend())
+
+    def round_trip(self, name):
+        path = os.path.join(self.tmp.name, name)
+        jsonio.dump_file(path, self.DATA)
+        self.assertEqual(jsonio.load_file(path), self.DATA)
+        return path
+
+    def test_backends_agree(self):
+        jsonio.set_backend('json')
+        self.assertEqual(jsonio.get_backend(), 'json')
+        encoded = jsonio.dumps(self.DATA)
+        self.assertEqual(jsonio.loads(encoded), self.DATA)
+        if jsonio.orjson is not None:
+            jsonio.set_backend('orjson')
+            self.assertEqual(jsonio.get_backend(), 'orjson')
+            self.assertEqual(jsonio.loads(encoded), self.DATA)
+            self.assertEqual(json.loads(jsonio.dumps(self.DATA)), self.DATA)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            jsonio.set_backend('simplejson')
+
+    def test_plain_round_trip(self):
+        jsonio.set_backend('json')
+        self.round_trip('call.json')
+
+    def test_gzip_round_trip(self):
+        path = self.round_trip('call.json.gz')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        self.assertEqual(jsonio.resolve_call_file(path[:-len('.gz')]), path)
+
+    @unittest.skipUnless(jsonio.ZSTD_AVAILABLE, "zstandard is not installed")
+    def test_zstd_round_trip(self):
+        path = self.round_trip('call.json.zst')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(4), b'\x28\xb5\x2f\xfd')
+        self.assertEqual(jsonio.resolve_call_file(path[:-len('.zst')]), path)
+
+
+class DataFilesMixin:
+    """Runs a test against copies of the sample call and custom analysis."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.call_path = os.path.join(self.tmp.name, 'call.json')
+        self.analysis_path = os.path.join(self.tmp.name, 'custom_analysis.json')
+        shutil.copy(os.path.join(settings.MEDIA_ROOT, 'call.json'), self.call_path)
+        shutil.copy(os.path.join(settings.STATICFILES_DIRS[0], 'custom_analysis.json'), self.analysis_path)
+        override = self.settings(MEDIA_ROOT=self.tmp.name, STATICFILES_DIRS=[self.tmp.name],
+                                 API_TOKENS=['secret-token'])
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def load(self, path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+class StageUpdateViewTests(DataFilesMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = Client(enforce_csrf_checks=True)
+        self.stage = self.load(self.call_path)['compliance_check'][0]['stage']
+
+    def send(self, method, url, body, token='secret-token'):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return getattr(self.client, method)(url, data=json.dumps(body), content_type='application/json',
+                                            headers=headers)
+
+    def compliance_url(self, stage=None):
+        return reverse('call_analysis:compliance_update', args=[stage or self.stage])
+
+    def test_requires_token(self):
+        before = self.load(self.call_path)
+        for token in (None, 'wrong-token'):
+            response = self.send('patch', self.compliance_url(), {'score': 1}, token=token)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        self.assertEqual(self.load(self.call_path), before)
+
+    def test_no_tokens_configured(self):
+        with self.settings(API_TOKENS=[]):
+            response = self.send('patch', self.compliance_url(), {'score': 1})
+        self.assertEqual(response.status_code, 401)
+
+    def test_patch_compliance(self):
+        response = self.send('patch', self.compliance_url(), {'score': 0, 'evidence': 'Reviewed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['compliance']['score'], 0)
+        check = self.load(self.call_path)['compliance_check'][0]
+        self.assertEqual((check['score'], check['evidence']), (0, 'Reviewed'))
+
+    def test_manual_zero_survives_rescoring(self):
+        self.assertEqual(self.send('patch', self.compliance_url(), {'score': 0}).status_code, 200)
+        call_json = self.load(self.call_path)
+        check = call_json['compliance_check'][0]
+        self.assertTrue(check['manual'])
+        score_call(call_json)
+        self.assertEqual(check['score'], 0)
+        self.assertNotIn('auto_scored', check)
+
+    def test_post_creates_compliance_entry(self):
+        response = self.send('post', self.compliance_url('Follow Up'), {'score': 2, 'max': 4})
+        self.assertEqual(response.status_code, 200)
+        stages = {c['stage']: c for c in self.load(self.call_path)['compliance_check']}
+        self.assertEqual((stages['Follow Up']['score'], stages['Follow Up']['max']), (2, 4))
+
+    def test_patch_errors(self):
+        cases = [
+            (self.compliance_url('No Such Stage'), {'score': 1}, 404),
+            (self.compliance_url(), {'score': 99}, 400),
+            (self.compliance_url(), {'colour': 'red'}, 400),
+            (self.compliance_url(), ['score'], 400),
+        ]
+        for url, body, status in cases:
+            self.assertEqual(self.send('patch', url, body).status_code, status)
+
+    def test_base_view_edits_nothing(self):
+        request = RequestFactory().patch('/', data='{"score": 1}', content_type='application/json',
+                                         headers={'Authorization': 'Bearer secret-token'})
+        response = views.StageUpdateView.as_view()(request, stage=self.stage)
+        self.assertEqual(response.status_code, 405)
+
+    def test_post_analysis(self):
+        url = reverse('call_analysis:analysis_update', args=[self.stage])
+        response = self.send('post', url, {'analysis': 'Short intro', 'key_points': ['Greeting']})
+        self.assertEqual(response.status_code, 200)
+        saved = self.load(self.analysis_path)['stages'][self.stage]
+        self.assertEqual(saved, {'analysis': 'Short intro', 'key_points': ['Greeting'],
+                                 'recommendations': []})
+
+
+class SearchIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.call_json = jsonio.load_file(os.path.join(settings.MEDIA_ROOT, 'call.json'))
+        self.extra = {'utterances': [{'text': 'Le café est prêt.'}, {'text': "It's 𝒳𝒴 naïve"}]}
+        self.index = build_search_index([('call', self.call_json), ('extra', self.extra)])
+        self.utterances = self.call_json['utterances'] + self.extra['utterances']
+
+    def scan(self, query):
+        words = tokenize(query)
+        return [i for i, u in enumerate(self.utterances)
+                if all(any(token.startswith(word) for token in tokenize(u['text'])) for word in words)]
+
+    def test_queries_match_a_scan(self):
+        for query in ('thermostat', 'the', 'refrig', 'a', 'ac unit', 'SYSTEM', 'zzz'):
+            self.assertEqual(search(self.index, query), self.scan(query), query)
+        self.assertEqual(search(self.index, 'ac unit'), [56])
+        self.assertEqual(search(self.index, 'thermo'), [26, 34, 42])
+
+    def test_unicode_words(self):
+        self.assertEqual(tokenize('Café, CAFE\u0301 it’s'), ['café', 'café', 'its'])
+        offset = len(self.call_json['utterances'])
+        self.assertEqual(search(self.index, 'café'), [offset])
+        self.assertEqual(search(self.index, 'naï'), [offset + 1])
+        self.assertEqual(search(self.index, '𝒳'), [offset + 1])
+        self.assertEqual(self.index['calls'][1], {'id': 'extra', 'offset': offset, 'count': 2})
+
+
+class StageGraphTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, 'call.json')
+        shutil.copy(os.path.join(settings.MEDIA_ROOT, 'call.json'), self.source)
+        self.store = OutputStore(os.path.join(tmp.name, 'dag.sqlite3'))
+        self.addCleanup(self.store.close)
+        self.texts = [u['text'] for u in jsonio.load_file(self.source)['utterances']]
+
+    def run_graph(self, rules=None):
+        return StageGraph(self.store, rules=rules).run('call', self.source).computed
+
+    def edit(self, stage, add=(), remove=()):
+        return [(name, [k for k in keys if k not in remove] + list(add)) if name == stage else (name, keys)
+                for name, keys in STAGE_RULES]
+
+    def assert_full_retag(self, rules):
+        compiled = compile_rules(rules)
+        self.assertEqual(self.store.value('call', 'tag'), [tag_stage(t, compiled) for t in self.texts])
+
+    def test_rerun_recomputes_nothing(self):
+        self.assertEqual(self.run_graph(), ['transcribe', 'tag', 'segment', 'evidence', 'summary'])
+        self.assertEqual(self.run_graph(), [])
+
+    def test_rule_matching_nothing_recomputes_only_tag(self):
+        self.run_graph()
+        rules = self.edit('Financing', add=[r"\bxyzzy\b"])
+        self.assertEqual(self.run_graph(rules), ['tag'])
+        self.assertEqual(self.run_graph(rules), [])
+
+    def test_removing_a_keyword_recomputes_downstream(self):
+        self.run_graph()
+        rules = self.edit('Introduction', remove=[r"\b(hello|hey|hi)\b"])
+        self.assertEqual(self.run_graph(rules), ['tag', 'segment', 'evidence', 'summary'])
+        self.assert_full_retag(rules)
+
+    def test_incremental_tags_match_full_retag(self):
+        self.run_graph()
+        edits = [
+            self.edit('Solution Explanation', remove=[r"\bthermostat\b", r"\bcoil\b"]),
+            self.edit('Financing', add=[r"\bthe\b"]),
+            self.edit('Introduction', add=[r"\bsystem\b"], remove=[r"\bcompany\b"]),
+            STAGE_RULES,
+        ]
+        for rules in edits:
+            self.assertIn('tag', self.run_graph(rules))
+            self.assert_full_retag(rules)
+
+
+class LiveCallTests(SimpleTestCase):
+    def test_partial_and_final_events(self):
+        state = LiveCallState(max_gap_s=5)
+        state.apply({'id': 0, 'speaker': 'Tech', 'start': 0.0, 'end': 1.0, 'text': 'Hi', 'final': False})
+        self.assertEqual(state.current_stage(), 'Introduction')
+        self.assertEqual(state.utterances, [])
+
+        state.apply({'id': 0, 'speaker': 'Tech', 'start': 0.0, 'end': 2.0, 'text': 'Hi, my name is Sam',
+                     'final': True})
+        state.apply({'id': 1, 'speaker': 'Tech', 'start': 3.0, 'end': 4.0, 'text': "I'm with Cool Air"})
+        self.assertEqual(state.pending, {})
+        self.assertEqual(len(state.segments), 1)
+        self.assertEqual(state.segments[0]['text'], "Hi, my name is Sam I'm with Cool Air")
+        self.assertEqual(state.segments[0]['end'], 4.0)
+
+        state.apply({'id': 2, 'speaker': 'Customer', 'start': 5.0, 'end': 9.0, 'text': 'The AC makes a noise'})
+        snapshot = state.snapshot()
+        self.assertEqual(snapshot['current_stage'], 'Problem Diagnosis')
+        self.assertEqual(snapshot['total_segments'], 2)
+        self.assertEqual(snapshot['coverage']['Introduction'], {'utterances': 2, 'seconds': 3.0})
+        compliance = {c['stage']: c for c in snapshot['compliance']}
+        self.assertEqual(compliance['Introduction']['estimate'], 3.8)
+        self.assertIn('Cool Air', compliance['Introduction']['evidence'])
+        self.assertEqual(compliance['Upsell Attempts']['estimate'], 0)
+
+    def test_replay_matches_batch_tagging(self):
+        call_json = jsonio.load_file(os.path.join(settings.MEDIA_ROOT, 'call.json'))
+        utterances = sorted(call_json['utterances'][:40], key=lambda u: u['start'])
+
+        async def collect(source):
+            return [event async for event in source]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'call.json')
+            jsonio.dump_file(path, {'utterances': list(reversed(utterances))})
+            events = asyncio.run(collect(FileReplaySource(path, speed=0, partial_words=3)))
+            state = asyncio.run(run_live(FileReplaySource(path, speed=0, partial_words=3)))
+
+        # Utterances replay in start order, each as growing partials ending in one final event
+        finals = [event for event in events if event['final']]
+        self.assertEqual([event['id'] for event in finals], list(range(len(utterances))))
+        self.assertEqual([event['text'] for event in finals], [' '.join(u['text'].split()) for u in utterances])
+        self.assertGreater(len(events), len(finals))
+        for previous, event in zip(events, events[1:]):
+            if event['id'] == previous['id']:
+                self.assertFalse(previous['final'])
+                self.assertTrue(event['text'].startswith(previous['text']))
+            else:
+                self.assertTrue(previous['final'])
+
+        expected = tag_utterances([dict(u, text=event['text']) for u, event in zip(utterances, finals)])
+        self.assertEqual(state.utterances, expected)
+        self.assertEqual(state.segments, merge_adjacent(expected, state.max_gap_s))
+        self.assertEqual(state.pending, {})
+
+
+class TimelineTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.utterances, t = [], 0.0
+        for i in range(600):
+            length = rng.uniform(1, 20)
+            self.utterances.append({'speaker': 'Tech' if i % 2 else 'Customer', 'start': t, 'end': t + length,
+                                    'stage': f'Stage {i // 100}', 'text': 'x'})
+            t += length + rng.uniform(-2, 5)
+        self.timeline = Timeline(self.utterances)
+
+    def level_rows(self, level):
+        return [row for tile in range(2 ** level) for row in self.timeline.tile(level, tile)['stage_s']]
+
+    def test_levels_agree(self):
+        talk = sum(u['end'] - u['start'] for u in self.utterances)
+        for level in range(self.timeline.n_levels):
+            rows = self.level_rows(level)
+            self.assertEqual(len(rows), 100 * 2 ** level)
+            self.assertAlmostEqual(sum(map(sum, rows)), talk, delta=0.05 * len(rows))
+        fine, coarse = self.level_rows(2), self.level_rows(1)
+        for i, row in enumerate(coarse):
+            for stage, seconds in enumerate(row):
+                self.assertAlmostEqual(fine[2 * i][stage] + fine[2 * i + 1][stage], seconds, delta=0.11)
+
+    def test_index_has_no_bins(self):
+        index = self.timeline.index()
+        self.assertEqual([level['tiles'] for level in index['levels']],
+                         [2 ** level for level in range(self.timeline.n_levels)])
+        self.assertNotIn('stage_s', jsonio.dumps(index).decode())
+        with self.assertRaises(IndexError):
+            self.timeline.tile(0, 1)
+
+    def test_write_timeline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            timeline = write_timeline(directory, self.utterances)
+            index = jsonio.load_file(os.path.join(directory, 'index.json'))
+            tile = index['tile_url'].format(level=1, tile=1)
+            self.assertEqual(jsonio.load_file(os.path.join(directory, tile)), timeline.tile(1, 1))
+            self.assertEqual(sum(len(files) for _, _, files in os.walk(directory)), 2 ** timeline.n_levels)
+
+    def test_main_writes_static_files(self):
+        source = os.path.join(settings.MEDIA_ROOT, 'call.json')
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(timeline_module.main([source, '-o', directory]), 0)
+            index = jsonio.load_file(os.path.join(directory, 'index.json'))
+            coarsest = jsonio.load_file(os.path.join(directory, '0', '0.json'))
+        expected = Timeline(jsonio.load_file(source)['utterances'])
+        self.assertEqual(index, expected.index(timeline_module.STATIC_TILE_URL))
+        self.assertEqual(coarsest, expected.tile(0, 0))
+
+
+class TimelineViewTests(DataFilesMixin, SimpleTestCase):
+    def test_index_and_tiles(self):
+        index = self.client.get(reverse('call_analysis:timeline')).json()
+        self.assertEqual(index['levels'][0]['tiles'], 1)
+        url = reverse('call_analysis:timeline') + index['tile_url'].format(level=0, tile=0)
+        self.assertEqual(url, reverse('call_analysis:timeline_tile', args=[0, 0]))
+        tile = self.client.get(url).json()
+        self.assertEqual(len(tile['stage_s']), index['bins'])
+        self.assertEqual(len(tile['speaker_s'][0]), len(index['speakers']))
+        for level, tile in [(len(index['levels']), 0), (0, 1)]:
+            response = self.client.get(reverse('call_analysis:timeline_tile', args=[level, tile]))
+            self.assertEqual(response.status_code, 404)
+
+    def test_corrupt_call_file(self):
+        with open(self.call_path, 'w', encoding='utf-8') as f:
+            f.write('{"utterances": [')
+        response = self.client.get(reverse('call_analysis:timeline'))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Error loading data', response.json()['error'])
+
+
+class PhrasesTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.calls = os.path.join(self.tmp.name, 'calls')
+        os.mkdir(self.calls)
+        shutil.copy(os.path.join(settings.MEDIA_ROOT, 'call.json'), self.calls)
+        self.state = os.path.join(self.tmp.name, 'phrases.npz')
+
+    def count(self, *args, report='phrases.json'):
+        output = os.path.join(self.tmp.name, report)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            code = phrases.main([self.calls, '-o', output, '--workers', '1', *args])
+        return code, jsonio.load_file(output)
+
+    def test_merge_keeps_filters(self):
+        code, report = self.count('--speaker', 'Tech', '--state', self.state)
+        self.assertEqual((code, report['filters']), (0, {'speaker': 'Tech', 'min_compliance': None}))
+        code, merged = self.count('--speaker', 'Tech', '--merge', self.state, report='merged.json')
+        self.assertEqual((code, merged['calls']), (0, 2 * report['calls']))
+        self.assertEqual(merged['filters'], report['filters'])
+
+    def test_refuses_to_merge_other_filters(self):
+        self.count('--speaker', 'Tech', '--state', self.state)
+        for args in [(), ('--speaker', 'Customer'), ('--speaker', 'Tech', '--min-compliance', '0.5')]:
+            with self.assertRaises(SystemExit) as raised:
+                self.count('--merge', self.state, *args, report='merged.json')
+            self.assertEqual(raised.exception.code, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'merged.json')))
+
+    def test_view_leaves_cached_report_alone(self):
+        path = os.path.join(self.tmp.name, 'report.json')
+        jsonio.dump_file(path, {'calls': 1, 'ngrams': [2, 4], 'filters': {}, 'stages': [
+            {'stage': 'Introduction', 'ngrams': 3, 'max_overcount': 1,
+             'phrases': [{'phrase': 'cool air', 'count': 3}]},
+            {'stage': 'Diagnosis', 'ngrams': 0, 'max_overcount': 0},
+        ]})
+        with self.settings(PHRASE_REPORT=path):
+            response = self.client.get(reverse('call_analysis:phrases'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([stage['top_count'] for stage in response.context['report']['stages']], [3, 0])
+        self.assertNotIn('top_count', views.phrase_report_cache.get(path)['stages'][0])
+
+
+class ExportTests(SimpleTestCase):
+    def test_skips_non_object_calls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = [('good', os.path.join(settings.MEDIA_ROOT, 'call.json'))]
+            for call_id, content in [('list', '[{"utterances": []}]'), ('broken', '{"utterances": [')]:
+                path = os.path.join(tmp, f'{call_id}.json')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                sources.append((call_id, path))
+            result = export_calls(sources, os.path.join(tmp, 'out'))
+            with open(result['files']['utterances'], newline='', encoding='utf-8') as f:
+                call_ids = {row['call_id'] for row in csv.DictReader(f)}
+        self.assertEqual(result['calls'], 1)
+        self.assertEqual(call_ids, {'good'})
+        self.assertEqual(len(result['errors']), 2)
+        self.assertIn('expected a JSON object, got list', result['errors'][0])
+
+    def test_call_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('b.json.zst', 'a.json', 'a.json.gz', 'notes.txt'):
+                open(os.path.join(tmp, name), 'w').close()
+            self.assertEqual([call_id for call_id, _ in call_sources([tmp])], ['a', 'a', 'b'])
+
+    def test_queue_sources_reads_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'queue.sqlite3')
+            with self.assertRaises(sqlite3.OperationalError):
+                list(queue_sources(db_path, tmp))
+            self.assertFalse(os.path.exists(db_path))
+
+            queue = JobQueue(db_path)
+            queue.enqueue('call', {})
+            queue.close()
+            run_workers(db_path, {stage: lambda job: {} for stage in STAGES}, workers=1, poll_s=0.05,
+                        until_idle=True)
+            self.assertEqual(list(queue_sources(db_path, tmp)), [('call', os.path.join(tmp, 'call.json'))])
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        source = os.path.join(settings.MEDIA_ROOT, 'call.json')
+        call_json = jsonio.load_file(source)
+        with tempfile.TemporaryDirectory() as tmp:
+            result = export_calls([('call', source)], tmp, fmt='parquet', chunk_rows=50)
+            utterances = pq.read_table(result['files']['utterances']).to_pylist()
+            compliance = pq.read_table(result['files']['compliance']).to_pylist()
+        self.assertEqual(len(utterances), len(call_json['utterances']))
+        self.assertEqual([row['text'] for row in utterances], [u['text'] for u in call_json['utterances']])
+        self.assertEqual([row['stage'] for row in compliance],
+                         [entry['stage'] for entry in call_json['compliance_check']])
+
+    @unittest.skipIf(PYARROW_AVAILABLE, "pyarrow is installed")
+    def test_parquet_needs_pyarrow(self):
+        with tempfile.TemporaryDirectory() as tmp, self.assertRaises(ImportError):
+            export_calls([], tmp, fmt='parquet')
+
+
+class ScoreCallTests(SimpleTestCase):
+    utterances = [
+        {'speaker': 'Tech', 'text': 'Hi, my name is Sam with Cool Air, thanks for having me.',
+         'start': 0.0, 'end': 20.0, 'stage': 'Introduction'},
+    ]
+
+    def score(self, entry, **kwargs):
+        call_json = {'utterances': self.utterances, 'compliance_check': [dict(entry, stage='Introduction')]}
+        score_call(call_json, **kwargs)
+        return call_json['compliance_check'][0]
+
+    def test_scores_unscored_and_auto_scored_entries(self):
+        unscored = self.score({'score': 0, 'max': 5})
+        self.assertTrue(unscored['auto_scored'])
+        self.assertGreater(unscored['score'], 0)
+        self.assertEqual(self.score({'score': 1, 'max': 5, 'auto_scored': True})['score'], unscored['score'])
+
+    def test_keeps_manual_scores(self):
+        self.assertEqual(self.score({'score': 0, 'max': 5, 'manual': True})['score'], 0)
+        # Hand-scored files from before the flag existed
+        self.assertEqual(self.score({'score': 1, 'max': 5})['score'], 1)
+
+    def test_overwrite(self):
+        entry = self.score({'score': 0, 'max': 5, 'manual': True}, overwrite=True)
+        self.assertTrue(entry['auto_scored'])
+        self.assertNotIn('manual', entry)
+
+
+class SharedCallCacheLoadingTests(DataFilesMixin, SimpleTestCase):
+    def test_uses_shared_cache_when_configured(self):
+        cache_dir = os.path.join(self.tmp.name, 'call_cache')
+        with self.settings(SHARED_CALL_CACHE_DIR=cache_dir):
+            call_data = views.load_call_data(self.call_path)
+        self.assertTrue(call_data.utterances)
+        self.assertTrue(any(name.endswith('.hvcall') for name in os.listdir(cache_dir)))
+
+    def test_unusable_cache_dir_falls_back(self):
+        # A directory can't be created under a regular file
+        with self.settings(SHARED_CALL_CACHE_DIR=os.path.join(self.call_path, 'call_cache')):
+            with self.assertLogs('call_analysis.views', 'WARNING'):
+                call_data = views.load_call_data(self.call_path)
+                response = self.client.get(reverse('call_analysis:main'))
+        self.assertTrue(call_data.utterances)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['has_data'])
+
+    def test_missing_call_file(self):
+        with self.assertRaises(FileNotFoundError):
+            views.load_call_data(os.path.join(self.tmp.name, 'missing.json'))
+
+
+class WarmStartTests(DataFilesMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        for cache, path in ((views.call_data_cache, self.call_path),
+                            (views.custom_analysis_cache, self.analysis_path)):
+            self.addCleanup(cache._entries.pop, path, None)
+
+    def test_fills_caches(self):
+        with self.assertLogs('call_analysis.warmup', 'INFO'):
+            timings = warm_start()
+        self.assertEqual(list(timings), ['import', 'load', 'compile', 'render'])
+        self.assertIn(self.call_path, views.call_data_cache._entries)
+        self.assertIn(self.analysis_path, views.custom_analysis_cache._entries)
+
+    def test_missing_call_file_is_logged(self):
+        os.remove(self.call_path)
+        with self.assertLogs('call_analysis.warmup', 'WARNING') as logs:
+            warm_start()
+        self.assertIn('could not load the call', logs.output[0])
+        self.assertNotIn(self.call_path, views.call_data_cache._entries)
+
+    def test_cached_grouping_cannot_be_changed_by_callers(self):
+        call_data = CallData.from_json_file(self.call_path)
+        grouped = call_data.get_all_utterances_grouped_by_stage()
+        stage = next(iter(grouped))
+        count = len(grouped[stage])
+        with self.assertRaises(AttributeError):
+            grouped[stage].append({'text': 'extra'})
+        grouped[stage] = ()
+        self.assertEqual(len(call_data.get_all_utterances_grouped_by_stage()[stage]), count)
+
+
+class BinaryCallTests(DataFilesMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original = self.load(self.call_path)
+        self.binary_path = os.path.join(self.tmp.name, 'call.hvcall')
+        write_binary_call(self.original, self.binary_path)
+
+    def test_round_trip(self):
+        call_data = CallData.from_binary_file(self.binary_path)
+        self.assertEqual(call_data.json_data, self.original)
+        self.assertIsInstance(call_data.utterances, list)
+
+    def test_save_keeps_source_utterance_fields(self):
+        self.original['utterances'][0]['confidence'] = 0.9
+        with open(self.call_path, 'w', encoding='utf-8') as f:
+            json.dump(self.original, f)
+        call_data = CallData.from_binary_file(self.binary_path)
+        stage = call_data.get_stages()[0]
+        call_data.update_compliance(stage, {'score': 1})
+        call_data.save(self.call_path)
+        saved = self.load(self.call_path)
+        self.assertEqual(saved['utterances'][0]['confidence'], 0.9)
+        self.assertEqual(saved['compliance_check'][0]['score'], 1)
+
+
+class SchemaMigrationTests(SimpleTestCase):
+    def setUp(self):
+        self.utterances = [
+            {'speaker': 'Tech', 'text': 'Hi there.', 'start': 0.0, 'end': 1.0, 'stage': 'Introduction'},
+            {'speaker': 'Customer', 'text': 'Hello.', 'start': 1.5, 'end': 2.0, 'stage': 'Introduction'},
+        ]
+        self.call = {'utterances': self.utterances, 'compliance_check': []}
+        self.call['segments'] = derive_segments(self.call)
+        self.call['full_transcript'] = 'Hi there, hello.'
+
+    def test_keeps_mismatched_fields_by_default(self):
+        converted = to_v2(self.call)
+        self.assertEqual(converted['schema_version'], 2)
+        self.assertNotIn('segments', converted)
+        self.assertEqual(converted['full_transcript'], 'Hi there, hello.')
+        self.assertEqual(to_v1(converted), self.call)
+
+    def test_drop_mismatched(self):
+        converted = to_v2(self.call, drop_mismatched=True)
+        self.assertNotIn('full_transcript', converted)
+        self.assertEqual(to_v1(converted)['full_transcript'], derive_full_transcript(self.call))
+
+
+class CliTests(SimpleTestCase):
+    def test_transcribe_writes_v2_call_and_word_timings(self):
+        backend = FakeBackend.from_call_data(jsonio.load_file(os.path.join(settings.MEDIA_ROOT, 'call.json')),
+                                             jitter_ms=0)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'calls', 'call.json')
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                code = cli.main(['transcribe', 'recording.m4a', '-o', output], backend=backend)
+            self.assertEqual(code, 0)
+            self.assertIn('Wrote', stdout.getvalue())
+            call_json = jsonio.load_file(output)
+            words = WordStore.load(words_path_for(output))
+
+        self.assertEqual(call_json['schema_version'], SCHEMA_VERSION)
+        self.assertNotIn('segments', call_json)
+        self.assertEqual(call_json['meta']['word_timings'], 'call.words.bin')
+        self.assertEqual(call_full_transcript(call_json), ' '.join(w.text for w in backend.words))
+        self.assertTrue(all(u['stage'] for u in call_json['utterances']))
+        self.assertEqual(len(words), len(backend.words))
+        self.assertEqual(words.utterance_count, len(call_json['utterances']))
+
+
+class ChunkedTranscriptionTests(SimpleTestCase):
+    def reference_words(self, minutes=12, silence=()):
+        """Two speakers taking turns, a word every 300 ms except in ``silence`` ((start, end) ms)."""
+        rng = random.Random(0)
+        words = []
+        t, speaker = 0, 'A'
+        while t < minutes * 60_000:
+            if any(lo <= t < hi for lo, hi in silence):
+                t += 300
+                continue
+            words.append(ChunkWord(f'w{len(words)}', t, t + 250, speaker))
+            if rng.random() < 0.05:
+                speaker = 'B' if speaker == 'A' else 'A'
+            t += 300
+        return words
+
+    def assert_matches(self, reference, stitched):
+        self.assertEqual([w.text for w in stitched], [w.text for w in reference])
+        pairs = {(r.speaker, s.speaker) for r, s in zip(reference, stitched)}
+        self.assertEqual(len(pairs), 2, f"speaker labels not consistent across chunks: {sorted(pairs)}")
+        self.assertEqual(len({s for _, s in pairs}), 2)
+
+    def test_plan_chunks(self):
+        self.assertEqual(plan_chunks(5_000, chunk_ms=10_000, overlap_ms=1_000), [(0, 5_000)])
+        self.assertEqual(plan_chunks(25_000, chunk_ms=10_000, overlap_ms=2_000),
+                         [(0, 10_000), (8_000, 18_000), (16_000, 25_000)])
+        with self.assertRaises(ValueError):
+            plan_chunks(25_000, chunk_ms=10_000, overlap_ms=10_000)
+
+    def test_stitch_matches_reference(self):
+        backend = FakeBackend(self.reference_words(), jitter_ms=80, seed=3)
+        transcript = transcribe_chunked('fake', backend, chunk_ms=120_000, overlap_ms=20_000)
+        self.assertEqual(len(transcript.chunks), 7)
+        self.assert_matches(backend.words, transcript.words)
+        self.assertEqual(transcript.text, ' '.join(w.text for w in backend.words))
+
+    def test_stitch_across_silent_overlap(self):
+        # Nobody speaks in the overlap of the first two chunks, so there is
+        # no word to splice at.
+        words = self.reference_words(minutes=4, silence=[(95_000, 125_000)])
+        backend = FakeBackend(words, jitter_ms=0, seed=1)
+        chunks = plan_chunks(backend.duration_ms('fake'), 120_000, 20_000)
+        results = [backend.transcribe('fake', start, end) for start, end in chunks]
+        self.assertEqual([w.text for w in stitch(chunks, results)], [w.text for w in words])
+
+    def test_map_speakers_matches_overlap_words(self):
+        running = [ChunkWord('hi', 0, 100, 'A'), ChunkWord('there', 200, 300, 'B')]
+        local = [ChunkWord('hi', 0, 100, 'B'), ChunkWord('there', 200, 300, 'A')]
+        self.assertEqual(_map_speakers(zip(running, local), ['A', 'B', 'C']),
+                         {'B': 'A', 'A': 'B', 'C': 'C'})
+
+    def test_map_speakers_beyond_26_labels(self):
+        labels = ['1'] + list(string.ascii_uppercase)
+        mapping = _map_speakers([(ChunkWord('hi', 0, 100, 'A'), ChunkWord('hi', 0, 100, '1'))], labels)
+        self.assertEqual(mapping['1'], 'A')
+        self.assertEqual(len(set(mapping.values())), len(labels))
+        self.assertEqual(mapping['Z'], 'AA')
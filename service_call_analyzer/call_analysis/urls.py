@@ -5,4 +5,10 @@ app_name = 'call_analysis'
 
 urlpatterns = [
     path('', views.MainAnalysisView.as_view(), name='main'),
-]
\ No newline at end of file
+    path('phrases/', views.PhrasesView.as_view(), name='phrases'),
+    path('api/compliance/<str:stage>/', views.ComplianceUpdateView.as_view(), name='compliance_update'),
+    path('api/analysis/<str:stage>/', views.CustomAnalysisUpdateView.as_view(), name='analysis_update'),
+    path('api/timeline/', views.TimelineView.as_view(), name='timeline'),
+    path('api/timeline/<int:level>/<int:tile>/', views.TimelineView.as_view(), name='timeline_tile'),
+    path('api/pipeline/status/', views.PipelineStatusView.as_view(), name='pipeline_status'),
+]
@@ -1,9 +1,61 @@
+import hmac
+import json
+import logging
+import math
 import os
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView
 from django.conf import settings
 from django.contrib import messages
-from .data_processing import CallData, CustomAnalysis
+from pipeline import jsonio
+from pipeline.jobqueue import JobQueue
+
+from .data_processing import CallData, CustomAnalysis, DataFileCache
+from .shared_cache import SharedCallCache
+
+
+logger = logging.getLogger(__name__)
+
+_shared_call_cache = None
+
+
+def load_call_data(file_path):
+    """
+    Load a call, through the shared call cache when SHARED_CALL_CACHE_DIR is set.
+
+    The cache is created on first use. If its directory can't be created
+    or written (a read-only deploy, for example), the call is parsed in
+    this process instead.
+    """
+    global _shared_call_cache
+    directory = settings.SHARED_CALL_CACHE_DIR
+    if directory:
+        try:
+            if _shared_call_cache is None or _shared_call_cache.directory != directory:
+                _shared_call_cache = SharedCallCache(directory, settings.SHARED_CALL_CACHE_MAX_BYTES)
+            return _shared_call_cache.load(file_path)
+        except OSError as e:
+            if os.path.exists(file_path):
+                logger.warning("Shared call cache unavailable, loading %s directly: %s", file_path, e)
+    return CallData.from_json_file(file_path)
+
+
+# Loaded files are kept per process and reloaded only when they change on disk.
+call_data_cache = DataFileCache(load_call_data)
+custom_analysis_cache = DataFileCache(CustomAnalysis)
+phrase_report_cache = DataFileCache(jsonio.load_file)
+
+
+def get_call_data_path():
+    return jsonio.resolve_call_file(os.path.join(settings.MEDIA_ROOT, 'call.json'))
+
+
+def get_custom_analysis_path():
+    return os.path.join(settings.STATICFILES_DIRS[0], 'custom_analysis.json')
 
 
 class MainAnalysisView(TemplateView):
@@ -14,12 +66,10 @@ class MainAnalysisView(TemplateView):
         
         try:
             # Load call data
-            call_data_path = os.path.join(settings.MEDIA_ROOT, 'call.json')
-            call_data = CallData.from_json_file(call_data_path)
+            call_data = call_data_cache.get(get_call_data_path())
             
             # Load custom analysis
-            custom_analysis_path = os.path.join(settings.STATICFILES_DIRS[0], 'custom_analysis.json')
-            custom_analysis = CustomAnalysis(custom_analysis_path)
+            custom_analysis = custom_analysis_cache.get(get_custom_analysis_path())
             
             # Get structured data
             stages = call_data.get_stages()
@@ -27,12 +77,14 @@ class MainAnalysisView(TemplateView):
             compliance_data = call_data.get_all_compliance_data()
             custom_analysis_data = custom_analysis.get_all_stage_analysis()
             call_summary = call_data.get_call_summary()
+            conversation_metrics = call_data.get_conversation_metrics()
             
             # Prepare context data
             context.update({
                 'title': 'Service Call Analysis',
                 'call_meta': call_data.meta,
                 'call_summary': call_summary,
+                'conversation_metrics': conversation_metrics,
                 'stages': stages,
                 'utterances_by_stage': utterances_by_stage,
                 'compliance_data': compliance_data,
@@ -55,3 +107,176 @@ class MainAnalysisView(TemplateView):
             })
         
         return context
+
+
+class PhrasesView(TemplateView):
+    """Most frequent phrases per stage across the corpus (see pipeline.phrases)."""
+    template_name = 'call_analysis/phrases.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Phrases by Stage'
+        try:
+            report = phrase_report_cache.get(settings.PHRASE_REPORT)
+        except FileNotFoundError:
+            context.update({
+                'error_message': f'Phrase report not found: {settings.PHRASE_REPORT}',
+                'has_data': False,
+            })
+            return context
+        except ValueError as e:
+            context.update({
+                'error_message': f'Error loading phrase report: {str(e)}',
+                'has_data': False,
+            })
+            return context
+
+        # Bars are scaled to the stage's most frequent phrase. The report is
+        # shared through the cache, so the counts go on copies.
+        stages = [
+            dict(stage, top_count=max((p['count'] for p in stage.get('phrases', [])), default=0))
+            for stage in report.get('stages', [])
+        ]
+        context.update({
+            'report': dict(report, stages=stages),
+            'has_data': True,
+        })
+        return context
+
+
+def has_api_token(request):
+    """True if the request carries one of ``settings.API_TOKENS`` as a bearer token."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    token = token.strip().encode()
+    return scheme.lower() == 'bearer' and bool(token) and any(
+        hmac.compare_digest(token, allowed.encode()) for allowed in settings.API_TOKENS
+    )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StageUpdateView(View):
+    """
+    Base view for editing one stage of a data file through JSON requests.
+
+    POST replaces (or creates) the stage's entry; PATCH updates only the
+    fields present in the request body.
+
+    Clients authenticate with ``Authorization: Bearer <token>``, where the
+    token is one of ``settings.API_TOKENS`` (the ``CALL_API_TOKENS``
+    environment variable); other requests get 401. Cookies play no part,
+    so CSRF protection doesn't apply and is turned off for these views.
+
+    Subclasses set ``apply_update(stage, changes, replace)``, which applies
+    the changes and returns the response body. The base view has no data
+    file to edit and answers 405 if it is ever routed.
+    """
+    http_method_names = ['post', 'patch']
+    apply_update = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() in self.http_method_names and not has_api_token(request):
+            response = JsonResponse({'error': 'A valid API token is required.'}, status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        return super().dispatch(request, *args, **kwargs)
+
+    def post(self, request, stage):
+        return self.handle_update(request, stage, replace=True)
+
+    def patch(self, request, stage):
+        return self.handle_update(request, stage, replace=False)
+
+    def handle_update(self, request, stage, replace):
+        if self.apply_update is None:
+            response = JsonResponse({'error': 'This endpoint does not edit any data.'}, status=405)
+            response['Allow'] = ''
+            return response
+        try:
+            changes = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': 'Request body must be valid JSON.'}, status=400)
+        if not isinstance(changes, dict):
+            return JsonResponse({'error': 'Request body must be a JSON object.'}, status=400)
+
+        try:
+            return JsonResponse(self.apply_update(stage, changes, replace))
+        except FileNotFoundError as e:
+            return JsonResponse({'error': f'Data file not found: {str(e)}'}, status=404)
+        except KeyError:
+            return JsonResponse({'error': f'No entry for stage: {stage}'}, status=404)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+
+class ComplianceUpdateView(StageUpdateView):
+    """Edit one stage's entry in the call's compliance_check."""
+
+    def apply_update(self, stage, changes, replace):
+        path = get_call_data_path()
+        compliance, call_summary = call_data_cache.update(
+            path,
+            lambda data: (data.update_compliance(stage, changes, replace=replace),
+                          data.get_call_summary()),
+            lambda data: data.save(path),
+        )
+        return {
+            'stage': stage,
+            'compliance': compliance,
+            'call_summary': call_summary,
+        }
+
+
+class CustomAnalysisUpdateView(StageUpdateView):
+    """Edit one stage's entry in the custom analysis file."""
+
+    def apply_update(self, stage, changes, replace):
+        path = get_custom_analysis_path()
+        analysis = custom_analysis_cache.update(
+            path,
+            lambda data: data.update_stage_analysis(stage, changes, replace=replace),
+            lambda data: data.save(),
+        )
+        return {'stage': stage, 'analysis': analysis}
+
+
+class TimelineView(View):
+    """
+    Multi-resolution stage timeline of the call, for the call-flow view.
+
+    Without arguments, returns the timeline's index (levels, stages,
+    speakers); with a level and tile, returns that tile's bins.
+    """
+
+    def get(self, request, level=None, tile=None):
+        try:
+            timeline = call_data_cache.get(get_call_data_path()).get_timeline()
+        except FileNotFoundError as e:
+            return JsonResponse({'error': f'Data file not found: {str(e)}'}, status=404)
+        except ValueError as e:
+            return JsonResponse({'error': f'Error loading data: {str(e)}'}, status=503)
+        if level is None:
+            return JsonResponse(timeline.index())
+        try:
+            return JsonResponse(timeline.tile(level, tile))
+        except IndexError as e:
+            return JsonResponse({'error': str(e)}, status=404)
+
+
+class PipelineStatusView(View):
+    """Queue depth and per-stage throughput of the processing pipeline."""
+
+    def get(self, request):
+        db_path = settings.PIPELINE_QUEUE_DB
+        if not os.path.exists(db_path):
+            return JsonResponse({'error': 'Pipeline queue not found'}, status=404)
+        try:
+            window_s = float(request.GET.get('window', 300))
+        except ValueError:
+            window_s = math.nan
+        if not math.isfinite(window_s) or window_s <= 0:
+            return JsonResponse({'error': 'window must be a positive number of seconds'}, status=400)
+        queue = JobQueue(db_path, read_only=True)
+        try:
+            return JsonResponse(queue.stats(window_s))
+        finally:
+            queue.close()
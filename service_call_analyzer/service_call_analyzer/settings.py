@@ -10,11 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The shared `pipeline` package lives at the repository root.
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -125,6 +132,27 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Bearer tokens accepted by the write API (api/compliance/, api/analysis/),
+# comma-separated. Clients send ``Authorization: Bearer <token>``; with no
+# tokens configured every write is rejected.
+API_TOKENS = [token.strip() for token in os.environ.get('CALL_API_TOKENS', '').split(',') if token.strip()]
+
+# Job queue database written by the pipeline workers (python -m pipeline.jobs)
+PIPELINE_QUEUE_DB = os.environ.get('PIPELINE_QUEUE_DB', str(REPO_DIR / 'data' / 'pipeline.sqlite3'))
+
+# Parsed calls shared by all worker processes (see call_analysis.shared_cache).
+# Off by default: set SHARED_CALL_CACHE_DIR to a writable local directory (for
+# example data/call_cache) to parse each call once for all workers
+SHARED_CALL_CACHE_DIR = os.environ.get('SHARED_CALL_CACHE_DIR', '')
+SHARED_CALL_CACHE_MAX_BYTES = int(os.environ.get('SHARED_CALL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Phrase frequency report written by ``python -m pipeline phrases``
+PHRASE_REPORT = os.environ.get('PHRASE_REPORT', str(REPO_DIR / 'data' / 'phrases.json'))
+
+# Load, index and render the call at startup so a new worker's first request
+# doesn't pay for it (see call_analysis.warmup); set WARM_START=1 to enable
+WARM_START = os.environ.get('WARM_START', '').lower() in ('1', 'true', 'yes')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
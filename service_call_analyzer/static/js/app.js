@@ -34,6 +34,10 @@ function renderApp() {
     if (typeof initializeAnalysisSync === 'function') {
         initializeAnalysisSync();
     }
+    if (typeof initializeTimeline === 'function') {
+        initializeTimeline();
+    }
+    initializeSearch();
 }
 
 function processCallData(data) {
@@ -47,14 +51,15 @@ function processCallData(data) {
     }
     
     // Group utterances by stage
+    // (utteranceId is the position in the call, as used by the search index)
     const utterancesByStage = {};
-    for (const utterance of data.utterances || []) {
+    (data.utterances || []).forEach((utterance, index) => {
         const stage = utterance.stage || 'General';
         if (!utterancesByStage[stage]) {
             utterancesByStage[stage] = [];
         }
-        utterancesByStage[stage].push(utterance);
-    }
+        utterancesByStage[stage].push({ ...utterance, utteranceId: index });
+    });
     
     // Sort utterances within each stage chronologically
     for (const stage in utterancesByStage) {
@@ -174,6 +179,15 @@ function generateMainHTML(processedData, customAnalysis) {
                 </div>
             </div>
 
+            <!-- Call Timeline -->
+            <div class="row mb-4">
+                <div class="col-12">
+                    <div class="call-timeline" id="call-timeline" data-url="${window.TIMELINE_URL || ''}">
+                        <h5><i class="bi bi-distribute-horizontal me-2"></i>Call Timeline</h5>
+                    </div>
+                </div>
+            </div>
+
             <!-- Stage Navigation Bar -->
             <div class="row mb-4">
                 <div class="col-12">
@@ -186,6 +200,12 @@ function generateMainHTML(processedData, customAnalysis) {
                                 </a>
                             `).join('')}
                         </nav>
+                        <div class="transcript-search">
+                            <i class="bi bi-search"></i>
+                            <input type="search" id="transcript-search" class="form-control form-control-sm"
+                                   placeholder="Search the transcript..." autocomplete="off">
+                            <span class="search-count" id="search-count"></span>
+                        </div>
                     </div>
                 </div>
             </div>
@@ -217,7 +237,7 @@ function generateTranscriptSection(stage, stageNumber, utterances) {
             </h3>
             <div class="utterances-container">
                 ${utterances.length > 0 ? utterances.map(utterance => `
-                    <div class="utterance ${utterance.speaker.toLowerCase()}">
+                    <div class="utterance ${utterance.speaker.toLowerCase()}" data-utterance-id="${utterance.utteranceId}" data-start="${utterance.start}">
                         <div class="speaker-info">
                             <span class="speaker-name ${utterance.speaker.toLowerCase()}">
                                 <i class="bi bi-${utterance.speaker === 'Tech' ? 'person-gear' : 'person'} me-1"></i>
@@ -351,4 +371,212 @@ function generateNoDataCard() {
             <span>No analysis data available for this stage.</span>
         </div>
     `;
-}
\ No newline at end of file
+}
+
+/**
+ * Transcript search
+ *
+ * The build emits an inverted index (pipeline/search_index.py) that is only
+ * fetched the first time the search box gets focus. Each keystroke is then
+ * a lookup of the query's prefix range in the sorted token list, so typing
+ * never scans utterance text. Sites built without the index fall back to
+ * building the same index once from CALL_DATA.
+ */
+const SEARCH_MIN_LENGTH = 2;
+const PREFIX_TABLE_LENGTH = 3;
+
+const searchState = {
+    index: null,
+    loading: null,
+    postings: new Map(),
+    results: new Map(),
+    elements: null,
+    hits: [],
+    current: -1
+};
+
+function initializeSearch() {
+    const input = document.getElementById('transcript-search');
+    if (!input) {
+        return;
+    }
+    input.addEventListener('focus', loadSearchIndex, { once: true });
+    input.addEventListener('input', () => {
+        loadSearchIndex().then(() => showSearchResults(searchUtterances(input.value)));
+    });
+    input.addEventListener('keydown', event => {
+        if (event.key === 'Enter') {
+            event.preventDefault();
+            focusNextHit();
+        }
+    });
+}
+
+function tokenize(text) {
+    // Must match pipeline/search_index.py tokenize()
+    return (text || '').normalize('NFC').toLowerCase().replace(/['’]/g, '').match(/[\p{L}\p{N}]+/gu) || [];
+}
+
+function codePoints(token) {
+    // Prefix lengths count code points, as in pipeline/search_index.py
+    return Array.from(token);
+}
+
+function loadSearchIndex() {
+    if (!searchState.loading) {
+        const url = window.SEARCH_INDEX_URL || '/search-index.json';
+        searchState.loading = fetch(url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(() => buildSearchIndex(window.CALL_DATA ? [['call', window.CALL_DATA]] : []))
+            .then(index => {
+                searchState.index = index;
+                return index;
+            });
+    }
+    return searchState.loading;
+}
+
+function buildSearchIndex(calls) {
+    // Fallback with the same layout as pipeline/search_index.py
+    const postings = new Map();
+    const callEntries = [];
+    let nextId = 0;
+    for (const [callId, callData] of calls) {
+        const utterances = callData.utterances || [];
+        callEntries.push({ id: callId, offset: nextId, count: utterances.length });
+        for (const utterance of utterances) {
+            for (const token of new Set(tokenize(utterance.text))) {
+                if (!postings.has(token)) {
+                    postings.set(token, []);
+                }
+                postings.get(token).push(nextId);
+            }
+            nextId += 1;
+        }
+    }
+    const tokens = [...postings.keys()].sort();
+    const prefixes = {};
+    tokens.forEach((token, position) => {
+        const chars = codePoints(token);
+        for (let length = 1; length <= Math.min(chars.length, PREFIX_TABLE_LENGTH); length++) {
+            const prefix = chars.slice(0, length).join('');
+            if (prefixes[prefix]) {
+                prefixes[prefix][1] = position + 1;
+            } else {
+                prefixes[prefix] = [position, position + 1];
+            }
+        }
+    });
+    return {
+        version: 1,
+        calls: callEntries,
+        tokens,
+        postings: tokens.map(token => postings.get(token).map((id, i, ids) => id - (i ? ids[i - 1] : 0))),
+        prefixes
+    };
+}
+
+function postingsAt(position) {
+    // Postings are delta-encoded; decode each token's list once
+    let ids = searchState.postings.get(position);
+    if (!ids) {
+        let current = 0;
+        ids = searchState.index.postings[position].map(delta => (current += delta));
+        searchState.postings.set(position, ids);
+    }
+    return ids;
+}
+
+function lowerBound(tokens, value, lo, hi) {
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (tokens[mid] < value) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+function prefixRange(word) {
+    const { tokens, prefixes } = searchState.index;
+    const chars = codePoints(word);
+    let [lo, hi] = prefixes[chars.slice(0, PREFIX_TABLE_LENGTH).join('')] || [0, 0];
+    if (chars.length > PREFIX_TABLE_LENGTH) {
+        lo = lowerBound(tokens, word, lo, hi);
+        hi = lowerBound(tokens, word + '\uffff', lo, hi);
+    }
+    return [lo, hi];
+}
+
+function searchUtterances(query) {
+    // Utterance ids containing every word of the query as a prefix
+    const words = tokenize(query);
+    const key = words.join(' ');
+    if (!searchState.index || key.length < SEARCH_MIN_LENGTH) {
+        return null;
+    }
+    if (searchState.results.has(key)) {
+        return searchState.results.get(key);
+    }
+    let result = null;
+    for (const word of words) {
+        const [lo, hi] = prefixRange(word);
+        const ids = new Set();
+        for (let position = lo; position < hi; position++) {
+            for (const id of postingsAt(position)) {
+                if (!result || result.has(id)) {
+                    ids.add(id);
+                }
+            }
+        }
+        result = ids;
+        if (!result.size) {
+            break;
+        }
+    }
+    const hits = [...result].sort((a, b) => a - b);
+    searchState.results.set(key, hits);
+    return hits;
+}
+
+function showSearchResults(ids) {
+    if (!searchState.elements) {
+        searchState.elements = new Map();
+        document.querySelectorAll('[data-utterance-id]').forEach(element => {
+            searchState.elements.set(Number(element.dataset.utteranceId), element);
+        });
+    }
+    // Only the previous and new hits are touched, not every utterance
+    for (const element of searchState.hits) {
+        element.classList.remove('search-hit', 'search-current');
+    }
+    searchState.hits = (ids || []).map(id => searchState.elements.get(id)).filter(Boolean);
+    searchState.current = -1;
+    for (const element of searchState.hits) {
+        element.classList.add('search-hit');
+    }
+    const count = document.getElementById('search-count');
+    if (count) {
+        count.textContent = ids === null ? '' : `${searchState.hits.length} match${searchState.hits.length === 1 ? '' : 'es'}`;
+    }
+}
+
+function focusNextHit() {
+    if (!searchState.hits.length) {
+        return;
+    }
+    if (searchState.current >= 0) {
+        searchState.hits[searchState.current].classList.remove('search-current');
+    }
+    searchState.current = (searchState.current + 1) % searchState.hits.length;
+    const element = searchState.hits[searchState.current];
+    element.classList.add('search-current');
+    element.scrollIntoView({ behavior: 'smooth', block: 'center' });
+}
@@ -8,6 +8,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeScrollSpy();
     initializeAnimations();
     initializeAnalysisSync();
+    initializeTimeline();
 });
 
 /**
@@ -238,6 +239,236 @@ function addUtteranceHoverEffects() {
     });
 }
 
+/**
+ * Call timeline: a fixed number of bins whatever the call length, drawn from
+ * the tiled multi-resolution timeline (pipeline/timeline.py). Zoom level z
+ * shows `bins` consecutive bins of level z, fetched as the one or two tiles
+ * they fall in; clicking a bin zooms in around it, and on the finest level
+ * scrolls to the utterances in it.
+ */
+const TIMELINE_COLORS = ['#0d6efd', '#6f42c1', '#d63384', '#fd7e14', '#20c997',
+                         '#ffc107', '#0dcaf0', '#dc3545', '#6610f2', '#6c757d'];
+const SPEAKER_COLORS = { tech: '#28a745', customer: '#007bff' };
+
+const timelineState = {
+    index: null,
+    indexUrl: null,
+    tiles: new Map(),
+    level: 0,
+    offset: 0,
+    request: 0,
+    bins: []
+};
+
+function initializeTimeline() {
+    const container = document.getElementById('call-timeline');
+    if (!container || container.dataset.loaded) return;
+    container.dataset.loaded = 'true';
+    const url = container.dataset.url || window.TIMELINE_URL;
+    if (!url) {
+        container.closest('.row').hidden = true;
+        return;
+    }
+
+    timelineState.indexUrl = new URL(url, window.location.href);
+    fetchTimelineJson(timelineState.indexUrl)
+        .then(index => {
+            if (!index.levels || !index.levels.length) {
+                throw new Error('Empty timeline');
+            }
+            timelineState.index = index;
+            timelineState.level = 0;
+            timelineState.offset = 0;
+            buildTimeline(container);
+            return showTimeline();
+        })
+        .catch(error => {
+            console.warn('Timeline unavailable:', error);
+            container.closest('.row').hidden = true;
+        });
+}
+
+function fetchTimelineJson(url) {
+    return fetch(url).then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+function loadTimelineTile(level, tile) {
+    const key = `${level}/${tile}`;
+    if (!timelineState.tiles.has(key)) {
+        const path = timelineState.index.tile_url.replace('{level}', level).replace('{tile}', tile);
+        const request = fetchTimelineJson(new URL(path, timelineState.indexUrl));
+        // A failed tile is fetched again next time it is shown
+        request.catch(() => timelineState.tiles.delete(key));
+        timelineState.tiles.set(key, request);
+    }
+    return timelineState.tiles.get(key);
+}
+
+function showTimeline() {
+    const index = timelineState.index;
+    const maxOffset = index.bins * (index.levels[timelineState.level].tiles - 1);
+    timelineState.offset = Math.max(0, Math.min(timelineState.offset, maxOffset));
+    const { level, offset } = timelineState;
+    const first = Math.floor(offset / index.bins);
+    const last = Math.floor((offset + index.bins - 1) / index.bins);
+    const request = ++timelineState.request;
+
+    const wanted = [];
+    for (let tile = first; tile <= last; tile++) {
+        wanted.push(loadTimelineTile(level, tile));
+    }
+    return Promise.all(wanted).then(tiles => {
+        // A later zoom or pan has already asked for another view
+        if (request !== timelineState.request) return;
+        const skip = offset - first * index.bins;
+        const stageRows = tiles.flatMap(tile => tile.stage_s).slice(skip, skip + index.bins);
+        const speakerRows = tiles.flatMap(tile => tile.speaker_s).slice(skip, skip + index.bins);
+        renderTimeline(stageRows, speakerRows, maxOffset);
+    });
+}
+
+function moveTimeline(level, offset) {
+    timelineState.level = level;
+    timelineState.offset = offset;
+    showTimeline().catch(error => console.warn('Timeline tile unavailable:', error));
+}
+
+function buildTimeline(container) {
+    const index = timelineState.index;
+    const bin = '<div class="timeline-bin"><div class="timeline-stage"></div><div class="timeline-speaker"></div></div>';
+    container.insertAdjacentHTML('beforeend', `
+        <div class="timeline-controls">
+            <button type="button" class="btn btn-sm btn-outline-secondary" data-action="out" title="Zoom out">
+                <i class="bi bi-zoom-out"></i>
+            </button>
+            <button type="button" class="btn btn-sm btn-outline-secondary" data-action="left" title="Earlier">
+                <i class="bi bi-chevron-left"></i>
+            </button>
+            <button type="button" class="btn btn-sm btn-outline-secondary" data-action="right" title="Later">
+                <i class="bi bi-chevron-right"></i>
+            </button>
+            <span class="timeline-zoom"></span>
+        </div>
+        <div class="timeline-bins">${bin.repeat(index.bins)}</div>
+        <div class="timeline-axis"><span></span><span></span></div>
+        <div class="timeline-legend">
+            ${index.stages.map((stage, position) => `
+                <span><i style="background-color: ${TIMELINE_COLORS[position % TIMELINE_COLORS.length]}"></i>${stage}</span>
+            `).join('')}
+        </div>
+    `);
+    timelineState.bins = Array.from(container.querySelectorAll('.timeline-bin'));
+
+    container.querySelector('.timeline-controls').addEventListener('click', event => {
+        const button = event.target.closest('button');
+        if (!button) return;
+        const half = Math.floor(index.bins / 2);
+        const { level, offset } = timelineState;
+        if (button.dataset.action === 'out' && level > 0) {
+            moveTimeline(level - 1, Math.floor((offset + half) / 2) - half);
+        } else if (button.dataset.action === 'left') {
+            moveTimeline(level, offset - half);
+        } else if (button.dataset.action === 'right') {
+            moveTimeline(level, offset + half);
+        }
+    });
+
+    container.querySelector('.timeline-bins').addEventListener('click', event => {
+        const element = event.target.closest('.timeline-bin');
+        if (element) {
+            selectTimelineBin(timelineState.bins.indexOf(element));
+        }
+    });
+}
+
+function selectTimelineBin(position) {
+    const index = timelineState.index;
+    const bin = timelineState.offset + position;
+    if (timelineState.level < index.levels.length - 1) {
+        moveTimeline(timelineState.level + 1, bin * 2 + 1 - Math.floor(index.bins / 2));
+        return;
+    }
+    // Finest level: the utterances themselves are the detail
+    const binSeconds = index.levels[timelineState.level].bin_s;
+    scrollToUtteranceAt(index.start + bin * binSeconds, index.start + (bin + 1) * binSeconds);
+}
+
+function scrollToUtteranceAt(from, to) {
+    const utterances = Array.from(document.querySelectorAll('.utterance[data-start]'));
+    const inRange = utterances.filter(element => {
+        const start = parseFloat(element.dataset.start);
+        return start >= from && start < to;
+    });
+    const target = inRange[0] || utterances.find(element => parseFloat(element.dataset.start) >= from);
+    if (!target) return;
+
+    document.querySelectorAll('.utterance.timeline-focus').forEach(element => {
+        element.classList.remove('timeline-focus');
+    });
+    (inRange.length ? inRange : [target]).forEach(element => element.classList.add('timeline-focus'));
+    target.scrollIntoView({ behavior: 'smooth', block: 'center' });
+}
+
+function renderTimeline(stageRows, speakerRows, maxOffset) {
+    const index = timelineState.index;
+    const level = index.levels[timelineState.level];
+
+    timelineState.bins.forEach((element, position) => {
+        const stageSeconds = stageRows[position];
+        const speakerSeconds = speakerRows[position];
+        const talk = stageSeconds.reduce((sum, seconds) => sum + seconds, 0);
+        const stageBar = element.firstElementChild;
+        const speakerBar = element.lastElementChild;
+        const from = index.start + (timelineState.offset + position) * level.bin_s;
+        const tooltip = [`${formatTimestamp(from)} - ${formatTimestamp(from + level.bin_s)}`];
+
+        if (!talk) {
+            stageBar.style.backgroundColor = 'transparent';
+            speakerBar.style.background = 'transparent';
+            element.title = `${tooltip[0]}\nSilence`;
+            return;
+        }
+
+        const dominant = stageSeconds.indexOf(Math.max(...stageSeconds));
+        stageBar.style.backgroundColor = TIMELINE_COLORS[dominant % TIMELINE_COLORS.length];
+        stageBar.style.opacity = 0.35 + 0.65 * Math.min(talk / (level.bin_s || 1), 1);
+
+        let edge = 0;
+        const stops = speakerSeconds.map((seconds, speaker) => {
+            const color = SPEAKER_COLORS[index.speakers[speaker].toLowerCase()] || '#adb5bd';
+            const stop = `${color} ${edge}% ${edge + 100 * seconds / talk}%`;
+            edge += 100 * seconds / talk;
+            return stop;
+        });
+        speakerBar.style.background = `linear-gradient(to right, ${stops.join(', ')})`;
+
+        stageSeconds.forEach((seconds, stage) => {
+            if (seconds) tooltip.push(`${index.stages[stage]}: ${Math.round(100 * seconds / talk)}%`);
+        });
+        speakerSeconds.forEach((seconds, speaker) => {
+            if (seconds) tooltip.push(`${index.speakers[speaker]} speaking: ${Math.round(100 * seconds / talk)}%`);
+        });
+        element.title = tooltip.join('\n');
+    });
+
+    const container = document.getElementById('call-timeline');
+    const from = index.start + timelineState.offset * level.bin_s;
+    const axis = container.querySelectorAll('.timeline-axis span');
+    axis[0].textContent = formatTimestamp(from);
+    axis[1].textContent = formatTimestamp(Math.min(from + index.bins * level.bin_s, index.end));
+    container.querySelector('.timeline-zoom').textContent = timelineState.level < index.levels.length - 1
+        ? `${2 ** timelineState.level}x - click a bin to zoom in`
+        : `${2 ** timelineState.level}x - click a bin to jump to its utterances`;
+    container.querySelector('[data-action="out"]').disabled = timelineState.level === 0;
+    container.querySelector('[data-action="left"]').disabled = timelineState.offset === 0;
+    container.querySelector('[data-action="right"]').disabled = timelineState.offset >= maxOffset;
+}
+
 /**
  * Utility function to format timestamps
  */